@@ -1,628 +1,4645 @@
-"""
-import librerie necessarie (numeri random, gui toolkit)
-"""
-import random 
-from tkinter import *
-try:
-    import tkinter as tk
-    from tkinter import messagebox
-except ImportError:
-    tk = None
-    
-#parametri di default: mappature dei punteggi per le sequenze
-DEFAULT_MAP_PUNTEGGIO = {2: 1, 3: 2, 4: 10, 5: 25}
-
-def get_segmenti_contigui(linea, simbolo):
-    """
-    data una linea e un simbolo, restituisce una lista con le lunghezze
-    delle sequenze continue del simbolo in quella linea
-    -esamina ogni cella della linea fornita e conta le sequenze del simbolo passato
-    -quando trova simboli uguali, conta la sequenza e la memorizza nella lista segmenti
-    """
-    segmenti = []
-    count = 0
-    for cella in linea:
-        if cella == simbolo:
-            count += 1
-        else:
-            if count > 0:
-                segmenti.append(count)
-                count = 0
-    if count > 0:
-        segmenti.append(count)
-    return segmenti
-
-def punteggio_linea(segmenti, mappa_punteggi):
-    """
-    calcola il punteggio complessivo per una linea dato l'elenco delle lunghezze delle
-    sequenze e la mappa dei punteggi
-    -somma i punteggi delle sequenze contigue di simboli in una linea utilizzando la mappa dei punteggi per determinare il punteggio
-    -sequenza inferiore a 3, non viene conteggiata - lunghezza 5 o superiore, viene assegnato il punteggio associato alla sequenza di lunghezza 5
-    """
-    punteggio = 0
-    for seg in segmenti:
-        if seg < 3:
-            continue
-        elif seg >= 5:
-            punteggio += mappa_punteggi[5]
-        elif seg in mappa_punteggi:
-            punteggio += mappa_punteggi[seg]
-    return punteggio
-
-
-def get_linee_board(board, dimensione):
-    """
-    data la mappa di gioco (board) e la sua dimensione, restituisce una lista di tutte le linee da controllare:
-        -righe orizzontali
-        -colonne verticali
-        -diagonali (dall'alto a sinistra verso il basso a destra)
-        -antidiagonali (dall'alto a destra verso il basso a sinistra)
-    """
-    linee = []
-    N = dimensione
-
-    #righe
-    for r in range(N):
-        riga = []
-        for c in range(N):
-            riga.append(board[r][c])
-        linee.append(riga)
-
-    #colonne
-    for c in range(N):
-        colonna = []
-        for r in range(N):
-            colonna.append(board[r][c])
-        linee.append(colonna)
-
-    #diagonali
-    for k in range(N):
-        diag1 = []
-        for i in range(k, N):
-            diag1.append(board[i][i - k])
-        if diag1:
-            linee.append(diag1)
-
-        if k != 0:
-            diag2 = []
-            for i in range(k, N):
-                diag2.append(board[i - k][i])
-            if diag2:
-                linee.append(diag2)
-    #antidiagonali
-    for k in range(N):
-        anti1 = []
-        for i in range(k, N):
-            col_index = N - 1 - (i - k)
-            anti1.append(board[i][col_index])
-        if anti1:
-            linee.append(anti1)
-
-        if k != 0:
-            anti2 = []
-            for i in range(k, N):
-                col_index = N - 1 - i
-                anti2.append(board[i - k][col_index])
-            if anti2:
-                linee.append(anti2)
-
-    return linee
-
-def calcolo_punteggio_board(board, simbolo, dimensione, mappa_punteggi):
-    """
-    calcola il punteggio per il simbolo data la situazione attuale del board di gioco
-    -scorre le linee del board
-    -calcola richiamndo la funzione per trovare i segmenti di simboli
-    -calcola il punteggio totale sommando i punteggi delle linee
-    """
-    punteggio_totale = 0
-    for linea in get_linee_board(board, dimensione):
-        segmenti = get_segmenti_contigui(linea, simbolo)
-        punteggio_totale += punteggio_linea(segmenti, mappa_punteggi)
-    return punteggio_totale
-
-
-
-def fine_partita(game, root, bottoni, vincitore):
-    """
-    gestisce la fine della partita mostrando un messaggio di vittoria e una finestra
-    con opzioni per l'utente su come procedere (nuova partita, impostazioni, uscita)
-    -se non esiste message_box mostrato nell'oggetto game viene creato e impostato a false
-    -mostra il msg solo se non è già stato mostrato
-    -se la partita non è già stata segnata come finita, mostra la finestra di fine partita
-    -crea l'istanza della finestra e settaggio impostazioni grafiche e bottoni
-    """
-    
-    if not hasattr(game, 'messagebox_mostrato'):
-        game.messagebox_mostrato = False
-        
-    
-    if not game.messagebox_mostrato:
-        messagebox.showinfo("Vittoria", f"Ha vinto {vincitore['nome']} con {vincitore['score']} punti!")
-        game.messagebox_mostrato = True
-
-    
-    if not hasattr(game, 'partita_finita') or not game.partita_finita:
-        game.partita_finita = True
-        finestra_fine = Toplevel(root)
-        finestra_fine.title("Partita finita")  
-        finestra_fine.geometry("450x300") 
-        label1 = Label(finestra_fine, text = "Vuoi fare un'altra partita?")
-        label1.pack()
-        
-        #bottoni con diverse opzioni
-        button = Button(finestra_fine, text = "Si, con le stesse impostazioni",
-                    command = lambda:reset_partita(game, finestra_fine, bottoni))
-        
-        button_impostazioni = Button(finestra_fine, text = "Si, con impostazioni diverse",
-                    command = lambda:restart_impostazioni(root, game)) 
-        
-        button_exit = Button(finestra_fine, text = "No, esci",
-                    command = lambda:chiudi_finestra(root, game)) 
-        button.place(x = 50, y = 50)
-        button_impostazioni.place(x = 230, y = 48)
-        button_exit.place(x = 190, y = 100)
-        
-        
-
-def reset_partita(game, root, bottoni):
-    """    
-    reimposta lo stato del gioco per iniziare una nuova partita con le stesse impostazioni:
-    -azzera la griglia, i punteggi dei giocatori e il turno corrente
-    -aggiorna l'interfaccia grafica rimuovendo i simboli dai bottoni 
-    -infine chiude la finestra di fine partita
-    """
-    
-    game.partita_finita = False
-    
-    game.board = [['.' for _ in range(game.dimensione)] for _ in range(game.dimensione)]
-    for giocatore in game.giocatori:
-        giocatore['score'] = 0
-    game.turno = 0
-    
-    for r in range(game.dimensione):
-        for c in range(game.dimensione):
-            bottoni[r][c].config(text='')
-            
-    print("Nuova partita avviata con le stesse impostazioni!")
-    chiudi_finestra(root, game)
-    
-def restart_impostazioni(root, game):
-    """
-    rermina la partita attuale e avvia una nuova finestra per scegliere impostazioni diverse
-    """
-    game.partita_finita = False  
-    chiudi_finestra(root, game)
-    print("Nuova partita con impostazioni diverse")
-    run_gui()
-    
-    
-def chiudi_finestra(root, game):
-    """
-    chiude la finestra corrente e imposta lo stato del gioco come non finito
-    """
-    game.partita_finita = False
-    root.destroy()
-
-
-   
-class Game:
-    def __init__(self, dimensione, giocatori, mappa_punteggi=DEFAULT_MAP_PUNTEGGIO, win_threshold=50):
-        """
-        inizializza la classe gioco-game con:
-          - dimensione: lato della matrice NxN
-          - giocatori: lista di dizionari contenenti { 'nome', 'simbolo', 'score', 'tipo' } -- per i computer, è aggiunto anche 'difficolta'
-          - score_map: mappa dei punteggi per lunghezze di sequenze
-          - turno: turno di gioco
-          - board di gioco
-          - win_threshold: punteggio per vincere la partita
-        """ 
-        self.dimensione = dimensione
-        self.board =  [['.' for _ in range ( dimensione ) ] for _ in range ( dimensione ) ]
-        self.giocatori = giocatori 
-        self.mappa_punteggi = mappa_punteggi
-        self.win_threshold = win_threshold
-        self.turno = 0
-                
-        
-    def stampa_board(self):
-        """
-        stampa il tabellone in maniera formattata
-        -scorre il board stampa gli elementi della riga separati da uno spazio " " 
-        """
-        print("\nTabellone:")
-        for riga in self.board:
-            print(" ".join(riga))
-        print()
-        
-    
-    def mossa_valida(self, r, c):
-        """
-        verifica se la mossa (r, c) è valida
-        -controlla se r e c sono dentro i limiti del board 
-        -se r e c sono validi e la casella è vuota ritorna True 
-        """
-        r_valida = 0 <= r < self.dimensione
-        c_valida = 0 <= c < self.dimensione
-        casella_vuota = self.board[r][c] == '.'
-        if r_valida and c_valida and casella_vuota:
-            return True
-        else:
-            return False
-    
-    def giocatore_corrente(self):
-        """
-        restituisce il giocatore a cui tocca
-        """
-        return self.giocatori[self.turno]
-    
-       
-    def mossa(self, r, c):
-        """
-        effettua la mossa per il giocatore corrente assegnando il simbolo nella posizione della griglia
-        """
-        giocatore = self.giocatore_corrente()
-        self.board[r][c] = giocatore['simbolo']
-        
-
-    def prossimo_turno(self):
-        """
-        passa il turno al giocatore successivo -- % per far si che quando si arrivi a turno == giocatori il resto dia 0 e si rinizi dal turno del primo giocatore
-        """
-        self.turno = (self.turno + 1) % len(self.giocatori)
-        
-        
-    def get_tutte_linee(self):
-        """
-        restituisce tutte le linee (righe, colonne, diagonali e antidiagonali) del board richiamando la funzione get_linee_board
-        """
-        return get_linee_board(self.board, self.dimensione)
-    
-    
-    def calcolo_punteggio(self, simbolo):
-        """
-        calcola il punteggio per il simbolo dato esaminando tutte le linee del board
-        -si scorrono tutte le linee del board
-        -si calcolano i segmenti di simboli 
-        -si sommano i punteggi totali sulla base dei segmenti di simboli 
-        """
-        punteggio_totale = 0
-        for linea in self.get_tutte_linee():
-            segmenti = get_segmenti_contigui(linea, simbolo)
-            punteggio_totale += punteggio_linea(segmenti, self.mappa_punteggi)
-        return punteggio_totale
-    
-
-    def aggiorna_punteggio(self):
-        """
-        aggiorna punteggio di ogni giocatore
-        """
-        for giocatore in self.giocatori:
-            giocatore['score'] = self.calcolo_punteggio(giocatore['simbolo'])
-    
-    
-    def check_vincitore(self):
-        """
-        verifica se un giocatore ha raggiungo il punteggio necessario per vincere
-        """
-        for giocatore in self.giocatori:
-            if giocatore['score'] >= self.win_threshold:
-                return giocatore
-            
-        return None
-    
-
-def mossa_computer(game, giocatore):
-    """
-    funzioni per il funzionamento del computer nel gioco:
-        -se non ci sono celle libere, la funzione restituisce none
-        -difficoltà facile, il computer sceglie mossa in modo casuale
-        -difficoltà difficile simula:
-            -per ciascuna cella libera, crea una copia simulata della board con la mossa ipotetica
-            -calcola il nuovo punteggio ottenuto con quella mossa
-            -confronta il guadagno rispetto al punteggio attuale
-            -sceglie la mossa che massimizza il guadagno
-            -se non trova alcuna mossa con guadagno positivo sceglie mossa casuale
-    """
-    celle_libere = []
-    for i in range(game.dimensione):
-        for j in range(game.dimensione):
-            if game.board[i][j] == '.':
-                celle_libere.append((i, j))
-
-    if len(celle_libere) == 0:
-        return None
-
-    difficolta = giocatore.get('difficolta', 'facile')
-
-    if difficolta == 'facile':
-        return random.choice(celle_libere)
-
-    elif difficolta == 'difficile':
-        miglior_mossa = None
-        miglior_guadagno = -1000
-
-        punteggio_attuale = calcolo_punteggio_board(game.board, giocatore['simbolo'], game.dimensione, game.mappa_punteggi)
-
-        for mossa in celle_libere:
-            i = mossa[0]
-            j = mossa[1]
-
-            board_simulata = []
-            for riga in game.board:
-                nuova_riga = []
-                for cella in riga:
-                    nuova_riga.append(cella)
-                board_simulata.append(nuova_riga)
-
-
-            board_simulata[i][j] = giocatore['simbolo']
-
-            nuovo_punteggio = calcolo_punteggio_board(board_simulata, giocatore['simbolo'], game.dimensione, game.mappa_punteggi)
-            guadagno = nuovo_punteggio - punteggio_attuale
-
-            if guadagno > miglior_guadagno:
-                miglior_guadagno = guadagno
-                miglior_mossa = (i, j)
-
-        if miglior_mossa is not None:
-            return miglior_mossa
-        else:
-            return random.choice(celle_libere)
-
-    else:
-        return random.choice(celle_libere)
-
-
-
-"""
-funzionamento modalità da riga di comando
-"""
-def run_cli():
-    """
-    modalità da linea di comando - command line interface
-    -l'utente inserisce la dimensione della matrice di gioco (NxN), il numero di giocatori e per ogni giocatore fornisce:
-        -umano o computer
-        -nome del giocatore
-        -simbolo
-        -per giocatore computer si sceglie anche la difficolta
-    -viene creato l'oggetto game contenente le informazioni e avviato il gioco
-    -alternanza dei turni: per ogni turno, viene stampata la griglia attuale e i punteggi, 
-       quindi viene chiesta la mossa al giocatore corrente
-    -verifica della validità della mossa
-    -aggiornamento della griglia e dei punteggi: la mossa viene applicata e, se un giocatore vince, 
-       viene stampato il nome del vincitore e il gioco termina
-    """
-    
-    print("Benvenuto nel gioco Filetto (modalità CLI)!")
-    try:
-        dimensione = int(input("Inserisci dimensione della matrice NxN: "))
-    except ValueError:
-        print("Valore non valido per la dimensione.")
-        return
-
-    try:
-        k = int(input("Inserisci il numero di giocatori: "))
-    except ValueError:
-        print("Valore non valido per il numero di giocatori.")
-        return
-    
-
-    giocatori = []
-    for i in range(k):
-        tipo = input(f"Giocatore {i+1}. è 'umano' o 'computer'? (u/c): ").strip().lower()
-        nome = input(f"Inserisci il nome del giocatore {i+1}: ").strip()
-        simbolo = input(f"Inserisci il simbolo per {nome} (es. x, 0, *): ").strip()
-        if tipo == 'c' or tipo == 'computer':
-            difficolta = input("Seleziona difficoltà per il computer (facile/difficile): ").strip().lower()
-            if difficolta not in ['facile', 'difficile']:
-                difficolta = 'facile'
-            giocatori.append({
-                'nome': nome,
-                'simbolo': simbolo,
-                'score': 0,
-                'tipo': 'computer',
-                'difficolta': difficolta
-            })
-        else:
-            giocatori.append({
-                'nome': nome,
-                'simbolo': simbolo,
-                'score': 0,
-                'tipo': 'umano'
-            })
-
-    game = Game(dimensione, giocatori)
-    
-    if game.giocatore_corrente()['tipo'] == 'computer':
-        giocatore_corrente = game.giocatore_corrente()
-        r, c = mossa_computer(game, giocatore_corrente)
-        print(f"Il computer ({giocatore_corrente.get('difficolta', 'facile')}) ha scelto la mossa {r} {c}")
-        game.mossa(r, c)
-        game.prossimo_turno()
-    
-    while True: 
-        game.stampa_board()
-        game.aggiorna_punteggio()
-        print("Punteggio:")
-        for giocatore in game.giocatori:
-            print(f"{giocatore['nome']}: {giocatore['score']} punti")
-        
-        vincitore = game.check_vincitore()
-        if vincitore:
-            print(f"Ha vinto {vincitore['nome']}!")
-            break
-        
-        giocatore_corrente = game.giocatore_corrente()
-        print(f"Turno di {giocatore_corrente['nome']} ({giocatore_corrente['simbolo']})")
-        if giocatore_corrente['tipo'] == 'umano':
-            mossa_input = input("Inserisci mossa (riga colonna, separate da spazio): ")
-            try:
-                r, c = map(int, mossa_input.split())
-            except:
-                print("Mossa non valida.")
-                continue
-        else:
-            r, c = mossa_computer(game, giocatore_corrente)
-            print(f"Il computer ({giocatore_corrente.get('difficolta', 'facile')}) ha scelto la mossa {r} {c}")
-        
-        if not game.mossa_valida(r,c):
-            print("Mossa non valida o cella già occupata, Riprova.")
-            continue
-        game.mossa(r,c)
-        game.prossimo_turno()
-
-"""
-funzionamento modalità grafica
-"""       
-def run_gui():
-    """
-    modalità grafica
-    -gestisce l'interfaccia grafica di gioco, inclusa la creazione della finestra, della griglia di gioco e dei pulsanti
-    -consente ai giocatori di interagire con la griglia tramite clic sui pulsanti, che corrispondono alle mosse del gioco
-    -gestisce turni alternati tra giocatori umani e computer
-    -controlla la validità delle mosse e aggiorna la griglia e il punteggio
-    -aggiornamento della griglia e dei punteggi: la mossa viene applicata e, se un giocatore vince, 
-       viene stampato il nome del vincitore e il gioco termina
-
-    """
-    if tk is None:
-        print("Il modulo tkinter non è disponibile.")
-        print("Verrà avviata la versione CLI")
-        run_cli()
-        return
-        
-    print("Modalità GUI attivata")
-        
-    try: 
-        dimensione = int(input(" Inserisci dimensione della matrice NxN: "))
-    except ValueError:
-        print("Valore non valido per la dimensione.")
-        return
-        
-    try:
-        k = int(input(" Inserisci il numero di giocatori: "))
-    except ValueError:
-        print("Valore non valido per il numero di giocatori.")
-        return
-    
-    giocatori = []
-    for i in range(k):
-        tipo = input(f"Giocatore {i+1} è 'umano' o 'computer'? (u/c): ").strip().lower()
-        nome = input(f"Inserisci il nome del giocatore {i+1}: ").strip()
-        simbolo = input(f"Inserisci il simbolo per {nome} (es. x, 0, *): ").strip()
-        if tipo == 'c':
-            difficolta = input("Seleziona difficoltà per il computer (facile/difficile): ").strip().lower()
-            if difficolta not in ['facile', 'difficile']:
-                difficolta = 'facile'
-            giocatori.append({
-                    'nome': nome,
-                    'simbolo': simbolo,
-                    'score': 0,
-                    'tipo': 'computer',
-                    'difficolta': difficolta
-                })
-        else: 
-                giocatori.append({
-                    'nome': nome,
-                    'simbolo': simbolo,
-                    'score': 0,
-                    'tipo': 'umano'
-                })
-        
-    game = Game(dimensione, giocatori)
-    root = tk.Tk()
-    root.configure(bg="#f0f0f0")
-    
-    root.title("Gioco Filetto")
-        
-    bottoni = [[None for _ in range(dimensione)] for _ in range(dimensione)]
-    label_punteggio = tk.Label(root, text="Punteggio:", font=("Helvetica", 12))
-    label_punteggio.grid(row=dimensione, column=0, columnspan=dimensione, pady=10)
-    
-    def aggiorna_board():
-        """
-        aggiorna la visualizzazione della griglia e dei punteggi nel gioco, aggiorna il testo dei bottoni con i valori correnti del game board
-        aggiornna il puntegggio e verifica se c'è un vincitore, se si termina la partita
-        """
-        for i in range(dimensione):
-            for j in range(dimensione):
-                bottoni[i][j]['text'] = game.board[i][j]
-        game.aggiorna_punteggio()
-        testo_punteggio = "Punteggi:\n" + "\n".join([f"{g['nome']} ({g['simbolo']}): {g['score']}" for g in game.giocatori])
-        label_punteggio.config(text=testo_punteggio)
-        vincitore = game.check_vincitore()
-        if vincitore:
-            
-            fine_partita(game, root, bottoni, vincitore)
-
-           
-    def click(i, j):
-        """
-        gestisce l'evento di clic su una cella della griglia, verifica se la mossa (i,j) è valida richiamando la funzione mossa_valida esegue la mossa
-        aggiorna il board (aggiorna_board) e passa al turno successivo, se il giocatore è computer avvia mossa computer con delay di 0,35 secondi
-        """
-        giocatore_corrente = game.giocatore_corrente()
-        if not game.mossa_valida(i, j):
-            messagebox.showwarning("Mossa non valida", "Mossa non valida o cella occupata, Riprova.")
-            return
-        game.mossa(i, j)
-        aggiorna_board()
-        game.prossimo_turno()
-            
-        if game.giocatore_corrente()['tipo'] == 'computer':
-                root.after(350, lambda: mossa_computer_gui(game, root, bottoni))
-    
-    def mossa_computer_gui(game, root, bottoni):
-        """
-        Funzione per eseguire una mossa del computer nell'interfaccia grafica
-        -esegue la mossa se possibile aggiorna il board e passa il turno
-        -se il prossimo giocatore è ancora un computer, programma la sua mossa
-        -se il primo giocatore è un computer, esegue la prima mossa dopo che l'interfaccia è stata creata
-        """
-        corrente = game.giocatore_corrente()
-        mossa = mossa_computer(game, corrente)
-        if mossa is None:
-            messagebox.showinfo("Pareggio", "Tabellone pieno")
-            root.destroy()
-            return 
-        r, c = mossa
-        game.mossa(r, c)
-        aggiorna_board()
-        game.prossimo_turno()
-        
-        
-        if not hasattr(game, 'partita_finita') or not game.partita_finita:
-            if game.giocatore_corrente()['tipo'] == 'computer':
-                root.after(350, lambda: mossa_computer_gui(game, root, bottoni))
-    
-    for i in range(dimensione):
-        for j in range(dimensione):
-            btn = tk.Button(root, text=game.board[i][j], width=4, height=2,
-                            font=("Helvetica", 14),
-                            bg="#ffffff", activebackground="#add8e6",  
-                            fg="#000000", activeforeground="#000000",
-                            command=lambda i=i, j=j: click(i, j))
-            btn.grid(row=i, column=j, padx=2, pady=2)
-            bottoni[i][j] = btn
-    
-    
-    if game.giocatore_corrente()['tipo'] == 'computer':
-        root.after(500, lambda: mossa_computer_gui(game, root, bottoni))
-
-    root.mainloop()
-              
-def main():
-    """
-    main - avvio del gioco e scelta della modalità
-    """
-    print("----- Gioco Filetto -----")
-
-    modalita = input("Scegli modalità di gioco: (1) GUI - Interfaccia grafica, (2) CLI - Riga di comando: ").strip()
-    if modalita == '1':
-        run_gui()
-    else:
-        run_cli()
-
-if __name__ == "__main__":
-    main()
+"""
+import librerie necessarie (numeri random, numpy opzionale per la board compatta);
+il gui toolkit tkinter è importato solo quando si avvia la modalità grafica (vedi importa_tk),
+numpy e asyncio solo quando servono (vedi importa_numpy e importa_asyncio)
+"""
+import random 
+import time
+import math
+import json
+import os
+import statistics
+import sys
+import tracemalloc
+import threading
+import queue
+import mmap
+import glob
+import hashlib
+import struct
+import bisect
+import operator
+import argparse
+import uuid
+import atexit
+import cProfile
+import pstats
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+try:
+    import resource
+except ImportError:
+    resource = None
+#moduli di tkinter, caricati da importa_tk all'avvio dell'interfaccia grafica
+tk = None
+messagebox = None
+#modulo numpy, caricato da importa_numpy alla prima board numpy o matrice dei guadagni; numpy_assente se l'import è fallito
+np = None
+numpy_assente = False
+#modulo asyncio, caricato da importa_asyncio all'avvio del server o del test di carico
+asyncio = None
+
+def importa_numpy():
+    """
+    importa numpy la prima volta che serve, così le modalità che non lo usano partono senza caricarlo
+    -restituisce False se numpy non è disponibile; il fallimento è ricordato, così le mosse del computer non ritentano l'import
+    """
+    global np, numpy_assente
+    if np is None and not numpy_assente:
+        try:
+            import numpy
+        except ImportError:
+            numpy_assente = True
+            return False
+        np = numpy
+    return np is not None
+
+def importa_asyncio():
+    """
+    importa asyncio la prima volta che serve (server e test di carico), così le altre modalità partono senza caricarlo
+    """
+    global asyncio
+    if asyncio is None:
+        import asyncio as modulo
+        asyncio = modulo
+    return asyncio
+    
+#parametri di default: mappature dei punteggi per le sequenze (con le regole di default le sequenze di 2 non valgono punti, vedi RegolePunteggio)
+DEFAULT_MAP_PUNTEGGIO = {2: 1, 3: 2, 4: 10, 5: 25}
+
+#tempo massimo di default per una mossa del computer nell'interfaccia grafica, superato il quale si gioca una mossa casuale
+TEMPO_MASSIMO_MOSSA_MS = 5000
+
+#oltre questa dimensione l'interfaccia grafica disegna il board su un canvas invece di creare un bottone per cella
+SOGLIA_CANVAS = 20
+
+#numero di celle candidate oltre il quale il computer 'difficile' calcola i guadagni di tutto il board in un solo passaggio numpy
+SOGLIA_MATRICE_GUADAGNI = 256
+
+#livelli di difficoltà disponibili per i giocatori computer
+DIFFICOLTA = ['facile', 'difficile', 'esperto', 'mcts']
+
+def get_segmenti_contigui(linea, simbolo):
+    """
+    data una linea e un simbolo, restituisce una lista con le lunghezze
+    delle sequenze continue del simbolo in quella linea
+    -esamina ogni cella della linea fornita e conta le sequenze del simbolo passato
+    -quando trova simboli uguali, conta la sequenza e la memorizza nella lista segmenti
+    """
+    segmenti = []
+    count = 0
+    for cella in linea:
+        if cella == simbolo:
+            count += 1
+        else:
+            if count > 0:
+                segmenti.append(count)
+                count = 0
+    if count > 0:
+        segmenti.append(count)
+    return segmenti
+
+def punteggio_linea(segmenti, mappa_punteggi):
+    """
+    calcola il punteggio complessivo per una linea dato l'elenco delle lunghezze delle
+    sequenze e la mappa dei punteggi
+    -somma i punteggi delle sequenze contigue di simboli in una linea utilizzando la mappa dei punteggi per determinare il punteggio
+    -sequenza inferiore a 3, non viene conteggiata - lunghezza 5 o superiore, viene assegnato il punteggio associato alla sequenza di lunghezza 5
+    -corrisponde alle regole di default di RegolePunteggio, che il gioco usa al posto di questa funzione
+    """
+    punteggio = 0
+    for seg in segmenti:
+        if seg < 3:
+            continue
+        elif seg >= 5:
+            punteggio += mappa_punteggi[5]
+        elif seg in mappa_punteggi:
+            punteggio += mappa_punteggi[seg]
+    return punteggio
+
+
+class IndiceLinee:
+    """
+    indice delle linee di un board NxN, costruito una volta per dimensione e condiviso da tutti i giochi (vedi indice_linee):
+    -coordinate: per ogni linea le celle (r, c), nell'ordine di get_linee_board (righe, colonne, diagonali, antidiagonali)
+    -offset: per ogni linea le posizioni r * N + c delle celle in un board piatto;
+     estrattori: per ogni linea un operator.itemgetter che legge quelle posizioni dal board piatto in una sola chiamata
+    -direzioni: per ogni linea l'indice della direzione in DIREZIONI
+    -chiavi: per ogni linea la chiave usata dalla cache dei punteggi incrementali, ad esempio ('riga', r) o ('diagonale', r - c)
+    -linee_cella[r][c]: gli identificativi delle quattro linee che passano per la cella, in ordine di direzione
+    """
+    def __init__(self, dimensione):
+        self.dimensione = dimensione
+        N = dimensione
+        celle = [[(r, c) for c in range(N)] for r in range(N)]
+        linee = []
+
+        #righe
+        for r in range(N):
+            riga = []
+            for c in range(N):
+                riga.append(celle[r][c])
+            linee.append(riga)
+
+        #colonne
+        for c in range(N):
+            colonna = []
+            for r in range(N):
+                colonna.append(celle[r][c])
+            linee.append(colonna)
+
+        #diagonali
+        for k in range(N):
+            diag1 = []
+            for i in range(k, N):
+                diag1.append(celle[i][i - k])
+            if diag1:
+                linee.append(diag1)
+
+            if k != 0:
+                diag2 = []
+                for i in range(k, N):
+                    diag2.append(celle[i - k][i])
+                if diag2:
+                    linee.append(diag2)
+        #antidiagonali
+        for k in range(N):
+            anti1 = []
+            for i in range(k, N):
+                col_index = N - 1 - (i - k)
+                anti1.append(celle[i][col_index])
+            if anti1:
+                linee.append(anti1)
+
+            if k != 0:
+                anti2 = []
+                for i in range(k, N):
+                    col_index = N - 1 - i
+                    anti2.append(celle[i - k][col_index])
+                if anti2:
+                    linee.append(anti2)
+
+        self.coordinate = linee
+        self.offset = [[r * N + c for r, c in linea] for linea in linee]
+        #itemgetter con un solo indice restituirebbe la cella e non una tupla: per le linee di una cella si usa uno slice
+        self.estrattori = [operator.itemgetter(*offset) if len(offset) > 1 else operator.itemgetter(slice(offset[0], offset[0] + 1))
+                           for offset in self.offset]
+        self.direzioni = [0] * N + [1] * N + [2] * max(0, 2 * N - 1) + [3] * max(0, 2 * N - 1)
+        nomi = ('riga', 'colonna', 'diagonale', 'antidiagonale')
+        self.chiavi = []
+        self.linee_cella = [[[None] * 4 for _ in range(N)] for _ in range(N)]
+        for indice, (linea, direzione) in enumerate(zip(linee, self.direzioni)):
+            r, c = linea[0]
+            valore = (r, c, r - c, r + c)[direzione]
+            self.chiavi.append((nomi[direzione], valore))
+            for r, c in linea:
+                self.linee_cella[r][c][direzione] = indice
+        self.linee_cella = [[tuple(linee_cella) for linee_cella in riga] for riga in self.linee_cella]
+
+
+#indici delle linee già costruiti, per dimensione del board, e lock che ne protegge la costruzione
+INDICI_LINEE = {}
+BLOCCO_INDICI_LINEE = threading.Lock()
+
+def indice_linee(dimensione):
+    """
+    restituisce l'IndiceLinee della dimensione, costruendolo alla prima richiesta
+    -la costruzione avviene sotto BLOCCO_INDICI_LINEE: thread che chiedono insieme una dimensione nuova
+     (partite del server, calcoli dell'interfaccia grafica) ricevono lo stesso indice, costruito una volta sola
+    -gli indici già costruiti sono letti senza lock
+    """
+    indice = INDICI_LINEE.get(dimensione)
+    if indice is None:
+        with BLOCCO_INDICI_LINEE:
+            indice = INDICI_LINEE.get(dimensione)
+            if indice is None:
+                indice = INDICI_LINEE[dimensione] = IndiceLinee(dimensione)
+    return indice
+
+def get_linee_board(board, dimensione):
+    """
+    data la mappa di gioco (board) e la sua dimensione, restituisce una lista di tutte le linee da controllare:
+        -righe orizzontali
+        -colonne verticali
+        -diagonali (dall'alto a sinistra verso il basso a destra)
+        -antidiagonali (dall'alto a destra verso il basso a sinistra)
+    -il board viene appiattito e le linee sono lette con gli estrattori dell'indice della dimensione invece di ricalcolarne le coordinate
+    """
+    celle = [cella for riga in board for cella in riga]
+    return [list(estrai(celle)) for estrai in indice_linee(dimensione).estrattori]
+
+class CodiciSimbolo(dict):
+    """
+    tabella di str.translate che riduce una linea alla sequenza del simbolo, usata per la chiave di CacheLinee:
+    -'x' per il simbolo, '.' per le celle che non ne fanno parte
+    -con i bonus per le estremità le celle degli altri simboli diventano '|', perché chiudono le sequenze mentre quelle vuote le lasciano aperte
+    -i caratteri non ancora visti sono aggiunti alla prima lettura da __missing__, poi la traduzione resta tutta in C
+    """
+    def __init__(self, simbolo, bonus):
+        super().__init__({ord(simbolo): 'x', ord('.'): '.'})
+        self.altro = '|' if bonus else '.'
+
+    def __missing__(self, carattere):
+        self[carattere] = self.altro
+        return self.altro
+
+
+class CacheLinee:
+    """
+    cache LRU dei punteggi delle linee, indicizzata dalla sequenza del simbolo nella linea e dalla mappa dei punteggi:
+    -la chiave è la linea tradotta da CodiciSimbolo in una stringa di un carattere per cella: conta solo dove stanno le celle del simbolo
+     (e, con i bonus, quali delle altre sono vuote), quindi linee di simboli o avversari diversi con la stessa sequenza condividono la voce
+     e ogni voce occupa una stringa invece di una tupla di riferimenti
+    -tra due valutazioni del board cambiano poche celle, quindi quasi tutte le linee sono già in cache
+    -quando supera 'limite' voci elimina quelle usate meno di recente; con limite 0 la cache è disattivata
+    -conta colpi e mancati per misurarne l'efficacia
+    -è condivisa dai thread che calcolano le mosse del computer (interfaccia grafica e server), quindi gli accessi sono protetti da un lock
+    """
+    def __init__(self, limite=20000):
+        self.limite = limite
+        self.voci = OrderedDict()
+        self.codici = {}
+        self.colpi = 0
+        self.mancati = 0
+        self.blocco = threading.Lock()
+
+    def sequenza(self, linea, simbolo, bonus):
+        """
+        restituisce la sequenza del simbolo nella linea come stringa compatta (vedi CodiciSimbolo)
+        -la traduzione è carattere per carattere, quindi vale solo se ogni cella è un carattere;
+         con simboli di più caratteri la chiave resta il contenuto della linea insieme al simbolo
+        """
+        if len(simbolo) == 1:
+            testo = ''.join(linea)
+            if len(testo) == len(linea):
+                codici = self.codici.get((simbolo, bonus))
+                if codici is None:
+                    codici = self.codici.setdefault((simbolo, bonus), CodiciSimbolo(simbolo, bonus))
+                return testo.translate(codici)
+        return (tuple(linea), simbolo)
+
+    def punteggio(self, linea, simbolo, regole, direzione):
+        """
+        restituisce il punteggio della linea per il simbolo, calcolandolo con RegolePunteggio.punteggio_linea se non è in cache
+        -direzione è l'indice della direzione della linea in DIREZIONI; nella chiave entra solo il suo peso,
+         così con pesi uguali righe, colonne e diagonali con la stessa sequenza condividono la voce
+        """
+        if self.limite <= 0:
+            return regole.punteggio_linea(linea, simbolo, direzione)
+        chiave = (self.sequenza(linea, simbolo, regole.bonus), regole.chiave, regole.pesi[direzione])
+        with self.blocco:
+            punteggio = self.voci.get(chiave)
+            if punteggio is not None:
+                self.colpi += 1
+                self.voci.move_to_end(chiave)
+                return punteggio
+            self.mancati += 1
+        punteggio = regole.punteggio_linea(linea, simbolo, direzione)
+        with self.blocco:
+            self.voci[chiave] = punteggio
+            if len(self.voci) > self.limite:
+                self.voci.popitem(last=False)
+        return punteggio
+
+    def punteggio_celle(self, celle, simbolo, regole, indice):
+        """
+        restituisce il punteggio del simbolo su tutte le linee di un board appiattito in 'celle' (vedi IndiceLinee)
+        -il board è tradotto una volta sola con CodiciSimbolo e le chiavi sono lette dal testo tradotto con gli estrattori dell'indice,
+         senza costruire le liste delle linee
+        -le ricerche in cache sono fatte sotto un solo lock; le linee mancanti sono calcolate fuori dal lock sulla sequenza stessa
+        -con celle di più caratteri ripiega su punteggio, linea per linea
+        """
+        testo = ''.join(celle)
+        if len(simbolo) != 1 or len(testo) != len(celle):
+            return sum(self.punteggio(list(estrai(celle)), simbolo, regole, direzione)
+                       for estrai, direzione in zip(indice.estrattori, indice.direzioni))
+        codici = self.codici.get((simbolo, regole.bonus))
+        if codici is None:
+            codici = self.codici.setdefault((simbolo, regole.bonus), CodiciSimbolo(simbolo, regole.bonus))
+        testo = testo.translate(codici)
+        sequenze = [''.join(estrai(testo)) for estrai in indice.estrattori]
+        if self.limite <= 0:
+            return sum(regole.punteggio_linea(sequenza, 'x', direzione) for sequenza, direzione in zip(sequenze, indice.direzioni))
+        chiave_regole = regole.chiave
+        pesi = regole.pesi
+        chiavi = [(sequenza, chiave_regole, pesi[direzione]) for sequenza, direzione in zip(sequenze, indice.direzioni)]
+        punteggio_totale = 0
+        mancanti = []
+        with self.blocco:
+            voci = self.voci
+            for posizione, chiave in enumerate(chiavi):
+                punteggio = voci.get(chiave)
+                if punteggio is None:
+                    mancanti.append(posizione)
+                else:
+                    voci.move_to_end(chiave)
+                    punteggio_totale += punteggio
+            self.colpi += len(chiavi) - len(mancanti)
+            self.mancati += len(mancanti)
+        if not mancanti:
+            return punteggio_totale
+        calcolati = [regole.punteggio_linea(sequenze[posizione], 'x', indice.direzioni[posizione]) for posizione in mancanti]
+        with self.blocco:
+            for posizione, punteggio in zip(mancanti, calcolati):
+                voci[chiavi[posizione]] = punteggio
+            while len(voci) > self.limite:
+                voci.popitem(last=False)
+        return punteggio_totale + sum(calcolati)
+
+    def statistiche(self):
+        richieste = self.colpi + self.mancati
+        return {
+            'colpi': self.colpi,
+            'mancati': self.mancati,
+            'percentuale_colpi': self.colpi / richieste if richieste else 0,
+            'voci': len(self.voci),
+            'limite': self.limite,
+        }
+
+    def svuota(self):
+        with self.blocco:
+            self.voci.clear()
+            self.colpi = 0
+            self.mancati = 0
+
+
+#cache condivisa dei punteggi delle linee usata da calcolo_punteggio_board e Game.calcolo_punteggio
+CACHE_LINEE = CacheLinee()
+
+#valore degli stati impossibili nella programmazione dinamica dei limiti (vedi RegolePunteggio.passo_limite)
+NEG = float('-inf')
+
+#tabelle di traduzione delle linee nel testo dei limiti, per simbolo o codice numpy (vedi tabella_limiti)
+TABELLE_LIMITI = {}
+
+def tabella_limiti(codice):
+    """
+    restituisce la tabella di translate che riduce una linea al testo dei limiti del simbolo ('x' simbolo, '.' vuota, '|' altri simboli):
+    -per un simbolo delle liste è una CodiciSimbolo con i bonus, che distingue già le celle vuote da quelle degli altri simboli
+    -per un codice della board numpy è una tabella di 256 byte in cui 0 è la cella vuota
+    """
+    tabella = TABELLE_LIMITI.get(codice)
+    if tabella is None:
+        if isinstance(codice, str):
+            tabella = CodiciSimbolo(codice, True)
+        else:
+            tabella = bytes(ord('x') if i == codice else ord('.') if i == 0 else ord('|') for i in range(256))
+        tabella = TABELLE_LIMITI.setdefault(codice, tabella)
+    return tabella
+
+def chiave_mappa_punteggi(mappa_punteggi):
+    """
+    restituisce una forma immutabile della mappa dei punteggi, utilizzabile come parte di una chiave di cache
+    """
+    return tuple(sorted(mappa_punteggi.items()))
+
+
+class RegolePunteggio:
+    """
+    regole di punteggio delle sequenze, compilate per un board NxN in tabelle dense indicizzate per lunghezza:
+    -minima: lunghezza minima di una sequenza che vale punti (default 3)
+    -massima: le sequenze più lunghe valgono come quelle di lunghezza massima (default 5)
+    -pesi: moltiplicatori del punteggio per orizzontale, verticale, diagonale e antidiagonale (ordine di DIREZIONI, default 1)
+    -bonus_aperta e bonus_chiusa: punti aggiunti per ogni estremità di una sequenza valida che confina con una cella vuota,
+     oppure con il bordo o un altro simbolo (default 0)
+    -valori[d][l] è il punteggio di una sequenza lunga l nella direzione d, aperte[d][l] e chiuse[d][l] i bonus per estremità;
+     i cicli di punteggio leggono le tabelle invece di confrontare lunghezze e cercare nella mappa
+    -con i valori di default il punteggio coincide con punteggio_linea
+    """
+    def __init__(self, mappa_punteggi, dimensione, minima=3, massima=5, pesi=None, bonus_aperta=0, bonus_chiusa=0):
+        if minima < 1 or massima < minima:
+            raise ValueError("Regole di punteggio non valide: serve 1 <= minima <= massima")
+        pesi = tuple(pesi) if pesi is not None else (1, 1, 1, 1)
+        if len(pesi) != len(DIREZIONI):
+            raise ValueError("Regole di punteggio non valide: servono 4 pesi (orizzontale, verticale, diagonale, antidiagonale)")
+        self.mappa_punteggi = mappa_punteggi
+        self.dimensione = dimensione
+        self.minima = minima
+        self.massima = massima
+        self.pesi = pesi
+        self.bonus_aperta = bonus_aperta
+        self.bonus_chiusa = bonus_chiusa
+        self.bonus = bool(bonus_aperta or bonus_chiusa)
+        self.chiave = (chiave_mappa_punteggi(mappa_punteggi), minima, massima, pesi, bonus_aperta, bonus_chiusa)
+        lunghezze = range(max(dimensione, massima) + 1)
+        self.valori = [[peso * mappa_punteggi.get(min(l, massima), 0) if l >= minima else 0 for l in lunghezze] for peso in pesi]
+        self.aperte = [[peso * bonus_aperta if l >= minima else 0 for l in lunghezze] for peso in pesi]
+        self.chiuse = [[peso * bonus_chiusa if l >= minima else 0 for l in lunghezze] for peso in pesi]
+        #bonus massimo di un'estremità su una cella vuota, che a fine partita può essere rimasta vuota oppure occupata da un avversario
+        self.liberi = [[max(aperta, chiusa) for aperta, chiusa in zip(aperte, chiuse)] for aperte, chiuse in zip(self.aperte, self.chiuse)]
+        #limiti già calcolati dei tratti di linea, per (tratto, direzione), vedi limite_tratto
+        self.limiti_tratti = {}
+        #potenze delle matrici dei passi di limite_tratto, per (peso della direzione, carattere), vedi potenza_limite
+        self.potenze_limite = {}
+        self.blocco_potenze = threading.Lock()
+        self.simmetrie = [t for t in range(8) if self.conserva_pesi(t)]
+
+    def opzioni(self):
+        """
+        opzioni delle regole, nella forma accettata dal parametro 'regole' di Game
+        """
+        return {'minima': self.minima, 'massima': self.massima, 'pesi': list(self.pesi),
+                'bonus_aperta': self.bonus_aperta, 'bonus_chiusa': self.bonus_chiusa}
+
+    def conserva_pesi(self, t):
+        """
+        verifica se la simmetria t (vedi trasforma_cella) porta ogni direzione in una direzione con lo stesso peso:
+        solo queste simmetrie lasciano invariati i punteggi
+        """
+        r0, c0 = trasforma_cella(1, 1, 3, t)
+        for d, (dr, dc) in enumerate(DIREZIONI):
+            r, c = trasforma_cella(1 + dr, 1 + dc, 3, t)
+            vettore = (r - r0, c - c0)
+            immagine = next(k for k, (x, y) in enumerate(DIREZIONI) if vettore in ((x, y), (-x, -y)))
+            if self.pesi[immagine] != self.pesi[d]:
+                return False
+        return True
+
+    def estremi(self, direzione, lunghezza, aperti):
+        """
+        bonus di una sequenza lunga 'lunghezza' con 'aperti' estremità libere (0, 1 o 2)
+        """
+        return self.aperte[direzione][lunghezza] * aperti + self.chiuse[direzione][lunghezza] * (2 - aperti)
+
+    def punteggio_linea(self, linea, simbolo, direzione):
+        """
+        punteggio delle sequenze del simbolo in una linea nella direzione indicata
+        """
+        valori = self.valori[direzione]
+        punteggio = 0
+        if not self.bonus:
+            count = 0
+            for cella in linea:
+                if cella == simbolo:
+                    count += 1
+                elif count:
+                    punteggio += valori[count]
+                    count = 0
+            return punteggio + valori[count]
+        count = 0
+        aperta = False
+        for cella in linea:
+            if cella == simbolo:
+                count += 1
+                continue
+            if count:
+                punteggio += valori[count] + self.estremi(direzione, count, aperta + (cella == '.'))
+                count = 0
+            aperta = cella == '.'
+        if count:
+            punteggio += valori[count] + self.estremi(direzione, count, aperta)
+        return punteggio
+
+    def limite_linea(self, linea, simbolo, direzione, vuota='.'):
+        """
+        limite superiore del punteggio che il simbolo può avere nella linea in qualsiasi momento futuro della partita
+        -simbolo e vuota sono i valori delle celle nella linea: con le linee di codici della board numpy il codice del simbolo e 0
+        -la linea è tradotta in testo ('x' simbolo, '.' vuota, '|' altri simboli) e il limite è quello di limite_testo
+        """
+        return self.limite_testo(''.join('x' if cella == simbolo else '.' if cella == vuota else '|' for cella in linea), direzione)
+
+    def limite_testo(self, testo, direzione):
+        """
+        limite superiore del punteggio in una linea già tradotta in testo ('x' celle del simbolo, '.' vuote, '|' altri simboli):
+        -le celle degli altri simboli dividono la linea in tratti indipendenti, con estremità chiuse
+        -il limite è la somma dei limiti dei tratti (vedi limite_tratto), letti dalla cache se già calcolati
+        -vale anche per una parte della linea compresa tra due celle '|' (o i bordi), come in Game.aggiorna_limiti
+        """
+        limite = 0
+        for tratto in testo.split('|'):
+            if tratto:
+                valore = self.limiti_tratti.get((tratto, direzione))
+                if valore is None:
+                    if len(self.limiti_tratti) > 100000:
+                        self.limiti_tratti.clear()
+                    valore = self.limiti_tratti[(tratto, direzione)] = self.limite_tratto(tratto, direzione)
+                limite += valore
+        return limite
+
+    def passo_limite(self, direzione, stato, proprio):
+        """
+        un passo della programmazione dinamica di limite_tratto su una cella (proprio: cella del simbolo, altrimenti vuota):
+        -stato[0] è il miglior punteggio senza sequenza in corso all'inizio del tratto (estremità sinistra chiusa),
+         stato[1] lo stesso dopo una cella vuota lasciata libera (estremità sinistra su una cella vuota)
+        -stato[1 + k] e stato[1 + M + k] sono i migliori punteggi con una sequenza in corso lunga k (limitata a M = massima),
+         iniziata al bordo o dopo un altro simbolo oppure dopo una cella vuota
+        -il passo è lineare nell'algebra (max, +), quindi più celle uguali si possono applicare insieme (vedi potenza_limite)
+        """
+        M = self.massima
+        valori = self.valori[direzione]
+        chiuse = self.chiuse[direzione]
+        liberi = self.liberi[direzione]
+        nuovo = [NEG] * (2 + 2 * M)
+        for base in (1, 1 + M):
+            for k in range(1, M):
+                nuovo[base + k + 1] = stato[base + k]
+            if stato[base + M] > nuovo[base + M]:
+                nuovo[base + M] = stato[base + M]
+        nuovo[2] = max(nuovo[2], stato[0])
+        nuovo[2 + M] = max(nuovo[2 + M], stato[1])
+        if not proprio:
+            separato = max(stato[0], stato[1])
+            for k in range(1, M + 1):
+                separato = max(separato, stato[1 + k] + valori[k] + chiuse[k] + liberi[k],
+                               stato[1 + M + k] + valori[k] + liberi[k] + liberi[k])
+            nuovo[1] = separato
+        return nuovo
+
+    def chiusura_limite(self, direzione, stato):
+        """
+        miglior punteggio finale di uno stato di passo_limite alla fine del tratto, che chiude la sequenza in corso
+        """
+        M = self.massima
+        valori = self.valori[direzione]
+        chiuse = self.chiuse[direzione]
+        liberi = self.liberi[direzione]
+        migliore = max(stato[0], stato[1])
+        for k in range(1, M + 1):
+            migliore = max(migliore, stato[1 + k] + valori[k] + chiuse[k] + chiuse[k], stato[1 + M + k] + valori[k] + liberi[k] + chiuse[k])
+        return migliore
+
+    def potenza_limite(self, direzione, carattere, n):
+        """
+        restituisce (matrice, chiusura) di n passi su celle uguali ('x' o '.'):
+        -matrice è la potenza (max, +) del passo, come righe: la riga i è lo stato dopo n passi partendo dal solo stato i
+        -chiusura[i] è il punteggio finale della riga i (vedi chiusura_limite), per i blocchi alla fine del tratto
+        -le potenze sono calcolate una volta, alla prima richiesta, e conservate nelle regole; l'estensione è protetta da un lock
+        -le tabelle di una direzione dipendono solo dal suo peso, quindi le direzioni con lo stesso peso condividono le potenze
+        """
+        chiave = (self.pesi[direzione], carattere)
+        potenze = self.potenze_limite.get(chiave)
+        if potenze is None or n >= len(potenze):
+            with self.blocco_potenze:
+                potenze = self.potenze_limite.setdefault(chiave, [])
+                if not potenze:
+                    m = 2 + 2 * self.massima
+                    identita = [[0 if i == j else NEG for j in range(m)] for i in range(m)]
+                    potenze.append((identita, [self.chiusura_limite(direzione, riga) for riga in identita]))
+                while n >= len(potenze):
+                    matrice = [self.passo_limite(direzione, riga, carattere == 'x') for riga in potenze[-1][0]]
+                    potenze.append((matrice, [self.chiusura_limite(direzione, riga) for riga in matrice]))
+        return potenze[n]
+
+    def limite_tratto(self, tratto, direzione):
+        """
+        massimo punteggio ottenibile in un tratto ('x' celle del simbolo, '.' celle vuote) scegliendo quali celle vuote occupare:
+        -programmazione dinamica sulle celle (vedi passo_limite): lo stato è la lunghezza della sequenza in corso, limitata alla lunghezza massima,
+         e il tipo della sua estremità sinistra (chiusa o cella vuota)
+        -ogni blocco di celle uguali è applicato in una volta con la sua potenza (vedi potenza_limite):
+         il costo dipende dal numero di blocchi del tratto e non dalla sua lunghezza
+        -il primo blocco parte dallo stato iniziale, quindi è una riga della sua potenza, e l'ultimo usa la chiusura già calcolata
+        """
+        blocchi = []
+        inizio = 0
+        fine_tratto = len(tratto)
+        while inizio < fine_tratto:
+            carattere = tratto[inizio]
+            fine = tratto.find('.' if carattere == 'x' else 'x', inizio)
+            if fine < 0:
+                fine = fine_tratto
+            blocchi.append(self.potenza_limite(direzione, carattere, fine - inizio))
+            inizio = fine
+        matrice, chiusura = blocchi[0]
+        if len(blocchi) == 1:
+            return int(chiusura[0])
+        stato = matrice[0]
+        for matrice, _ in blocchi[1:-1]:
+            nuovo = [NEG] * len(stato)
+            for valore, riga in zip(stato, matrice):
+                if valore > NEG:
+                    nuovo = list(map(max, nuovo, [valore + x for x in riga]))
+            stato = nuovo
+        return int(max(map(operator.add, stato, blocchi[-1][1])))
+
+
+#regole compilate, per mappa dei punteggi, opzioni e dimensione, condivise da tutti i giochi, e lock che ne protegge la costruzione
+REGOLE_GIOCO = {}
+BLOCCO_REGOLE_GIOCO = threading.Lock()
+
+def regole_gioco(mappa_punteggi, dimensione, minima=3, massima=5, pesi=None, bonus_aperta=0, bonus_chiusa=0):
+    """
+    restituisce le RegolePunteggio per la mappa dei punteggi, la dimensione e le opzioni (vedi RegolePunteggio.opzioni),
+    compilandole alla prima richiesta
+    -i giochi con le stesse regole condividono tabelle e cache dei limiti dei tratti invece di ricostruirle a ogni partita
+    -come per indice_linee, la costruzione avviene sotto BLOCCO_REGOLE_GIOCO e le regole già compilate sono lette senza lock
+    """
+    pesi = tuple(pesi) if pesi is not None else (1, 1, 1, 1)
+    chiave = (chiave_mappa_punteggi(mappa_punteggi), dimensione, minima, massima, pesi, bonus_aperta, bonus_chiusa)
+    regole = REGOLE_GIOCO.get(chiave)
+    if regole is None:
+        with BLOCCO_REGOLE_GIOCO:
+            regole = REGOLE_GIOCO.get(chiave)
+            if regole is None:
+                regole = REGOLE_GIOCO[chiave] = RegolePunteggio(dict(mappa_punteggi), dimensione, minima, massima, pesi, bonus_aperta, bonus_chiusa)
+    return regole
+
+def regole_punteggio(regole, dimensione):
+    """
+    restituisce le regole compilate: le regole stesse se sono già RegolePunteggio,
+    altrimenti le regole di default per la mappa dei punteggi passata (vedi regole_gioco)
+    """
+    if isinstance(regole, RegolePunteggio):
+        return regole
+    return regole_gioco(regole, dimensione)
+
+def calcolo_punteggio_board(board, simbolo, dimensione, regole, motore='liste'):
+    """
+    calcola il punteggio per il simbolo data la situazione attuale del board di gioco
+    -scorre le linee del board
+    -calcola richiamndo la funzione per trovare i segmenti di simboli
+    -calcola il punteggio totale sommando i punteggi delle linee
+    -regole sono le RegolePunteggio del gioco, oppure una mappa dei punteggi con le regole di default
+    -i punteggi delle linee già viste sono letti da CACHE_LINEE
+    -con motore='bitboard' converte il board in bitboard e conta le sequenze con shift e popcount
+    """
+    regole = regole_punteggio(regole, dimensione)
+    if motore == 'bitboard':
+        return BitBoard.da_board(board, dimensione).punteggio(simbolo, regole)
+    if isinstance(board, BoardNumpy):
+        return board.punteggio(simbolo, regole)
+    return CACHE_LINEE.punteggio_celle([cella for riga in board for cella in riga], simbolo, regole, indice_linee(dimensione))
+
+
+class RigaNumpy:
+    """
+    vista su una riga di BoardNumpy che converte i codici interi nei simboli e viceversa,
+    così board[r][c] continua a funzionare come con la board a liste
+    """
+    def __init__(self, board, r):
+        self.board = board
+        self.r = r
+
+    def __getitem__(self, c):
+        return self.board.simboli[self.board.celle[self.r, c]]
+
+    def __setitem__(self, c, simbolo):
+        self.board.celle[self.r, c] = self.board.codici[simbolo]
+
+    def __iter__(self):
+        simboli = self.board.simboli
+        return iter([simboli[codice] for codice in self.board.celle[self.r].tolist()])
+
+    def __len__(self):
+        return self.board.dimensione
+
+
+class BoardNumpy:
+    """
+    board compatta memorizzata come matrice numpy di piccoli interi:
+    -il codice 0 è la cella vuota '.', i simboli dei giocatori hanno i codici 1, 2, ...
+    -righe, colonne, diagonali e antidiagonali sono estratte come viste della matrice senza copiarla
+    -il punteggio di un simbolo è calcolato su tutte le linee insieme con operazioni vettoriali
+    """
+    def __init__(self, dimensione, simboli):
+        self.dimensione = dimensione
+        self.simboli = ['.']
+        for simbolo in simboli:
+            if simbolo not in self.simboli:
+                self.simboli.append(simbolo)
+        self.codici = {simbolo: codice for codice, simbolo in enumerate(self.simboli)}
+        if not importa_numpy():
+            raise ImportError("La board numpy richiede il modulo numpy")
+        self.celle = np.zeros((dimensione, dimensione), dtype=np.int8)
+
+    def __getitem__(self, r):
+        return RigaNumpy(self, r)
+
+    def __iter__(self):
+        for r in range(self.dimensione):
+            yield list(self[r])
+
+    def __len__(self):
+        return self.dimensione
+
+    def get_linee(self, matrice=None):
+        """
+        restituisce righe, colonne, diagonali e antidiagonali della matrice (di default le celle) come viste numpy
+        -le diagonali sono estratte con np.diagonal, le antidiagonali con np.diagonal sulla matrice ribaltata
+        """
+        if matrice is None:
+            matrice = self.celle
+        N = self.dimensione
+        ribaltata = np.fliplr(matrice)
+        linee = list(matrice) + list(matrice.T)
+        linee += [np.diagonal(matrice, k) for k in range(-(N - 1), N)]
+        linee += [np.diagonal(ribaltata, k) for k in range(-(N - 1), N)]
+        return linee
+
+    def linee_indice(self, indice):
+        """
+        restituisce le linee della matrice delle celle come viste numpy, nell'ordine delle linee dell'IndiceLinee
+        (lo stesso di get_linee_board), così possono essere usate con gli identificativi di linea dell'indice
+        """
+        matrice = self.celle
+        ribaltata = np.fliplr(matrice)
+        m = self.dimensione - 1
+        linee = []
+        for (_, valore), direzione in zip(indice.chiavi, indice.direzioni):
+            if direzione == 0:
+                linee.append(matrice[valore])
+            elif direzione == 1:
+                linee.append(matrice[:, valore])
+            elif direzione == 2:
+                linee.append(np.diagonal(matrice, -valore))
+            else:
+                linee.append(np.diagonal(ribaltata, m - valore))
+        return linee
+
+    def punteggio(self, simbolo, regole):
+        """
+        calcola il punteggio del simbolo su tutte le linee in un solo passaggio vettoriale:
+        -concatena le linee della maschera del simbolo separandole con una cella vuota
+        -trova inizio e fine di ogni sequenza con np.diff e ne ricava le lunghezze e la direzione
+        -somma i punteggi leggendo la tabella delle regole indicizzata per direzione e lunghezza
+        -non supporta i bonus per le estremità delle sequenze
+        """
+        regole = regole_punteggio(regole, self.dimensione)
+        if regole.bonus:
+            raise ValueError("Il backend numpy non supporta i bonus per le estremità delle sequenze")
+        codice = self.codici.get(simbolo)
+        if codice is None or self.dimensione == 0:
+            return 0
+        maschera = self.celle == codice
+        separatore = np.zeros(1, dtype=bool)
+        parti = []
+        for linea in self.get_linee(maschera):
+            parti.append(linea)
+            parti.append(separatore)
+        sequenza = np.concatenate(parti).astype(np.int8)
+        bordi = np.diff(np.concatenate((separatore.astype(np.int8), sequenza)))
+        inizi = np.flatnonzero(bordi == 1)
+        fini = np.flatnonzero(bordi == -1)
+        N = self.dimensione
+        #inizio nella sequenza concatenata delle linee di ogni direzione: N righe e N colonne lunghe N, poi le diagonali
+        confini = np.array([0, N * (N + 1), 2 * N * (N + 1), 3 * N * (N + 1) + N - 1])
+        direzioni = np.searchsorted(confini, inizi, side='right') - 1
+        tabella = np.array(regole.valori, dtype=np.int64)
+        return int(tabella[direzioni, fini - inizi].sum())
+
+
+def conta_bit(x):
+    """
+    popcount: numero di bit a 1 dell'intero x
+    """
+    return bin(x).count('1')
+
+
+class BitBoard:
+    """
+    motore di punteggio a bitboard, pensato per board piccole e medie (fino a circa 16x16):
+    -per ogni simbolo un intero Python con un bit per cella, la cella (r, c) è il bit r * (N + 1) + c
+    -ogni riga ha una colonna di guardia sempre a 0, così gli shift non passano da una riga alla successiva
+    -le sequenze lunghe almeno 3, 4 e 5 in ogni direzione sono trovate con shift e AND e contate con popcount
+    """
+    def __init__(self, dimensione):
+        self.dimensione = dimensione
+        self.passo = dimensione + 1
+        #spostamento in bit per orizzontale, verticale, diagonale e antidiagonale
+        self.spostamenti = (1, self.passo, self.passo + 1, self.passo - 1)
+        self.bit = {}
+
+    @classmethod
+    def da_board(cls, board, dimensione):
+        """
+        costruisce la bitboard a partire da un board a liste (o da qualsiasi board indicizzabile con board[r][c])
+        """
+        bitboard = cls(dimensione)
+        for r in range(dimensione):
+            for c in range(dimensione):
+                if board[r][c] != '.':
+                    bitboard.imposta(r, c, board[r][c])
+        return bitboard
+
+    def cella(self, r, c):
+        """
+        restituisce la maschera con il solo bit della cella (r, c)
+        """
+        return 1 << (r * self.passo + c)
+
+    def imposta(self, r, c, simbolo):
+        self.bit[simbolo] = self.bit.get(simbolo, 0) | self.cella(r, c)
+
+    def rimuovi(self, r, c, simbolo):
+        self.bit[simbolo] = self.bit.get(simbolo, 0) & ~self.cella(r, c)
+
+    def punteggio_bit(self, bit, regole):
+        """
+        calcola il punteggio di un insieme di celle:
+        -inizi: celle della sequenza senza predecessore nella direzione
+        -finestra_k: celle da cui partono k celle consecutive occupate
+        -le sequenze lunghe almeno k sono popcount(inizi & finestra_k); ogni sequenza lunga l vale la somma
+         delle differenze valori[k] - valori[k - 1] per k fino a l, e oltre la lunghezza massima le differenze sono 0
+        -non supporta i bonus per le estremità delle sequenze
+        """
+        regole = regole_punteggio(regole, self.dimensione)
+        if regole.bonus:
+            raise ValueError("Il motore bitboard non supporta i bonus per le estremità delle sequenze")
+        punteggio = 0
+        massima = min(regole.massima, self.dimensione)
+        for d, spostamento in enumerate(self.spostamenti):
+            valori = regole.valori[d]
+            inizi = bit & ~(bit << spostamento)
+            finestra = bit
+            for k in range(1, massima + 1):
+                if k > 1:
+                    finestra &= bit >> (spostamento * (k - 1))
+                almeno = conta_bit(inizi & finestra)
+                if almeno == 0:
+                    break
+                punteggio += almeno * (valori[k] - valori[k - 1])
+        return punteggio
+
+    def punteggio(self, simbolo, regole):
+        return self.punteggio_bit(self.bit.get(simbolo, 0), regole)
+
+    def guadagno(self, i, j, simbolo, regole, punteggio_attuale=None):
+        """
+        variazione di punteggio del simbolo se venisse giocato nella cella vuota (i, j)
+        -punteggio_attuale può essere passato per non ricalcolarlo a ogni cella candidata
+        """
+        bit = self.bit.get(simbolo, 0)
+        if punteggio_attuale is None:
+            punteggio_attuale = self.punteggio_bit(bit, regole)
+        return self.punteggio_bit(bit | self.cella(i, j), regole) - punteggio_attuale
+
+
+class InsiemeCelle:
+    """
+    insieme di celle con inserimento, rimozione, appartenenza e scelta casuale in O(1):
+    -gli elementi sono tenuti in una lista, con un dizionario cella -> posizione nella lista
+    -la rimozione sposta l'ultimo elemento al posto di quello tolto
+    """
+    def __init__(self, celle=()):
+        self.elementi = []
+        self.posizioni = {}
+        for cella in celle:
+            self.aggiungi(cella)
+
+    def aggiungi(self, cella):
+        if cella not in self.posizioni:
+            self.posizioni[cella] = len(self.elementi)
+            self.elementi.append(cella)
+
+    def rimuovi(self, cella):
+        posizione = self.posizioni.pop(cella, None)
+        if posizione is None:
+            return
+        ultima = self.elementi.pop()
+        if posizione < len(self.elementi):
+            self.elementi[posizione] = ultima
+            self.posizioni[ultima] = posizione
+
+    def scegli(self):
+        """
+        restituisce una cella a caso usando il generatore random del modulo
+        """
+        return random.choice(self.elementi)
+
+    def __contains__(self, cella):
+        return cella in self.posizioni
+
+    def __len__(self):
+        return len(self.elementi)
+
+    def __iter__(self):
+        return iter(self.elementi)
+
+
+def get_linee_cella(dimensione, r, c):
+    """
+    restituisce le quattro linee che passano per la cella (r, c) come coppie (chiave, coordinate):
+        -la riga r e la colonna c
+        -la diagonale con r - c costante e l'antidiagonale con r + c costante
+    -la chiave identifica la linea in modo univoco ed è usata dalla cache dei punteggi incrementali
+    -le linee sono lette dall'indice della dimensione (vedi IndiceLinee)
+    """
+    indice = indice_linee(dimensione)
+    return [(indice.chiavi[linea], indice.coordinate[linea]) for linea in indice.linee_cella[r][c]]
+
+
+def trasforma_cella(r, c, dimensione, t):
+    """
+    applica alla cella (r, c) una delle 8 simmetrie del quadrato NxN:
+    0 identità, 1-3 rotazioni di 90, 180 e 270 gradi, 4 riflessione orizzontale, 5 verticale, 6 trasposta, 7 antitrasposta
+    """
+    m = dimensione - 1
+    if t == 0:
+        return r, c
+    if t == 1:
+        return c, m - r
+    if t == 2:
+        return m - r, m - c
+    if t == 3:
+        return m - c, r
+    if t == 4:
+        return r, m - c
+    if t == 5:
+        return m - r, c
+    if t == 6:
+        return c, r
+    return m - c, m - r
+
+#inversa di ogni simmetria: solo le rotazioni di 90 e 270 gradi sono l'una l'inversa dell'altra
+SIMMETRIA_INVERSA = [0, 3, 2, 1, 4, 5, 6, 7]
+
+MASCHERA_64 = (1 << 64) - 1
+
+def zobrist_cella(codice, cella):
+    """
+    valore Zobrist a 64 bit del giocatore con il codice indicato nella cella di indice piatto r * N + c:
+    -è calcolato con il mescolamento splitmix64 invece di essere letto da una tabella di numeri casuali, quindi non occupa
+     memoria anche su board grandi ed è lo stesso in tutti i processi, come serve al libro delle aperture generato in parallelo
+    """
+    x = ((codice << 32) | cella) * 0x9E3779B97F4A7C15 & MASCHERA_64
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9 & MASCHERA_64
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EB & MASCHERA_64
+    return x ^ (x >> 31)
+
+
+#direzioni delle linee: orizzontale, verticale, diagonale, antidiagonale
+DIREZIONI = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+def lunghezza_sequenza(board, dimensione, r, c, dr, dc, simbolo):
+    """
+    conta quante celle consecutive contengono il simbolo partendo da (r, c) esclusa e muovendosi nella direzione (dr, dc)
+    """
+    lunghezza = 0
+    r += dr
+    c += dc
+    while 0 <= r < dimensione and 0 <= c < dimensione and board[r][c] == simbolo:
+        lunghezza += 1
+        r += dr
+        c += dc
+    return lunghezza
+
+def estremo_aperto(board, dimensione, r, c):
+    """
+    1 se la cella (r, c) è dentro il board e vuota, altrimenti 0
+    """
+    return int(0 <= r < dimensione and 0 <= c < dimensione and board[r][c] == '.')
+
+def guadagno_mossa(board, dimensione, i, j, simbolo, regole):
+    """
+    calcola la variazione di punteggio del simbolo se venisse giocato nella cella vuota (i, j), senza copiare il board
+    -in ogni direzione la mossa unisce la sequenza che finisce prima della cella (lunghezza a) e quella che inizia dopo (lunghezza b)
+    -le altre sequenze non cambiano, quindi il guadagno è punteggio(a + b + 1) - punteggio(a) - punteggio(b), letti dalle tabelle delle regole
+    -con i bonus per le estremità la sequenza unita eredita l'estremità esterna di a e di b, mentre la cella (i, j) era un'estremità aperta
+    -il risultato coincide con la differenza tra due chiamate a calcolo_punteggio_board; con i bonus la mossa può togliere
+     punti agli avversari chiudendo le loro sequenze, variazione che qui non è contata
+    -regole sono le RegolePunteggio del gioco, oppure una mappa dei punteggi con le regole di default
+    """
+    regole = regole_punteggio(regole, dimensione)
+    guadagno = 0
+    for d, (dr, dc) in enumerate(DIREZIONI):
+        a = lunghezza_sequenza(board, dimensione, i, j, -dr, -dc, simbolo)
+        b = lunghezza_sequenza(board, dimensione, i, j, dr, dc, simbolo)
+        valori = regole.valori[d]
+        guadagno += valori[a + b + 1] - valori[a] - valori[b]
+        if regole.bonus:
+            prima = estremo_aperto(board, dimensione, i - (a + 1) * dr, j - (a + 1) * dc)
+            dopo = estremo_aperto(board, dimensione, i + (b + 1) * dr, j + (b + 1) * dc)
+            guadagno += regole.estremi(d, a + b + 1, prima + dopo)
+            guadagno -= regole.estremi(d, a, prima + 1) + regole.estremi(d, b, dopo + 1)
+    return guadagno
+
+def variazioni_mossa(board, dimensione, i, j, simbolo, regole):
+    """
+    variazioni di punteggio di tutti i simboli se il simbolo venisse giocato nella cella vuota (i, j), direzione per direzione:
+    -restituisce una lista di (simbolo, direzione, variazione); per il simbolo giocato sono i termini di guadagno_mossa
+    -con i bonus per le estremità ogni sequenza di un altro simbolo che confina con la cella perde un'estremità aperta
+     e ne guadagna una chiusa; le altre sequenze non cambiano
+    -il costo dipende solo dalle sequenze che toccano la cella, non dalla lunghezza delle linee
+    -annullare la mossa applica le stesse variazioni con il segno opposto, calcolate dopo aver svuotato la cella
+    """
+    regole = regole_punteggio(regole, dimensione)
+    variazioni = []
+    for d, (dr, dc) in enumerate(DIREZIONI):
+        a = lunghezza_sequenza(board, dimensione, i, j, -dr, -dc, simbolo)
+        b = lunghezza_sequenza(board, dimensione, i, j, dr, dc, simbolo)
+        valori = regole.valori[d]
+        variazione = valori[a + b + 1] - valori[a] - valori[b]
+        if regole.bonus:
+            prima = estremo_aperto(board, dimensione, i - (a + 1) * dr, j - (a + 1) * dc)
+            dopo = estremo_aperto(board, dimensione, i + (b + 1) * dr, j + (b + 1) * dc)
+            variazione += regole.estremi(d, a + b + 1, prima + dopo)
+            variazione -= regole.estremi(d, a, prima + 1) + regole.estremi(d, b, dopo + 1)
+            for verso, lunghezza in ((-1, a), (1, b)):
+                r, c = i + verso * dr, j + verso * dc
+                if lunghezza or not (0 <= r < dimensione and 0 <= c < dimensione) or board[r][c] == '.':
+                    continue
+                altro = board[r][c]
+                l = 1 + lunghezza_sequenza(board, dimensione, r, c, verso * dr, verso * dc, altro)
+                if regole.chiuse[d][l] != regole.aperte[d][l]:
+                    variazioni.append((altro, d, regole.chiuse[d][l] - regole.aperte[d][l]))
+        variazioni.append((simbolo, d, variazione))
+    return variazioni
+
+def gioca_su_board(board, dimensione, i, j, simbolo, regole, punteggi):
+    """
+    gioca il simbolo nella cella vuota (i, j) di un board a liste e aggiorna il dizionario dei punteggi di tutti i simboli:
+    -senza bonus per le estremità cambia solo il punteggio di chi muove, di guadagno_mossa
+    -con i bonus si applicano le variazioni di tutti i simboli (vedi variazioni_mossa)
+    """
+    regole = regole_punteggio(regole, dimensione)
+    if regole.bonus:
+        for altro, _, variazione in variazioni_mossa(board, dimensione, i, j, simbolo, regole):
+            punteggi[altro] += variazione
+    else:
+        punteggi[simbolo] += guadagno_mossa(board, dimensione, i, j, simbolo, regole)
+    board[i][j] = simbolo
+
+def matrici_guadagni(board, dimensione, simboli, regole):
+    """
+    calcola in un solo passaggio sul board il guadagno di ogni cella vuota per ognuno dei simboli (vedi guadagno_mossa):
+    -restituisce un dizionario simbolo -> matrice NxN dei guadagni, 0 nelle celle occupate;
+     le matrici sono array numpy se numpy è disponibile, altrimenti liste di liste
+    -le lunghezze a e b di guadagno_mossa sono le sequenze del simbolo che finiscono subito prima e iniziano subito dopo la cella,
+     calcolate per tutte le celle insieme con una scansione in avanti e una all'indietro di ogni direzione
+    -con i guadagni degli avversari si vede quanto vale bloccare una cella prima che la occupino loro
+    """
+    regole = regole_punteggio(regole, dimensione)
+    if importa_numpy():
+        return matrici_guadagni_numpy(board, dimensione, simboli, regole)
+    return matrici_guadagni_liste(board, dimensione, simboli, regole)
+
+#posizioni delle celle del board nelle matrici raddrizzate di sequenze_direzione, per (dimensione, dc)
+RADDRIZZAMENTI = {}
+
+def raddrizzamento(dimensione, dc):
+    """
+    per la direzione (1, dc) restituisce la larghezza della matrice raddrizzata (colonne delle linee) e, per ogni cella del board,
+    la posizione piatta nella matrice raddrizzata, che ha una riga di bordo sopra e una sotto il board
+    """
+    chiave = (dimensione, dc)
+    if chiave not in RADDRIZZAMENTI:
+        N = dimensione
+        righe = np.arange(N)[:, None]
+        colonne = np.arange(N)[None, :] - dc * righe + (N - 1 if dc == 1 else 0)
+        larghezza = N if dc == 0 else 2 * N - 1
+        RADDRIZZAMENTI[chiave] = (larghezza, ((righe + 1) * larghezza + colonne).ravel())
+    return RADDRIZZAMENTI[chiave]
+
+def sequenze_direzione(simbolo, vuote, dc):
+    """
+    per la direzione (1, dc) e ogni cella, calcola senza cicli sulle celle:
+    -a e b: lunghezze delle sequenze di 'simbolo' (matrice booleana) che finiscono subito prima e iniziano subito dopo la cella
+    -prima e dopo: 1 se la cella oltre la sequenza precedente (o successiva) è vuota
+    le linee della direzione sono raddrizzate in colonne, con celle di riempimento né simbolo né vuote, e lungo ogni colonna
+    la cella diversa dal simbolo più vicina si propaga con np.maximum.accumulate e np.minimum.accumulate
+    """
+    N = simbolo.shape[0]
+    larghezza, posizioni = raddrizzamento(N, dc)
+    uguali = np.zeros((N + 2) * larghezza, dtype=bool)
+    libere = np.zeros((N + 2) * larghezza, dtype=np.int64)
+    uguali[posizioni] = simbolo.ravel()
+    libere[posizioni] = vuote.ravel()
+    uguali = uguali.reshape(N + 2, larghezza)
+    righe = np.arange(N + 2)[:, None]
+    ultima = np.maximum.accumulate(np.where(uguali, 0, righe), axis=0)
+    prossima = np.minimum.accumulate(np.where(uguali, N + 1, righe)[::-1], axis=0)[::-1]
+    precedenti = posizioni - larghezza
+    successive = posizioni + larghezza
+    ultima = ultima.ravel()[precedenti]
+    prossima = prossima.ravel()[successive]
+    a = precedenti // larghezza - ultima
+    b = prossima - successive // larghezza
+    prima = libere[ultima * larghezza + precedenti % larghezza]
+    dopo = libere[prossima * larghezza + successive % larghezza]
+    return [x.reshape(N, N) for x in (a, prima, b, dopo)]
+
+def matrici_guadagni_numpy(board, dimensione, simboli, regole):
+    """
+    versione vettoriale di matrici_guadagni: le sequenze sono calcolate per tutte le celle insieme (vedi sequenze_direzione)
+    e i guadagni letti dalle tabelle delle regole con indici vettoriali
+    """
+    importa_numpy()
+    N = dimensione
+    if isinstance(board, BoardNumpy):
+        celle = board.celle
+        codici = [board.codici.get(simbolo, -1) for simbolo in simboli]
+        vuote = celle == 0
+    else:
+        celle = np.array([list(riga) for riga in board], dtype=object).reshape(N, N)
+        codici = simboli
+        vuote = celle == '.'
+    matrici = {}
+    for simbolo, codice in zip(simboli, codici):
+        uguali = celle == codice
+        guadagni = np.zeros((N, N), dtype=np.int64)
+        for d, (dr, dc) in enumerate(DIREZIONI):
+            #l'orizzontale è la verticale del board trasposto
+            if dr == 0:
+                a, prima, b, dopo = (x.T for x in sequenze_direzione(uguali.T, vuote.T, 0))
+            else:
+                a, prima, b, dopo = sequenze_direzione(uguali, vuote, dc)
+            valori = np.array(regole.valori[d])
+            guadagni += valori[a + b + 1] - valori[a] - valori[b]
+            if regole.bonus:
+                aperte = np.array(regole.aperte[d])
+                chiuse = np.array(regole.chiuse[d])
+                estremi = lambda l, k: aperte[l] * k + chiuse[l] * (2 - k)
+                guadagni += estremi(a + b + 1, prima + dopo) - estremi(a, prima + 1) - estremi(b, dopo + 1)
+        guadagni[~vuote] = 0
+        matrici[simbolo] = guadagni
+    return matrici
+
+def matrici_guadagni_liste(board, dimensione, simboli, regole):
+    """
+    versione senza numpy di matrici_guadagni: per ogni linea dell'indice una scansione in avanti registra la sequenza
+    che precede ogni cella e una all'indietro somma i guadagni
+    """
+    N = dimensione
+    celle = [cella for riga in board for cella in riga]
+    indice = indice_linee(N)
+    matrici = {}
+    for simbolo in simboli:
+        guadagni = [0] * (N * N)
+        for posizioni, d in zip(indice.offset, indice.direzioni):
+            valori = regole.valori[d]
+            precedenti = []
+            lunghezza = 0
+            aperta = 0
+            for p in posizioni:
+                precedenti.append((lunghezza, aperta))
+                if celle[p] == simbolo:
+                    lunghezza += 1
+                else:
+                    lunghezza = 0
+                    aperta = int(celle[p] == '.')
+            lunghezza = 0
+            aperta = 0
+            for k in range(len(posizioni) - 1, -1, -1):
+                p = posizioni[k]
+                cella = celle[p]
+                if cella == '.':
+                    a, prima = precedenti[k]
+                    guadagno = valori[a + lunghezza + 1] - valori[a] - valori[lunghezza]
+                    if regole.bonus:
+                        guadagno += regole.estremi(d, a + lunghezza + 1, prima + aperta)
+                        guadagno -= regole.estremi(d, a, prima + 1) + regole.estremi(d, lunghezza, aperta + 1)
+                    guadagni[p] += guadagno
+                if cella == simbolo:
+                    lunghezza += 1
+                else:
+                    lunghezza = 0
+                    aperta = int(cella == '.')
+        matrici[simbolo] = [guadagni[r * N:(r + 1) * N] for r in range(N)]
+    return matrici
+
+
+def fine_partita(game, root, vista, vincitore):
+    """
+    gestisce la fine della partita mostrando un messaggio di vittoria e una finestra
+    con opzioni per l'utente su come procedere (nuova partita, impostazioni, uscita)
+    -mostra il msg solo se non è già stato mostrato; se vincitore è None la partita è finita in pareggio
+    -se la partita non è già stata segnata come finita, mostra la finestra di fine partita
+    -crea l'istanza della finestra e settaggio impostazioni grafiche e bottoni
+    """
+    
+    if not game.messagebox_mostrato:
+        if vincitore is None:
+            messagebox.showinfo("Pareggio", "Nessun giocatore può più raggiungere il punteggio per vincere")
+        else:
+            messagebox.showinfo("Vittoria", f"Ha vinto {vincitore['nome']} con {vincitore['score']} punti!")
+        game.messagebox_mostrato = True
+
+    
+    if not game.partita_finita:
+        game.partita_finita = True
+        if game.registratore is not None:
+            game.registratore.chiudi_partita(game, vincitore)
+        finestra_fine = tk.Toplevel(root)
+        finestra_fine.title("Partita finita")  
+        finestra_fine.geometry("450x300") 
+        label1 = tk.Label(finestra_fine, text = "Vuoi fare un'altra partita?")
+        label1.pack()
+        
+        #bottoni con diverse opzioni
+        button = tk.Button(finestra_fine, text = "Si, con le stesse impostazioni",
+                    command = lambda:reset_partita(game, finestra_fine, vista))
+        
+        button_impostazioni = tk.Button(finestra_fine, text = "Si, con impostazioni diverse",
+                    command = lambda:restart_impostazioni(root, game)) 
+        
+        button_exit = tk.Button(finestra_fine, text = "No, esci",
+                    command = lambda:chiudi_finestra(root, game)) 
+        button.place(x = 50, y = 50)
+        button_impostazioni.place(x = 230, y = 48)
+        button_exit.place(x = 190, y = 100)
+        
+        
+
+def reset_partita(game, root, vista):
+    """    
+    reimposta lo stato del gioco per iniziare una nuova partita con le stesse impostazioni:
+    -azzera la griglia, i punteggi dei giocatori e il turno corrente
+    -aggiorna l'interfaccia grafica rimuovendo i simboli dalla griglia (bottoni o canvas)
+    -infine chiude la finestra di fine partita
+    """
+    
+    game.partita_finita = False
+    annulla_calcolo(game)
+    
+    game.reset()
+    
+    vista.pulisci()
+            
+    print("Nuova partita avviata con le stesse impostazioni!")
+    chiudi_finestra(root, game)
+    
+def restart_impostazioni(root, game):
+    """
+    rermina la partita attuale e avvia una nuova finestra per scegliere impostazioni diverse
+    """
+    game.partita_finita = False  
+    annulla_calcolo(game)
+    chiudi_finestra(root, game)
+    print("Nuova partita con impostazioni diverse")
+    run_gui()
+    
+    
+def chiudi_finestra(root, game):
+    """
+    chiude la finestra corrente e imposta lo stato del gioco come non finito
+    """
+    game.partita_finita = False
+    annulla_calcolo(game)
+    root.destroy()
+
+def annulla_calcolo(game):
+    """
+    annulla la mossa del computer eventualmente in calcolo in background: il risultato, quando arriva, viene ignorato
+    """
+    if game.calcolo_in_corso is not None:
+        game.calcolo_in_corso.annulla()
+        game.calcolo_in_corso = None
+
+
+class VistaBottoni:
+    """
+    griglia di gioco fatta da un tk.Button per cella, adatta a board piccoli
+    """
+    def __init__(self, root, dimensione, board, al_click):
+        self.bottoni = [[None for _ in range(dimensione)] for _ in range(dimensione)]
+        for i in range(dimensione):
+            for j in range(dimensione):
+                btn = tk.Button(root, text=board[i][j], width=4, height=2,
+                                font=("Helvetica", 14),
+                                bg="#ffffff", activebackground="#add8e6",  
+                                fg="#000000", activeforeground="#000000",
+                                command=lambda i=i, j=j: al_click(i, j))
+                btn.grid(row=i, column=j, padx=2, pady=2)
+                self.bottoni[i][j] = btn
+        #righe e colonne della griglia di root occupate, le etichette vanno sotto
+        self.righe = dimensione
+        self.colonne = dimensione
+
+    def aggiorna_cella(self, r, c, testo):
+        self.bottoni[r][c]['text'] = testo
+
+    def pulisci(self):
+        for riga in self.bottoni:
+            for bottone in riga:
+                bottone.config(text='')
+
+
+class VistaCanvas:
+    """
+    griglia di gioco disegnata su un unico tk.Canvas, per board grandi:
+    -all'avvio disegna solo le 2N + 2 linee della griglia, non un widget per cella
+    -ogni mossa ridisegna solo la cella cambiata (un oggetto testo per cella occupata)
+    -il clic è convertito in (r, c) dividendo le coordinate del canvas per il lato della cella
+    -barre di scorrimento per muoversi sul board, zoom con Ctrl + rotellina o con i tasti + e -
+    """
+    def __init__(self, root, dimensione, board, al_click, lato=28):
+        self.dimensione = dimensione
+        self.lato = lato
+        self.al_click = al_click
+        self.testi = {}
+        cornice = tk.Frame(root)
+        cornice.grid(row=0, column=0, sticky="nsew")
+        root.grid_rowconfigure(0, weight=1)
+        root.grid_columnconfigure(0, weight=1)
+        lato_visibile = min(dimensione * lato, 720)
+        self.canvas = tk.Canvas(cornice, width=lato_visibile, height=lato_visibile, bg="#ffffff", highlightthickness=0)
+        barra_x = tk.Scrollbar(cornice, orient="horizontal", command=self.canvas.xview)
+        barra_y = tk.Scrollbar(cornice, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(xscrollcommand=barra_x.set, yscrollcommand=barra_y.set)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        barra_y.grid(row=0, column=1, sticky="ns")
+        barra_x.grid(row=1, column=0, sticky="ew")
+        cornice.grid_rowconfigure(0, weight=1)
+        cornice.grid_columnconfigure(0, weight=1)
+
+        totale = dimensione * lato
+        for k in range(dimensione + 1):
+            self.canvas.create_line(0, k * lato, totale, k * lato, fill="#c0c0c0")
+            self.canvas.create_line(k * lato, 0, k * lato, totale, fill="#c0c0c0")
+        self.canvas.configure(scrollregion=(0, 0, totale, totale))
+        for r in range(dimensione):
+            for c in range(dimensione):
+                if board[r][c] != '.':
+                    self.aggiorna_cella(r, c, board[r][c])
+
+        self.canvas.bind("<Button-1>", self.click)
+        self.canvas.bind("<Control-MouseWheel>", lambda evento: self.zoom(1.25 if evento.delta > 0 else 0.8))
+        self.canvas.bind("<Control-Button-4>", lambda evento: self.zoom(1.25))
+        self.canvas.bind("<Control-Button-5>", lambda evento: self.zoom(0.8))
+        root.bind("<plus>", lambda evento: self.zoom(1.25))
+        root.bind("<minus>", lambda evento: self.zoom(0.8))
+        self.righe = 1
+        self.colonne = 1
+
+    def font(self):
+        return ("Helvetica", max(6, int(self.lato * 0.5)))
+
+    def click(self, evento):
+        c = int(self.canvas.canvasx(evento.x) // self.lato)
+        r = int(self.canvas.canvasy(evento.y) // self.lato)
+        if 0 <= r < self.dimensione and 0 <= c < self.dimensione:
+            self.al_click(r, c)
+
+    def aggiorna_cella(self, r, c, testo):
+        """
+        ridisegna solo la cella (r, c): crea, modifica o cancella il suo oggetto testo
+        """
+        oggetto = self.testi.get((r, c))
+        if testo in ('.', ''):
+            if oggetto is not None:
+                self.canvas.delete(oggetto)
+                del self.testi[(r, c)]
+        elif oggetto is None:
+            self.testi[(r, c)] = self.canvas.create_text((c + 0.5) * self.lato, (r + 0.5) * self.lato,
+                                                         text=testo, font=self.font())
+        else:
+            self.canvas.itemconfig(oggetto, text=testo)
+
+    def pulisci(self):
+        for oggetto in self.testi.values():
+            self.canvas.delete(oggetto)
+        self.testi = {}
+
+    def zoom(self, fattore):
+        """
+        ingrandisce o rimpicciolisce il board, scalando linee e simboli e aggiornando l'area di scorrimento
+        """
+        nuovo_lato = self.lato * fattore
+        if not 6 <= nuovo_lato <= 120:
+            return
+        self.lato = nuovo_lato
+        self.canvas.scale("all", 0, 0, fattore, fattore)
+        font = self.font()
+        for oggetto in self.testi.values():
+            self.canvas.itemconfig(oggetto, font=font)
+        totale = self.dimensione * self.lato
+        self.canvas.configure(scrollregion=(0, 0, totale, totale))
+
+
+class CalcoloMossa:
+    """
+    calcola la mossa del computer in un thread separato, così l'interfaccia grafica resta reattiva:
+    -il thread lavora su una copia della partita (vedi Game.copia): annullare il calcolo, annullare mosse o iniziare una nuova partita
+     non tocca mai lo stato letto dalla ricerca, anche se il thread annullato è ancora in esecuzione
+    -le ricerche del computer (game.ricerca e game.mcts) passano al calcolo per tutta la sua durata e tornano al gioco
+     solo quando il risultato è consegnato; un calcolo annullato se le tiene, e il gioco ne crea di nuove
+    -il risultato è consegnato su una coda e letto dal thread di Tk con risultato(), senza bloccare
+    -annulla() chiede alla ricerca di fermarsi e fa ignorare il risultato
+    -il tempo della ricerca di 'esperto' e 'mcts' è limitato a tempo_massimo_ms; scaduto() indica che il limite è superato
+    """
+    def __init__(self, game, giocatore, tempo_massimo_ms=TEMPO_MASSIMO_MOSSA_MS):
+        self.game = game
+        self.copia = game.copia()
+        self.copia.ricerca, self.copia.mcts = game.ricerca, game.mcts
+        game.ricerca = game.mcts = None
+        self.giocatore = come_giocatore(giocatore).copia()
+        self.giocatore.tempo_ms = min(self.giocatore.get('tempo_ms', 500), tempo_massimo_ms)
+        self.tempo_massimo = tempo_massimo_ms / 1000
+        self.coda = queue.Queue(maxsize=1)
+        self.annullato = threading.Event()
+        self.thread = threading.Thread(target=self.esegui, daemon=True)
+        self.inizio = None
+        self.durata = 0
+
+    def avvia(self):
+        self.inizio = time.perf_counter()
+        self.thread.start()
+
+    def esegui(self):
+        try:
+            risultato = mossa_computer(self.copia, self.giocatore, self.annullato)
+        except Exception as errore:
+            risultato = errore
+        self.durata = time.perf_counter() - self.inizio
+        if not self.annullato.is_set():
+            self.coda.put(risultato)
+
+    def risultato(self):
+        """
+        restituisce (True, mossa) se il calcolo è finito, altrimenti (False, None); rilancia l'eventuale errore della ricerca
+        -quando il calcolo è finito restituisce al gioco le ricerche, se nel frattempo non ne ha create altre
+        """
+        try:
+            risultato = self.coda.get_nowait()
+        except queue.Empty:
+            return False, None
+        if self.game.ricerca is None:
+            self.game.ricerca = self.copia.ricerca
+        if self.game.mcts is None:
+            self.game.mcts = self.copia.mcts
+        if isinstance(risultato, Exception):
+            raise risultato
+        return True, risultato
+
+    def scaduto(self):
+        return time.perf_counter() - self.inizio > self.tempo_massimo
+
+    def annulla(self):
+        self.annullato.set()
+
+
+
+
+class MisuraFase:
+    """
+    context manager che misura la durata di una fase del turno e la registra nella strumentazione
+    """
+    def __init__(self, strumentazione, fase):
+        self.strumentazione = strumentazione
+        self.fase = fase
+
+    def __enter__(self):
+        self.inizio = time.perf_counter()
+        return self
+
+    def __exit__(self, *errore):
+        self.strumentazione.registra_tempo(self.fase, time.perf_counter() - self.inizio)
+        return False
+
+
+class Strumentazione:
+    """
+    strumentazione facoltativa del ciclo di gioco:
+    -per ogni turno registra il tempo delle fasi 'validazione', 'punteggio', 'decisione' (mossa del computer) e 'interfaccia'
+    -conta le linee scansionate per i punteggi (tutte per un ricalcolo completo, le quattro della cella per un aggiornamento
+     incrementale) e le celle candidate valutate dal computer
+    -con profilo=True esegue anche cProfile per tutta la partita e, se è indicato 'percorso', a fine partita ne salva le statistiche pstats
+    -quando è disattivata (game.strumentazione = None) il gioco fa solo un controllo su None
+    """
+    def __init__(self, profilo=False, percorso=None):
+        self.percorso = percorso
+        self.turni = []
+        self.turno = None
+        self.tempi = {}
+        self.contatori = {}
+        self.profiler = cProfile.Profile() if profilo else None
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def inizia_turno(self, nome):
+        """
+        apre il record di un nuovo turno del giocatore 'nome'
+        """
+        self.turno = {'giocatore': nome, 'tempi': {}, 'contatori': {}}
+        self.turni.append(self.turno)
+
+    def misura(self, fase):
+        return MisuraFase(self, fase)
+
+    def registra_tempo(self, fase, durata):
+        self.tempi[fase] = self.tempi.get(fase, 0) + durata
+        if self.turno is not None:
+            self.turno['tempi'][fase] = self.turno['tempi'].get(fase, 0) + durata
+
+    def conta(self, contatore, quantita=1):
+        self.contatori[contatore] = self.contatori.get(contatore, 0) + quantita
+        if self.turno is not None:
+            self.turno['contatori'][contatore] = self.turno['contatori'].get(contatore, 0) + quantita
+
+    def riepilogo(self):
+        """
+        restituisce tempo totale, medio e massimo per fase e i contatori totali della partita
+        """
+        fasi = {}
+        for fase, totale in self.tempi.items():
+            durate = [turno['tempi'][fase] for turno in self.turni if fase in turno['tempi']]
+            fasi[fase] = {
+                'totale': totale,
+                'media': totale / len(durate) if durate else 0,
+                'massimo': max(durate, default=0),
+            }
+        return {'turni': len(self.turni), 'fasi': fasi, 'contatori': dict(self.contatori)}
+
+    def termina(self):
+        """
+        chiude la strumentazione a fine partita:
+        -stampa il riepilogo delle fasi e dei contatori
+        -con cProfile attivo stampa le funzioni più costose e, se indicato, salva le statistiche pstats in 'percorso'
+        """
+        if self.profiler is not None:
+            self.profiler.disable()
+        riepilogo = self.riepilogo()
+        print(f"Strumentazione: {riepilogo['turni']} turni")
+        for fase, tempi in riepilogo['fasi'].items():
+            print(f"  {fase}: totale {tempi['totale'] * 1000:.1f} ms, media {tempi['media'] * 1000:.2f} ms, "
+                  f"massimo {tempi['massimo'] * 1000:.2f} ms")
+        for contatore, valore in riepilogo['contatori'].items():
+            print(f"  {contatore}: {valore}")
+        if self.profiler is not None:
+            statistiche = pstats.Stats(self.profiler)
+            if self.percorso:
+                statistiche.dump_stats(self.percorso)
+                print(f"Profilo cProfile salvato in {self.percorso}")
+            statistiche.sort_stats('cumulative').print_stats(15)
+        return riepilogo
+
+
+def misura(strumentazione, fase):
+    """
+    restituisce il context manager che misura la fase, oppure uno vuoto se la strumentazione è disattivata
+    """
+    if strumentazione is None:
+        return NESSUNA_MISURA
+    return strumentazione.misura(fase)
+
+NESSUNA_MISURA = nullcontext()
+
+
+class Giocatore:
+    """
+    giocatore della partita, con attributi fissi in __slots__ invece di un dizionario per giocatore (meno memoria, copia e pickle rapidi):
+    -nome, simbolo, score, tipo ('umano' o 'computer') e difficolta per i computer
+    -codice: intero piccolo del simbolo, lo stesso usato dalla board numpy (1, 2, ...), assegnato da Game
+    -impostazioni facoltative della difficoltà ('tempo_ms', 'processi', 'profondita', ...), None se non indicate
+    -il simbolo è internato, così le celle del board a liste sono lo stesso oggetto stringa: i confronti restano ==,
+     ma si risolvono già al controllo di identità con cui inizia il confronto tra stringhe
+    -si usa anche come dizionario (giocatore['score'], get, in, dict(giocatore)): le chiavi sono gli attributi non None
+    """
+    __slots__ = ('nome', 'simbolo', 'score', 'tipo', 'difficolta', 'codice', 'tempo_ms', 'tempo_massimo_ms', 'profondita',
+                 'larghezza', 'processi', 'esplorazione', 'rollout', 'profondita_rollout')
+
+    def __init__(self, nome, simbolo, score=0, tipo='umano', difficolta=None, codice=0, **impostazioni):
+        self.nome = nome
+        self.simbolo = sys.intern(simbolo)
+        self.score = score
+        self.tipo = tipo
+        self.difficolta = difficolta
+        self.codice = codice
+        for chiave in Giocatore.__slots__[6:]:
+            setattr(self, chiave, impostazioni.pop(chiave, None))
+        if impostazioni:
+            raise ValueError(f"Impostazioni del giocatore sconosciute: {', '.join(impostazioni)}")
+
+    @classmethod
+    def da_dizionario(cls, dati):
+        """
+        adattatore per i giocatori descritti come dizionari (interfacce, configurazioni, registri delle partite)
+        """
+        return cls(**dati)
+
+    def copia(self):
+        return Giocatore(**self.come_dizionario())
+
+    def come_dizionario(self):
+        return {chiave: getattr(self, chiave) for chiave in self.keys()}
+
+    def keys(self):
+        return [chiave for chiave in Giocatore.__slots__ if getattr(self, chiave) is not None]
+
+    def __getitem__(self, chiave):
+        valore = getattr(self, chiave, None) if chiave in Giocatore.__slots__ else None
+        if valore is None:
+            raise KeyError(chiave)
+        return valore
+
+    def __setitem__(self, chiave, valore):
+        if chiave not in Giocatore.__slots__:
+            raise KeyError(chiave)
+        setattr(self, chiave, sys.intern(valore) if chiave == 'simbolo' else valore)
+
+    def __contains__(self, chiave):
+        return chiave in Giocatore.__slots__ and getattr(self, chiave) is not None
+
+    def get(self, chiave, predefinito=None):
+        valore = getattr(self, chiave, None) if chiave in Giocatore.__slots__ else None
+        return predefinito if valore is None else valore
+
+    def __repr__(self):
+        return f"Giocatore({self.come_dizionario()!r})"
+
+
+def come_giocatore(giocatore):
+    """
+    restituisce il giocatore come Giocatore, convertendo i dizionari con l'adattatore
+    """
+    return giocatore if isinstance(giocatore, Giocatore) else Giocatore.da_dizionario(giocatore)
+
+   
+class Game:
+    """
+    stato di una partita; gli attributi sono fissati in __slots__, quindi ogni stato usato dalle interfacce
+    (partita_finita, messagebox_mostrato, calcolo_in_corso, ...) è inizializzato qui invece di essere aggiunto in seguito
+    """
+    __slots__ = ('dimensione', 'backend', 'giocatori', 'indice', 'board', 'motore', 'bitboard', 'mappa_punteggi', 'regole',
+                 'win_threshold', 'turno', 'incrementale', 'storico', 'mosse_annullate',
+                 'raggio_frontiera', 'strumentazione', 'registratore', 'id_partita', 'libro', 'ricerca', 'mcts', 'calcolo_in_corso',
+                 'partita_finita', 'messagebox_mostrato', 'punteggi_linee', 'punteggi_simboli', 'calcola_limiti',
+                 'limiti_linee', 'limiti', 'limiti_da_aggiornare', 'limiti_incerti', 'celle', 'celle_libere', 'vicini', 'frontiera', 'discordanze', 'hash_simmetrie')
+
+    def __init__(self, dimensione, giocatori, mappa_punteggi=DEFAULT_MAP_PUNTEGGIO, win_threshold=50, incrementale=True, backend='liste', motore='liste', raggio_frontiera=2, strumentazione=None, registratore=None, libro=None, regole=None, limiti=True):
+        """
+        inizializza la classe gioco-game con:
+          - dimensione: lato della matrice NxN
+          - giocatori: lista di Giocatore, oppure di dizionari { 'nome', 'simbolo', 'score', 'tipo' } (per i computer anche 'difficolta')
+            convertiti in Giocatore; a ogni giocatore è assegnato il codice del suo simbolo
+          - score_map: mappa dei punteggi per lunghezze di sequenze
+          - regole: opzioni facoltative di RegolePunteggio (minima, massima, pesi, bonus_aperta, bonus_chiusa),
+            compilate insieme alla mappa dei punteggi in self.regole, condivise dai giochi con le stesse regole (vedi regole_gioco);
+            i bonus non sono supportati da numpy e bitboard
+          - turno: turno di gioco
+          - board di gioco
+          - win_threshold: punteggio per vincere la partita
+          - incrementale: se True aggiorna_punteggio legge i totali tenuti aggiornati da mossa e annulla_mossa,
+            altrimenti ricalcola tutto il board; i totali sono sempre aggiornati, quindi l'opzione si può cambiare a partita in corso
+          - storico: elenco delle mosse giocate (r, c, turno), usato per annullare le mosse
+          - mosse_annullate: pila delle mosse annullate (r, c, turno) che ripeti_mossa può rigiocare, svuotata da una nuova mossa
+          - backend: 'liste' (lista di liste di simboli) oppure 'numpy' (matrice compatta di codici interi, richiede numpy)
+          - motore: 'liste' oppure 'bitboard', che tiene aggiornata una bitboard per simbolo e la usa per punteggi e mosse del computer
+          - raggio_frontiera: distanza massima da una cella occupata delle celle libere considerate dal computer
+          - celle_libere e frontiera: indici delle celle libere e delle celle libere vicine a quelle occupate,
+            aggiornati da mossa e annulla_mossa senza riscandire il board
+          - strumentazione: oggetto Strumentazione facoltativo che conta linee scansionate e celle valutate
+          - registratore: oggetto RegistratorePartite facoltativo a cui mossa e annulla_mossa notificano le mosse
+          - libro: oggetto LibroAperture facoltativo consultato dal computer prima di cercare la mossa
+          - indice: IndiceLinee della dimensione, condiviso con gli altri giochi; celle: copia piatta del board (cella r * N + c)
+            su cui punteggi e limiti leggono le linee attraverso gli offset dell'indice; con il backend numpy è una vista
+            piatta della matrice dei codici (vedi codici_celle)
+          - limiti: se True tiene in self.limiti, per ogni simbolo, un limite superiore del punteggio ancora raggiungibile
+            (vedi RegolePunteggio.limite_linea); check_pareggio lo usa per chiudere subito le partite che nessuno può più vincere.
+            mossa e annulla_mossa segnano soltanto le linee della cella in limiti_da_aggiornare, ricalcolate da aggiorna_limiti
+            solo quando check_pareggio non può decidere senza (vedi check_pareggio)
+          - discordanze: per ognuna delle 8 simmetrie del board, quante celle hanno un contenuto diverso dalla cella trasformata;
+            la simmetria vale finché il contatore è 0 (vedi simmetrie e rappresentanti)
+          - hash_simmetrie: per ognuna delle 8 simmetrie, hash Zobrist del board trasformato (vedi zobrist_cella),
+            aggiornati da mossa e annulla_mossa; hash_simmetrie[0] è l'hash del board attuale
+        """ 
+        if backend == 'numpy' and not importa_numpy():
+            print("Il modulo numpy non è disponibile.")
+            print("Verrà usata la board a liste")
+            backend = 'liste'
+        self.dimensione = dimensione
+        self.backend = backend
+        self.giocatori = [come_giocatore(giocatore) for giocatore in giocatori]
+        for codice, giocatore in enumerate(self.giocatori, 1):
+            giocatore.codice = codice
+        self.indice = indice_linee(dimensione)
+        self.board = self.nuova_board()
+        self.motore = motore
+        self.bitboard = BitBoard(dimensione) if motore == 'bitboard' else None
+        self.mappa_punteggi = mappa_punteggi
+        self.regole = regole_gioco(mappa_punteggi, dimensione, **(regole or {}))
+        if self.regole.bonus and (backend == 'numpy' or motore == 'bitboard'):
+            raise ValueError("I bonus per le estremità delle sequenze richiedono il backend e il motore 'liste'")
+        self.win_threshold = win_threshold
+        self.turno = 0
+        self.incrementale = incrementale
+        self.storico = []
+        self.mosse_annullate = []
+        self.raggio_frontiera = raggio_frontiera
+        self.strumentazione = strumentazione
+        self.registratore = registratore
+        #identificativo della partita nei record del registratore, nuovo a ogni reset
+        self.id_partita = uuid.uuid4().hex
+        self.libro = libro
+        self.inizializza_indici()
+        #ricerca alpha-beta del computer 'esperto', creata alla prima mossa e riusata tra i turni
+        self.ricerca = None
+        #ricerca Monte Carlo del computer 'mcts', il cui albero è riusato tra i turni
+        self.mcts = None
+        #mossa del computer in calcolo in background nell'interfaccia grafica (CalcoloMossa)
+        self.calcolo_in_corso = None
+        self.partita_finita = False
+        #finestra di fine partita già mostrata nell'interfaccia grafica
+        self.messagebox_mostrato = False
+        #cache incrementale: per ogni simbolo, punteggio di ogni linea e totale, aggiornati a ogni mossa (vedi applica_variazioni)
+        self.punteggi_linee = {}
+        self.punteggi_simboli = {}
+        for giocatore in self.giocatori:
+            self.punteggi_linee[giocatore.simbolo] = {}
+            self.punteggi_simboli[giocatore.simbolo] = 0
+        self.calcola_limiti = limiti
+        self.inizializza_limiti()
+                
+    def reset(self):
+        """
+        riporta il gioco allo stato iniziale mantenendo le stesse impostazioni:
+        -svuota la griglia, lo storico delle mosse e la cache dei punteggi
+        -azzera i punteggi dei giocatori e il turno corrente
+        -la partita torna in corso, con un nuovo id_partita; se c'è un registratore, la partita precedente ancora aperta è registrata come interrotta
+        """
+        if self.registratore is not None:
+            self.registratore.abbandona_partita(self)
+        self.id_partita = uuid.uuid4().hex
+        self.board = self.nuova_board()
+        if self.bitboard is not None:
+            self.bitboard = BitBoard(self.dimensione)
+        for giocatore in self.giocatori:
+            giocatore.score = 0
+        self.turno = 0
+        self.partita_finita = False
+        self.messagebox_mostrato = False
+        self.storico = []
+        self.mosse_annullate = []
+        self.inizializza_indici()
+        for simbolo in self.punteggi_linee:
+            self.punteggi_linee[simbolo] = {}
+            self.punteggi_simboli[simbolo] = 0
+        self.inizializza_limiti()
+
+    def copia(self, backend=None):
+        """
+        restituisce una copia indipendente della partita nella posizione attuale, ad esempio per calcolare una mossa in background:
+        -board, celle, punteggi, limiti, indici delle celle, simmetrie, storico e giocatori sono copiati
+        -regole, indice delle linee, libro e strumentazione sono condivisi; la copia non ha registratore né ricerche del computer
+        -backend permette di copiare il board in un altro backend, ad esempio 'liste' per le ricerche del computer
+        """
+        copia = Game.__new__(Game)
+        for nome in Game.__slots__:
+            setattr(copia, nome, getattr(self, nome))
+        N = self.dimensione
+        copia.backend = backend or self.backend
+        copia.giocatori = [giocatore.copia() for giocatore in self.giocatori]
+        if copia.backend == 'numpy':
+            copia.board = BoardNumpy(N, [giocatore.simbolo for giocatore in self.giocatori])
+            for r, c, _ in self.storico:
+                copia.board[r][c] = self.board[r][c]
+        else:
+            copia.board = [list(riga) for riga in self.board]
+        if self.bitboard is not None:
+            copia.bitboard = BitBoard(N)
+            copia.bitboard.bit = dict(self.bitboard.bit)
+        copia.storico = list(self.storico)
+        copia.mosse_annullate = list(self.mosse_annullate)
+        copia.registratore = None
+        copia.ricerca = None
+        copia.mcts = None
+        copia.calcolo_in_corso = None
+        copia.punteggi_linee = {simbolo: dict(punteggi) for simbolo, punteggi in self.punteggi_linee.items()}
+        copia.punteggi_simboli = dict(self.punteggi_simboli)
+        copia.limiti_linee = {simbolo: list(limiti) for simbolo, limiti in self.limiti_linee.items()}
+        copia.limiti = dict(self.limiti)
+        copia.limiti_da_aggiornare = set(self.limiti_da_aggiornare)
+        copia.limiti_incerti = dict(self.limiti_incerti)
+        copia.celle = copia.board.celle.ravel() if copia.backend == 'numpy' else [cella for riga in copia.board for cella in riga]
+        copia.celle_libere = InsiemeCelle(self.celle_libere)
+        copia.vicini = [list(riga) for riga in self.vicini]
+        copia.frontiera = set(self.frontiera)
+        copia.discordanze = list(self.discordanze)
+        copia.hash_simmetrie = list(self.hash_simmetrie)
+        return copia
+
+    def __getstate__(self):
+        """
+        stato della partita per pickle (salvataggi, partite passate ai processi):
+        -indice delle linee e regole compilate, con le loro cache, non sono inclusi: delle regole restano solo le opzioni,
+         e __setstate__ riprende quelli condivisi da indice_linee e regole_gioco
+        -celle, che con il backend numpy è una vista del board, è ricostruita dal board
+        -come nelle copie, le ricerche del computer e il calcolo in corso non sono inclusi
+        """
+        stato = {nome: getattr(self, nome) for nome in Game.__slots__ if nome not in ('indice', 'celle', 'ricerca', 'mcts', 'calcolo_in_corso')}
+        stato['regole'] = self.regole.opzioni()
+        return stato
+
+    def __setstate__(self, stato):
+        for nome, valore in stato.items():
+            setattr(self, nome, valore)
+        self.indice = indice_linee(self.dimensione)
+        self.regole = regole_gioco(self.mappa_punteggi, self.dimensione, **stato['regole'])
+        self.celle = self.board.celle.ravel() if self.backend == 'numpy' else [cella for riga in self.board for cella in riga]
+        self.ricerca = None
+        self.mcts = None
+        self.calcolo_in_corso = None
+
+    def inizializza_limiti(self):
+        """
+        calcola per ogni simbolo il limite superiore di ogni linea e il loro totale, scorrendo tutte le linee del board;
+        le linee vuote della stessa lunghezza sono calcolate una volta sola grazie alla cache delle regole
+        """
+        self.limiti_linee = {}
+        self.limiti = {}
+        self.limiti_da_aggiornare = set()
+        self.limiti_incerti = {}
+        if not self.calcola_limiti:
+            return
+        limiti = {simbolo: [] for simbolo in self.punteggi_linee}
+        for estrai, direzione in zip(self.indice.estrattori, self.indice.direzioni):
+            for simbolo, testo in self.testi_limiti(estrai(self.celle)).items():
+                limiti[simbolo].append(self.regole.limite_testo(testo, direzione))
+        for simbolo, limiti_simbolo in limiti.items():
+            self.limiti_linee[simbolo] = limiti_simbolo
+            self.limiti[simbolo] = sum(limiti_simbolo)
+            self.limiti_incerti[simbolo] = 0
+
+    def testi_limiti(self, celle):
+        """
+        restituisce per ogni simbolo la linea 'celle' tradotta nel testo dei limiti ('x' simbolo, '.' vuota, '|' altri simboli),
+        vedi RegolePunteggio.limite_testo:
+        -con le liste la linea è unita una volta sola e tradotta per ogni simbolo con str.translate (vedi tabella_limiti);
+         con simboli di più caratteri è tradotta cella per cella
+        -con il backend numpy i codici delle celle sono tradotti come byte
+        """
+        codici, vuota = self.codici_celle()
+        if vuota == 0:
+            testo = bytes(celle)
+            return {simbolo: testo.translate(tabella_limiti(codici[simbolo])).decode('ascii') for simbolo in self.punteggi_linee}
+        testo = ''.join(celle)
+        if len(testo) == len(celle):
+            return {simbolo: testo.translate(tabella_limiti(simbolo)) for simbolo in self.punteggi_linee}
+        return {simbolo: ''.join('x' if cella == simbolo else '.' if cella == '.' else '|' for cella in celle)
+                for simbolo in self.punteggi_linee}
+
+    def segna_limiti_cella(self, r, c):
+        """
+        segna da ricalcolare le quattro linee che passano per la cella (r, c), appena cambiata:
+        -per ogni simbolo limiti_incerti somma i limiti, ormai non più validi, delle linee segnate;
+         self.limiti meno limiti_incerti è la somma delle linee ancora esatte, quindi un limite inferiore del limite vero
+        -costa poche somme per mossa: il ricalcolo vero e proprio è in aggiorna_limiti
+        """
+        for linea in self.indice.linee_cella[r][c]:
+            if linea not in self.limiti_da_aggiornare:
+                self.limiti_da_aggiornare.add(linea)
+                for simbolo, limiti in self.limiti_linee.items():
+                    self.limiti_incerti[simbolo] += limiti[linea]
+
+    def aggiorna_limiti(self):
+        """
+        ricalcola i limiti delle linee segnate da segna_limiti_cella, per tutti i simboli:
+        -ogni linea è tradotta nel testo dei limiti e divisa in tratti dalle celle degli altri simboli (vedi RegolePunteggio.limite_testo);
+         i tratti che le mosse non hanno toccato sono letti dalla cache delle regole, quindi la programmazione dinamica
+         riparte solo per i tratti cambiati
+        """
+        indice = self.indice
+        for linea in self.limiti_da_aggiornare:
+            direzione = indice.direzioni[linea]
+            for simbolo, testo in self.testi_limiti(indice.estrattori[linea](self.celle)).items():
+                limiti = self.limiti_linee[simbolo]
+                nuovo = self.regole.limite_testo(testo, direzione)
+                self.limiti[simbolo] += nuovo - limiti[linea]
+                limiti[linea] = nuovo
+        self.limiti_da_aggiornare.clear()
+        for simbolo in self.limiti_incerti:
+            self.limiti_incerti[simbolo] = 0
+
+    def codici_celle(self):
+        """
+        restituisce (valore di ogni simbolo, valore della cella vuota) nella copia piatta self.celle:
+        i simboli stessi e '.' con le liste, i codici interi della matrice (e 0) con il backend numpy
+        """
+        if isinstance(self.board, BoardNumpy):
+            return self.board.codici, 0
+        return {simbolo: simbolo for simbolo in self.punteggi_linee}, '.'
+
+    def check_pareggio(self):
+        """
+        verifica se la partita è finita senza vincitore:
+        -con i limiti attivi, nessun giocatore può più raggiungere win_threshold, anche prima che il tabellone sia pieno
+        -finché per un simbolo la somma delle linee ancora esatte (self.limiti meno limiti_incerti) raggiunge win_threshold
+         la partita non è finita e le linee segnate non vengono ricalcolate; altrimenti aggiorna_limiti le ricalcola prima di decidere
+        -altrimenti, il tabellone è pieno
+        """
+        if self.calcola_limiti:
+            if any(self.limiti[simbolo] - self.limiti_incerti[simbolo] >= self.win_threshold for simbolo in self.limiti):
+                return False
+            self.aggiorna_limiti()
+            return all(limite < self.win_threshold for limite in self.limiti.values())
+        return len(self.celle_libere) == 0
+
+    def cella_utile(self, r, c):
+        """
+        verifica se una sequenza che vale punti può ancora passare per la cella (r, c), per almeno un simbolo:
+        in almeno una direzione con peso non nullo le celle libere o del simbolo attorno alla cella devono essere almeno 'minima'
+        """
+        N = self.dimensione
+        minima = self.regole.minima
+        for simbolo in self.punteggi_linee:
+            for direzione, (dr, dc) in enumerate(DIREZIONI):
+                if self.regole.pesi[direzione] == 0:
+                    continue
+                lunghezza = 1
+                for verso in (1, -1):
+                    i, j = r + verso * dr, c + verso * dc
+                    while lunghezza < minima and 0 <= i < N and 0 <= j < N and self.board[i][j] in (simbolo, '.'):
+                        lunghezza += 1
+                        i += verso * dr
+                        j += verso * dc
+                if lunghezza >= minima:
+                    return True
+        return False
+
+    def celle_utili(self, celle, scadenza=None):
+        """
+        toglie dalle celle quelle in cui nessun simbolo può più fare punti: occuparle non dà punti e non blocca nessuno
+        -con i bonus per le estremità anche queste celle possono cambiare i punteggi, quindi sono tenute tutte
+        -se nessuna cella è utile restituisce tutte le celle
+        -scadenza facoltativa (istante di time.perf_counter): se passa durante il filtro solleva TempoScaduto,
+         così le ricerche del computer rispettano il tempo anche con frontiere molto grandi
+        """
+        if self.regole.bonus:
+            return list(celle)
+        utili = []
+        for indice, cella in enumerate(celle):
+            if scadenza is not None and indice % 256 == 0 and time.perf_counter() > scadenza:
+                raise TempoScaduto()
+            if self.cella_utile(cella[0], cella[1]):
+                utili.append(cella)
+        return utili or list(celle)
+
+    def inizializza_indici(self):
+        """
+        costruisce gli indici delle celle per un board vuoto:
+        -celle_libere contiene tutte le celle
+        -vicini conta, per ogni cella, le celle occupate a distanza al massimo raggio_frontiera
+        -frontiera contiene le celle libere con almeno una cella occupata vicina, all'inizio nessuna
+        -il board vuoto ha tutte le 8 simmetrie, quindi le discordanze sono tutte 0, come gli hash delle simmetrie
+        -la copia piatta del board è vuota; con il backend numpy è la vista piatta della matrice delle celle,
+         che si aggiorna insieme al board senza scritture in più
+        """
+        N = self.dimensione
+        self.celle = self.board.celle.ravel() if isinstance(self.board, BoardNumpy) else ['.'] * (N * N)
+        self.celle_libere = InsiemeCelle((r, c) for r in range(N) for c in range(N))
+        self.vicini = [[0 for _ in range(N)] for _ in range(N)]
+        self.frontiera = set()
+        self.discordanze = [0] * 8
+        self.hash_simmetrie = [0] * 8
+
+    def aggiorna_hash(self, r, c, codice):
+        """
+        aggiunge o toglie (lo XOR è la propria inversa) il giocatore con il codice indicato nella cella (r, c)
+        dagli hash di tutte le simmetrie: per la simmetria t conta la cella trasformata
+        """
+        N = self.dimensione
+        hash_simmetrie = self.hash_simmetrie
+        for t in range(8):
+            i, j = trasforma_cella(r, c, N, t)
+            hash_simmetrie[t] ^= zobrist_cella(codice, i * N + j)
+
+    def imposta_cella(self, r, c, simbolo):
+        """
+        scrive il simbolo nella cella (r, c) aggiornando le discordanze delle simmetrie:
+        per la simmetria t cambiano solo i confronti della cella con la sua immagine e con la cella che ha per immagine (r, c)
+        """
+        N = self.dimensione
+        board = self.board
+        coppie = []
+        for t in range(1, 8):
+            celle = {(r, c), trasforma_cella(r, c, N, SIMMETRIA_INVERSA[t])}
+            coppie.append((t, [(cella, trasforma_cella(cella[0], cella[1], N, t)) for cella in celle]))
+        for t, confronti in coppie:
+            self.discordanze[t] -= sum(board[a][b] != board[x][y] for (a, b), (x, y) in confronti)
+        self.scrivi_cella(r, c, simbolo)
+        for t, confronti in coppie:
+            self.discordanze[t] += sum(board[a][b] != board[x][y] for (a, b), (x, y) in confronti)
+
+    def scrivi_cella(self, r, c, simbolo):
+        """
+        scrive il simbolo nel board e nella copia piatta; con il backend numpy la copia piatta è una vista del board
+        """
+        self.board[r][c] = simbolo
+        if self.backend != 'numpy':
+            self.celle[r * self.dimensione + c] = simbolo
+
+    def simmetrie(self):
+        """
+        restituisce le simmetrie (vedi trasforma_cella) che lasciano invariato il board attuale, sempre compresa l'identità 0
+        -sono escluse le simmetrie che scambiano direzioni con pesi diversi nelle regole di punteggio
+        """
+        return [t for t in self.regole.simmetrie if self.discordanze[t] == 0]
+
+    def rappresentanti(self, celle):
+        """
+        filtra le celle tenendo un solo rappresentante per classe di celle equivalenti per le simmetrie del board:
+        -il rappresentante è la cella minima per riga e colonna tra le sue immagini
+        -le celle equivalenti hanno lo stesso guadagno per ogni giocatore, quindi basta valutare i rappresentanti;
+         la prima cella migliore in ordine di riga e colonna è sempre un rappresentante
+        -l'ordine delle celle è mantenuto; senza simmetrie oltre l'identità le celle sono restituite tutte
+        """
+        simmetrie = self.simmetrie()
+        if len(simmetrie) == 1:
+            return list(celle)
+        N = self.dimensione
+        return [cella for cella in celle
+                if all(trasforma_cella(cella[0], cella[1], N, t) >= cella for t in simmetrie)]
+
+    def occupa_cella(self, r, c):
+        """
+        aggiorna gli indici dopo che la cella (r, c) è stata occupata, guardando solo le celle entro raggio_frontiera
+        """
+        self.celle_libere.rimuovi((r, c))
+        self.frontiera.discard((r, c))
+        k = self.raggio_frontiera
+        for i in range(max(0, r - k), min(self.dimensione, r + k + 1)):
+            riga = self.vicini[i]
+            for j in range(max(0, c - k), min(self.dimensione, c + k + 1)):
+                riga[j] += 1
+                if riga[j] == 1 and (i, j) in self.celle_libere:
+                    self.frontiera.add((i, j))
+
+    def libera_cella(self, r, c):
+        """
+        aggiorna gli indici dopo che la cella (r, c) è stata svuotata, operazione inversa di occupa_cella
+        """
+        self.celle_libere.aggiungi((r, c))
+        k = self.raggio_frontiera
+        for i in range(max(0, r - k), min(self.dimensione, r + k + 1)):
+            riga = self.vicini[i]
+            for j in range(max(0, c - k), min(self.dimensione, c + k + 1)):
+                riga[j] -= 1
+                if riga[j] == 0:
+                    self.frontiera.discard((i, j))
+        if self.vicini[r][c] > 0:
+            self.frontiera.add((r, c))
+
+    def celle_candidate(self):
+        """
+        celle libere da valutare per la mossa del computer, in ordine di riga e colonna:
+        la frontiera se non è vuota, altrimenti (ad esempio con il board vuoto) tutte le celle libere
+        """
+        if self.frontiera:
+            return sorted(self.frontiera)
+        return sorted(self.celle_libere)
+
+    def guadagni(self, simboli=None):
+        """
+        matrici NxN del guadagno di ogni cella vuota per i simboli indicati (default tutti i giocatori), vedi matrici_guadagni
+        """
+        if simboli is None:
+            simboli = [giocatore.simbolo for giocatore in self.giocatori]
+        return matrici_guadagni(self.board, self.dimensione, simboli, self.regole)
+
+    def nuova_board(self):
+        """
+        crea una board vuota per il backend scelto
+        """
+        if self.backend == 'numpy':
+            return BoardNumpy(self.dimensione, [giocatore.simbolo for giocatore in self.giocatori])
+        return [['.' for _ in range(self.dimensione)] for _ in range(self.dimensione)]
+        
+    def stampa_board(self):
+        """
+        stampa il tabellone in maniera formattata
+        -scorre il board stampa gli elementi della riga separati da uno spazio " " 
+        """
+        print("\nTabellone:")
+        for riga in self.board:
+            print(" ".join(riga))
+        print()
+        
+    
+    def mossa_valida(self, r, c):
+        """
+        verifica se la mossa (r, c) è valida
+        -controlla se r e c sono dentro i limiti del board 
+        -se r e c sono validi e la casella è vuota ritorna True 
+        """
+        r_valida = 0 <= r < self.dimensione
+        c_valida = 0 <= c < self.dimensione
+        casella_vuota = self.board[r][c] == '.'
+        if r_valida and c_valida and casella_vuota:
+            return True
+        else:
+            return False
+    
+    def giocatore_corrente(self):
+        """
+        restituisce il giocatore a cui tocca
+        """
+        return self.giocatori[self.turno]
+    
+       
+    def mossa(self, r, c):
+        """
+        effettua la mossa per il giocatore corrente assegnando il simbolo nella posizione della griglia
+        -insieme ad annulla_mossa permette di esplorare le posizioni sul board del gioco senza copiarlo
+        -una nuova mossa rende impossibile ripetere le mosse annullate in precedenza
+        """
+        giocatore = self.giocatore_corrente()
+        self.applica_variazioni(r, c, giocatore.simbolo, 1)
+        self.imposta_cella(r, c, giocatore.simbolo)
+        self.aggiorna_hash(r, c, giocatore.codice)
+        self.storico.append((r, c, self.turno))
+        if self.mosse_annullate:
+            self.mosse_annullate.clear()
+        self.occupa_cella(r, c)
+        if self.registratore is not None:
+            self.registratore.registra_mossa(self, r, c)
+        if self.bitboard is not None:
+            self.bitboard.imposta(r, c, giocatore.simbolo)
+        if self.calcola_limiti:
+            self.segna_limiti_cella(r, c)
+
+    def annulla_mossa(self):
+        """
+        annulla l'ultima mossa giocata:
+        -svuota la cella e restituisce il turno al giocatore che l'aveva giocata
+        -i punteggi tornano quelli di prima della mossa togliendo le stesse variazioni applicate da mossa
+        -la mossa viene aggiunta a mosse_annullate e può essere rigiocata con ripeti_mossa
+        -restituisce la mossa annullata (r, c), oppure None se non ci sono mosse
+        """
+        if not self.storico:
+            return None
+        r, c, turno = self.storico.pop()
+        simbolo = self.board[r][c]
+        self.imposta_cella(r, c, '.')
+        self.applica_variazioni(r, c, simbolo, -1)
+        self.aggiorna_hash(r, c, self.giocatori[turno].codice)
+        self.turno = turno
+        self.mosse_annullate.append((r, c, turno))
+        self.libera_cella(r, c)
+        if self.registratore is not None:
+            self.registratore.annulla_mossa(self)
+        if self.bitboard is not None:
+            self.bitboard.rimuovi(r, c, simbolo)
+        if self.calcola_limiti:
+            self.segna_limiti_cella(r, c)
+        return (r, c)
+
+    def ripeti_mossa(self):
+        """
+        rigioca l'ultima mossa annullata e passa il turno al giocatore successivo, come dopo mossa e prossimo_turno
+        -restituisce la mossa ripetuta (r, c), oppure None se non ci sono mosse annullate
+        """
+        if not self.mosse_annullate:
+            return None
+        r, c, turno = self.mosse_annullate.pop()
+        annullate = self.mosse_annullate
+        self.mosse_annullate = []
+        self.turno = turno
+        self.mossa(r, c)
+        self.mosse_annullate = annullate
+        self.prossimo_turno()
+        return (r, c)
+
+    def annulla_turno(self):
+        """
+        comando annulla di CLI e GUI: annulla le mosse fino a tornare al turno di un giocatore umano (almeno una mossa)
+        -restituisce le celle liberate
+        """
+        celle = []
+        while self.storico:
+            celle.append(self.annulla_mossa())
+            if self.giocatore_corrente().tipo == 'umano':
+                break
+        return celle
+
+    def ripeti_turno(self):
+        """
+        comando ripeti di CLI e GUI: ripete le mosse annullate fino al prossimo turno di un giocatore umano
+        -restituisce le celle rioccupate
+        """
+        celle = []
+        while self.mosse_annullate:
+            celle.append(self.ripeti_mossa())
+            if self.giocatore_corrente().tipo == 'umano':
+                break
+        return celle
+
+    def applica_variazioni(self, r, c, simbolo, segno):
+        """
+        aggiorna la cache dei punteggi per il simbolo giocato (segno 1) o tolto (segno -1) nella cella (r, c), che deve essere vuota:
+        -le variazioni di variazioni_mossa riguardano solo riga, colonna, diagonale e antidiagonale della cella,
+         quindi si aggiornano solo quelle quattro linee e i totali dei simboli interessati
+        -con i bonus per le estremità cambiano anche i punteggi degli altri simboli le cui sequenze confinano con la cella
+        -non serve salvare i punteggi precedenti: annullare una mossa ricalcola le stesse variazioni sul board senza la mossa
+        -la strumentazione conta le quattro linee toccate tra le linee scansionate
+        """
+        linee = self.indice.linee_cella[r][c]
+        chiavi = self.indice.chiavi
+        if self.strumentazione is not None:
+            self.strumentazione.conta('linee_scansionate', len(linee))
+        for altro, direzione, variazione in variazioni_mossa(self.board, self.dimensione, r, c, simbolo, self.regole):
+            if variazione:
+                variazione *= segno
+                punteggi = self.punteggi_linee[altro]
+                chiave = chiavi[linee[direzione]]
+                punteggi[chiave] = punteggi.get(chiave, 0) + variazione
+                self.punteggi_simboli[altro] += variazione
+
+    def piazza(self, r, c, simbolo):
+        """
+        mossa minima (make) usata dalle ricerche del computer per esplorare le posizioni sul board del gioco senza copiarlo:
+        -scrive il simbolo nella cella vuota (r, c) e aggiorna i punteggi di tutti i simboli (vedi applica_variazioni)
+        -non cambia turno, storico, celle libere, frontiera, simmetrie, limiti, bitboard e registratore, aggiornati solo da mossa;
+         tra piazza e il togli corrispondente questi indici descrivono ancora la posizione di partenza
+        """
+        self.applica_variazioni(r, c, simbolo, 1)
+        self.scrivi_cella(r, c, simbolo)
+
+    def togli(self, r, c):
+        """
+        operazione inversa di piazza (unmake): svuota la cella (r, c) e toglie le variazioni dei punteggi
+        """
+        simbolo = self.board[r][c]
+        self.scrivi_cella(r, c, '.')
+        self.applica_variazioni(r, c, simbolo, -1)
+
+    def prossimo_turno(self):
+        """
+        passa il turno al giocatore successivo -- % per far si che quando si arrivi a turno == giocatori il resto dia 0 e si rinizi dal turno del primo giocatore
+        """
+        self.turno = (self.turno + 1) % len(self.giocatori)
+        
+        
+    def get_tutte_linee(self):
+        """
+        restituisce tutte le linee (righe, colonne, diagonali e antidiagonali) del board, nell'ordine di get_linee_board
+        -le linee sono lette dalla copia piatta del board con gli estrattori dell'indice delle linee
+        -con il backend numpy sono viste della matrice dei codici, senza copie (vedi BoardNumpy.linee_indice)
+        """
+        if isinstance(self.board, BoardNumpy):
+            return self.board.linee_indice(self.indice)
+        celle = self.celle
+        return [list(estrai(celle)) for estrai in self.indice.estrattori]
+    
+    
+    def calcolo_punteggio(self, simbolo):
+        """
+        calcola il punteggio per il simbolo dato esaminando tutte le linee del board
+        -si scorrono tutte le linee del board
+        -si calcolano i segmenti di simboli 
+        -si sommano i punteggi totali sulla base dei segmenti di simboli 
+        -i punteggi delle linee già viste sono letti da CACHE_LINEE
+        -con il backend numpy il calcolo è vettoriale su tutte le linee insieme
+        -con il motore bitboard le sequenze sono contate con shift e popcount
+        """
+        if self.strumentazione is not None:
+            self.strumentazione.conta('linee_scansionate', 6 * self.dimensione - 2)
+        if self.bitboard is not None:
+            return self.bitboard.punteggio(simbolo, self.regole)
+        if isinstance(self.board, BoardNumpy):
+            return self.board.punteggio(simbolo, self.regole)
+        return CACHE_LINEE.punteggio_celle(self.celle, simbolo, self.regole, self.indice)
+    
+
+    def aggiorna_punteggio(self):
+        """
+        aggiorna punteggio di ogni giocatore
+        -in modalità incrementale legge i totali già aggiornati da mossa e annulla_mossa, altrimenti ricalcola tutto il board
+        """
+        for giocatore in self.giocatori:
+            if self.incrementale:
+                giocatore.score = self.punteggi_simboli.get(giocatore.simbolo, 0)
+            else:
+                giocatore.score = self.calcolo_punteggio(giocatore.simbolo)
+    
+    
+    def check_vincitore(self):
+        """
+        verifica se un giocatore ha raggiungo il punteggio necessario per vincere
+        """
+        for giocatore in self.giocatori:
+            if giocatore.score >= self.win_threshold:
+                return giocatore
+            
+        return None
+    
+
+def mossa_computer(game, giocatore, annulla=None):
+    """
+    funzioni per il funzionamento del computer nel gioco:
+        -se non ci sono celle libere, la funzione restituisce none
+        -annulla è un threading.Event facoltativo: quando viene impostato la ricerca si interrompe e restituisce none
+        -per le difficoltà diverse da facile, se il gioco ha un libro delle aperture e la posizione è nel libro, gioca la mossa del libro
+        -difficoltà facile, il computer sceglie mossa in modo casuale tra le celle libere del gioco
+        -difficoltà difficile simula:
+            -per ciascuna cella della frontiera (le celle libere vicine a quelle occupate, tutte le celle libere se il board è vuoto), calcola con guadagno_mossa il guadagno della mossa ipotetica
+             guardando solo le sequenze nelle quattro direzioni che passano per la cella
+            -se il board è simmetrico valuta solo una cella per classe di celle equivalenti (vedi Game.rappresentanti)
+            -con il motore bitboard il guadagno è calcolato sulla bitboard del gioco
+            -con almeno SOGLIA_MATRICE_GUADAGNI celle candidate e numpy disponibile, i guadagni di tutte le celle sono calcolati
+             in un solo passaggio (vedi matrici_guadagni); la mossa scelta è la stessa, la prima migliore nell'ordine delle candidate
+            -sceglie la mossa che massimizza il guadagno
+            -se non trova alcuna mossa con guadagno positivo sceglie mossa casuale
+        -difficoltà esperto, ricerca alpha-beta a profondità crescente entro il tempo 'tempo_ms' del giocatore (vedi RicercaAlphaBeta)
+        -difficoltà mcts, ricerca Monte Carlo ad albero entro il tempo 'tempo_ms' del giocatore (vedi RicercaMCTS)
+    """
+    if len(game.celle_libere) == 0:
+        return None
+
+    difficolta = giocatore.get('difficolta', 'facile')
+
+    if difficolta == 'facile':
+        return game.celle_libere.scegli()
+
+    if game.libro is not None:
+        mossa = game.libro.cerca(game)
+        if mossa is not None:
+            return mossa
+
+    if difficolta == 'esperto':
+        if game.ricerca is None:
+            game.ricerca = RicercaAlphaBeta(game)
+        mossa = game.ricerca.cerca(game, giocatore, annulla)
+        if game.strumentazione is not None:
+            game.strumentazione.conta('nodi_ricerca', game.ricerca.nodi)
+        return mossa
+
+    elif difficolta == 'mcts':
+        if game.mcts is None:
+            game.mcts = RicercaMCTS()
+        mossa = game.mcts.cerca(game, giocatore, annulla)
+        if game.strumentazione is not None:
+            game.strumentazione.conta('simulazioni_mcts', game.mcts.simulazioni)
+        return mossa
+
+    elif difficolta == 'difficile':
+        miglior_mossa = None
+        miglior_guadagno = -1000
+        simbolo = giocatore['simbolo']
+
+        celle_candidate = game.rappresentanti(game.celle_candidate())
+        if game.strumentazione is not None:
+            game.strumentazione.conta('celle_valutate', len(celle_candidate))
+
+        #con molte celle candidate i guadagni sono calcolati tutti insieme con numpy, altrimenti cella per cella
+        matrice = None
+        if len(celle_candidate) >= SOGLIA_MATRICE_GUADAGNI and importa_numpy():
+            matrice = game.guadagni([simbolo])[simbolo].tolist()
+        elif game.bitboard is not None:
+            punteggio_attuale = game.bitboard.punteggio(simbolo, game.regole)
+
+        for mossa in celle_candidate:
+            if annulla is not None and annulla.is_set():
+                return None
+            i = mossa[0]
+            j = mossa[1]
+
+            if matrice is not None:
+                guadagno = matrice[i][j]
+            elif game.bitboard is not None:
+                guadagno = game.bitboard.guadagno(i, j, simbolo, game.regole, punteggio_attuale)
+            else:
+                guadagno = guadagno_mossa(game.board, game.dimensione, i, j, simbolo, game.regole)
+
+            if guadagno > miglior_guadagno:
+                miglior_guadagno = guadagno
+                miglior_mossa = (i, j)
+
+        if miglior_mossa is not None:
+            return miglior_mossa
+        else:
+            return game.celle_libere.scegli()
+
+    else:
+        return game.celle_libere.scegli()
+
+
+class TempoScaduto(Exception):
+    """
+    sollevata dentro la ricerca alpha-beta quando il tempo a disposizione per la mossa è finito
+    """
+
+
+class TabellaTrasposizioni:
+    """
+    tabella delle trasposizioni di dimensione limitata:
+    -associa all'hash Zobrist di una posizione la voce (profondita, valore, tipo, mossa)
+    -quando supera il limite elimina le voci usate meno di recente
+    """
+    def __init__(self, limite=200000):
+        self.limite = limite
+        self.voci = OrderedDict()
+
+    def leggi(self, chiave):
+        voce = self.voci.get(chiave)
+        if voce is not None:
+            self.voci.move_to_end(chiave)
+        return voce
+
+    def scrivi(self, chiave, voce):
+        self.voci[chiave] = voce
+        self.voci.move_to_end(chiave)
+        while len(self.voci) > self.limite:
+            self.voci.popitem(last=False)
+
+
+class RicercaAlphaBeta:
+    """
+    ricerca alpha-beta a profondità limitata per il computer 'esperto':
+    -con più di due giocatori usa la ricerca paranoica: il giocatore alla radice massimizza, tutti gli avversari minimizzano
+    -la valutazione è il punteggio del giocatore alla radice meno il miglior punteggio avversario
+    -approfondimento iterativo: completa la profondità 1, 2, ... finché non scade il tempo e restituisce la mossa dell'ultima profondità completata
+    -le mosse sono ordinate con il guadagno a un passo (guadagno_mossa) del giocatore di turno e dei suoi avversari,
+     e ad ogni nodo si esplorano solo le 'larghezza' mosse migliori tra la frontiera del gioco e le celle vicine alle mosse della ricerca
+    -le posizioni già valutate sono memorizzate in una tabella delle trasposizioni con hash Zobrist (vedi zobrist_cella)
+    -le celle in cui nessuno può più fare punti sono escluse dalle candidate (vedi Game.celle_utili)
+    -alla radice, se il board è simmetrico, si esplora una sola mossa per classe di mosse equivalenti
+    -le mosse della ricerca sono giocate e annullate sul gioco stesso con Game.piazza e Game.togli, che tengono aggiornati
+     i punteggi di tutti i simboli; con il backend numpy la ricerca usa una copia a liste del gioco
+    -le impostazioni si leggono dal giocatore: 'tempo_ms' (default 500), 'profondita' (default 6), 'larghezza' (default 10)
+    """
+    VITTORIA = 10 ** 9
+    ESATTO, INFERIORE, SUPERIORE = 0, 1, 2
+
+    def __init__(self, game, limite_tabella=200000, seme=0):
+        generatore = random.Random(seme)
+        self.dimensione = game.dimensione
+        self.tabella = TabellaTrasposizioni(limite_tabella)
+        self.zobrist_turno = [generatore.getrandbits(64) for _ in game.giocatori]
+        self.zobrist_radice = [generatore.getrandbits(64) for _ in game.giocatori]
+
+    def cerca(self, game, giocatore, annulla=None):
+        """
+        restituisce la mossa (r, c) scelta per il giocatore di turno entro il tempo a disposizione
+        -il tempo comprende la preparazione e l'ordinamento delle mosse alla radice: se finisce prima della profondità 1
+         si gioca la prima candidata
+        -l'hash della radice e i punteggi sono quelli tenuti aggiornati dal gioco (Game.hash_simmetrie e punteggi_simboli),
+         quindi la preparazione non scandisce il board
+        -se l'evento annulla viene impostato la ricerca si ferma e restituisce None
+        """
+        self.scadenza = time.perf_counter() + giocatore.get('tempo_ms', 500) / 1000
+        self.annulla = annulla
+        self.game = game if game.backend == 'liste' else game.copia('liste')
+        self.giocatori = game.giocatori
+        self.simboli = [g.simbolo for g in game.giocatori]
+        self.regole = game.regole
+        self.win_threshold = game.win_threshold
+        self.radice = game.turno
+        self.punteggi = self.game.punteggi_simboli
+        self.hash = self.game.hash_simmetrie[0] ^ self.zobrist_radice[self.radice]
+        self.raggio = game.raggio_frontiera
+        self.rappresentanti = game.rappresentanti
+        self.percorso = []
+        self.larghezza = giocatore.get('larghezza', 10)
+        self.nodi = 0
+
+        candidate = game.celle_candidate()
+        if not candidate:
+            return None
+        try:
+            self.base = set(game.celle_utili(candidate, self.scadenza))
+            candidate = self.rappresentanti(self.candidate())
+            mosse = self.ordina_mosse(candidate, self.radice)
+        except TempoScaduto:
+            if annulla is not None and annulla.is_set():
+                return None
+            return candidate[0]
+        miglior_mossa = mosse[0]
+        for profondita in range(1, giocatore.get('profondita', 6) + 1):
+            try:
+                _, mossa = self.alphabeta(profondita, self.radice, -self.VITTORIA * 2, self.VITTORIA * 2, 0)
+            except TempoScaduto:
+                if annulla is not None and annulla.is_set():
+                    return None
+                break
+            if mossa is not None:
+                miglior_mossa = mossa
+        return miglior_mossa
+
+    def candidate(self):
+        """
+        celle libere candidate nel nodo corrente: le candidate del gioco alla radice
+        più le celle entro il raggio della frontiera dalle mosse giocate lungo il percorso della ricerca
+        """
+        N = self.dimensione
+        k = self.raggio
+        celle = set(self.base)
+        for r, c in self.percorso:
+            for i in range(max(0, r - k), min(N, r + k + 1)):
+                for j in range(max(0, c - k), min(N, c + k + 1)):
+                    celle.add((i, j))
+        board = self.game.board
+        return sorted(cella for cella in celle if board[cella[0]][cella[1]] == '.')
+
+    def ordina_mosse(self, mosse, turno):
+        """
+        ordina le mosse per guadagno a un passo del giocatore di turno e, a parità, per il guadagno che toglierebbero al miglior avversario
+        -solleva TempoScaduto se il tempo finisce durante l'ordinamento, che su board grandi valuta molte celle
+        """
+        simbolo = self.simboli[turno]
+        board = self.game.board
+        chiavi = {}
+        for i, j in mosse:
+            if time.perf_counter() > self.scadenza:
+                raise TempoScaduto()
+            proprio = guadagno_mossa(board, self.dimensione, i, j, simbolo, self.regole)
+            avversario = max([guadagno_mossa(board, self.dimensione, i, j, altro, self.regole)
+                              for altro in self.simboli if altro != simbolo] or [0])
+            chiavi[(i, j)] = (proprio, avversario)
+        return sorted(mosse, key=lambda mossa: chiavi[mossa], reverse=True)
+
+    def valuta(self, distanza):
+        """
+        valuta la posizione dal punto di vista del giocatore alla radice, restituendo anche se la partita è finita
+        -chi raggiunge win_threshold vince (nell'ordine dei giocatori, come check_vincitore); le vittorie più vicine valgono di più
+        """
+        for indice, simbolo in enumerate(self.simboli):
+            if self.punteggi[simbolo] >= self.win_threshold:
+                if indice == self.radice:
+                    return self.VITTORIA - distanza, True
+                return -self.VITTORIA + distanza, True
+        proprio = self.punteggi[self.simboli[self.radice]]
+        avversari = max([self.punteggi[simbolo] for indice, simbolo in enumerate(self.simboli) if indice != self.radice] or [0])
+        return proprio - avversari, False
+
+    def alphabeta(self, profondita, turno, alpha, beta, distanza):
+        """
+        ricerca alpha-beta paranoica: restituisce (valore, miglior mossa) della posizione corrente
+        """
+        self.nodi += 1
+        if time.perf_counter() > self.scadenza or (self.annulla is not None and self.annulla.is_set()):
+            raise TempoScaduto()
+
+        valore, finita = self.valuta(distanza)
+        if finita or profondita == 0:
+            return valore, None
+
+        chiave = self.hash ^ self.zobrist_turno[turno]
+        voce = self.tabella.leggi(chiave)
+        mossa_tabella = None
+        if voce is not None:
+            profondita_voce, valore_voce, tipo, mossa_tabella = voce
+            if profondita_voce >= profondita:
+                if tipo == self.ESATTO:
+                    return valore_voce, mossa_tabella
+                if tipo == self.INFERIORE and valore_voce >= beta:
+                    return valore_voce, mossa_tabella
+                if tipo == self.SUPERIORE and valore_voce <= alpha:
+                    return valore_voce, mossa_tabella
+
+        mosse = self.candidate()
+        if distanza == 0:
+            mosse = self.rappresentanti(mosse)
+        mosse = self.ordina_mosse(mosse, turno)[:self.larghezza]
+        if not mosse:
+            return valore, None
+        if mossa_tabella in mosse:
+            mosse.remove(mossa_tabella)
+            mosse.insert(0, mossa_tabella)
+
+        massimizza = turno == self.radice
+        alpha_iniziale, beta_iniziale = alpha, beta
+        simbolo = self.simboli[turno]
+        prossimo = (turno + 1) % len(self.simboli)
+        migliore = None
+        miglior_valore = None
+        codice = self.giocatori[turno].codice
+        N = self.dimensione
+        for i, j in mosse:
+            self.game.piazza(i, j, simbolo)
+            self.hash ^= zobrist_cella(codice, i * N + j)
+            self.percorso.append((i, j))
+            try:
+                figlio, _ = self.alphabeta(profondita - 1, prossimo, alpha, beta, distanza + 1)
+            finally:
+                self.percorso.pop()
+                self.game.togli(i, j)
+                self.hash ^= zobrist_cella(codice, i * N + j)
+
+            if miglior_valore is None or (figlio > miglior_valore if massimizza else figlio < miglior_valore):
+                miglior_valore = figlio
+                migliore = (i, j)
+            if massimizza:
+                alpha = max(alpha, figlio)
+            else:
+                beta = min(beta, figlio)
+            if alpha >= beta:
+                break
+
+        if miglior_valore <= alpha_iniziale:
+            tipo = self.SUPERIORE
+        elif miglior_valore >= beta_iniziale:
+            tipo = self.INFERIORE
+        else:
+            tipo = self.ESATTO
+        self.tabella.scrivi(chiave, (profondita, miglior_valore, tipo, migliore))
+        return miglior_valore, migliore
+
+
+
+def esito_punteggi(punteggi, simboli, win_threshold):
+    """
+    restituisce il vettore delle ricompense se un giocatore ha raggiunto win_threshold (1 al vincitore, 0 agli altri), altrimenti None
+    -come check_vincitore, a parità vince il primo giocatore nell'ordine dei turni
+    """
+    for indice, simbolo in enumerate(simboli):
+        if punteggi[simbolo] >= win_threshold:
+            return [1.0 if i == indice else 0.0 for i in range(len(simboli))]
+    return None
+
+def ricompense_punteggi(punteggi, simboli):
+    """
+    ricompense di una simulazione finita senza vincitore: la quota di punti di ogni giocatore sul totale
+    """
+    totale = sum(punteggi[simbolo] for simbolo in simboli)
+    if totale <= 0:
+        return [1.0 / len(simboli)] * len(simboli)
+    return [punteggi[simbolo] / totale for simbolo in simboli]
+
+def rollout_mcts(compito):
+    """
+    esegue le simulazioni casuali (rollout) di un gruppo di foglie dell'albero MCTS; è eseguita anche nei processi del pool
+    -compito contiene il board della radice, i punteggi, il turno, i simboli, mappa dei punteggi e opzioni delle regole,
+     la soglia di vittoria, i percorsi di mosse dalla radice alle foglie, la lunghezza massima del rollout, la politica e il seme
+    -le regole compilate sono lette da regole_gioco, quindi ogni processo del pool le compila una volta sola
+    -politica 'facile': mosse casuali come il computer facile; 'greedy': la migliore tra 4 celle casuali per guadagno_mossa
+    -i punteggi di tutti i giocatori sono aggiornati a ogni mossa con gioca_su_board, quindi sono esatti anche con i bonus
+    -restituisce per ogni percorso il vettore delle ricompense dei giocatori
+    """
+    board, punteggi, turno, simboli, (mappa_punteggi, opzioni), win_threshold, percorsi, profondita, politica, seme = compito
+    generatore = random.Random(seme)
+    N = len(board)
+    regole = regole_gioco(mappa_punteggi, N, **opzioni)
+    giocatori = len(simboli)
+    libere_radice = [(r, c) for r in range(N) for c in range(N) if board[r][c] == '.']
+    risultati = []
+    for percorso in percorsi:
+        punti = dict(punteggi)
+        t = turno
+        giocate = []
+        ricompense = None
+        for i, j in percorso:
+            gioca_su_board(board, N, i, j, simboli[t], regole, punti)
+            giocate.append((i, j))
+            t = (t + 1) % giocatori
+        ricompense = esito_punteggi(punti, simboli, win_threshold)
+        if ricompense is None:
+            libere = [cella for cella in libere_radice if board[cella[0]][cella[1]] == '.']
+            for _ in range(profondita):
+                if not libere:
+                    break
+                simbolo = simboli[t]
+                k = generatore.randrange(len(libere))
+                if politica == 'greedy':
+                    migliore = None
+                    for indice in [k] + [generatore.randrange(len(libere)) for _ in range(3)]:
+                        i, j = libere[indice]
+                        guadagno = guadagno_mossa(board, N, i, j, simbolo, regole)
+                        if migliore is None or guadagno > migliore:
+                            migliore, k = guadagno, indice
+                i, j = libere[k]
+                libere[k] = libere[-1]
+                libere.pop()
+                gioca_su_board(board, N, i, j, simbolo, regole, punti)
+                giocate.append((i, j))
+                t = (t + 1) % giocatori
+                ricompense = esito_punteggi(punti, simboli, win_threshold)
+                if ricompense is not None:
+                    break
+            if ricompense is None:
+                ricompense = ricompense_punteggi(punti, simboli)
+        for i, j in giocate:
+            board[i][j] = '.'
+        risultati.append(ricompense)
+    return risultati
+
+#pool di processi condivisi per i rollout MCTS, uno per numero di processi, creati alla prima ricerca che li usa,
+#e lock che ne protegge creazione e chiusura
+POOL_MCTS = {}
+BLOCCO_POOL_MCTS = threading.Lock()
+
+def pool_mcts(processi):
+    """
+    restituisce il pool di processi per i rollout, creandolo alla prima richiesta;
+    la creazione del primo pool registra chiudi_pool_mcts da eseguire all'uscita del programma
+    -creazione e chiusura avvengono sotto BLOCCO_POOL_MCTS, così ricerche in thread diversi non creano due pool
+    """
+    with BLOCCO_POOL_MCTS:
+        pool = POOL_MCTS.get(processi)
+        if pool is None:
+            if not POOL_MCTS:
+                atexit.register(chiudi_pool_mcts)
+            pool = POOL_MCTS[processi] = ProcessPoolExecutor(max_workers=processi)
+        return pool
+
+def chiudi_pool_mcts():
+    """
+    chiude i pool di processi dei rollout MCTS, aspettando la fine dei processi
+    """
+    with BLOCCO_POOL_MCTS:
+        atexit.unregister(chiudi_pool_mcts)
+        aperti = list(POOL_MCTS.values())
+        POOL_MCTS.clear()
+    for pool in aperti:
+        pool.shutdown()
+
+
+class NodoMCTS:
+    """
+    nodo dell'albero MCTS:
+    -turno: indice del giocatore che deve muovere nella posizione del nodo
+    -ricompense: somma dei vettori di ricompensa (uno per giocatore) delle simulazioni passate dal nodo
+    -candidate: celle libere giocabili, calcolate alla prima espansione; non_esplorate: quelle senza ancora un figlio
+    """
+    def __init__(self, mossa, genitore, turno, giocatori):
+        self.mossa = mossa
+        self.genitore = genitore
+        self.turno = turno
+        self.figli = {}
+        self.visite = 0
+        self.visite_virtuali = 0
+        self.ricompense = [0.0] * giocatori
+        self.candidate = None
+        self.non_esplorate = None
+        self.terminale = False
+
+
+class RicercaMCTS:
+    """
+    ricerca Monte Carlo ad albero (MCTS) per il computer 'mcts', adatta a molti giocatori e board grandi:
+    -selezione UCT: ogni nodo sceglie il figlio migliore per il giocatore che muove in quel nodo (vettori di ricompensa multi-giocatore)
+    -espansione di una mossa alla volta, in ordine di guadagno_mossa, tra le celle vicine ai simboli già giocati
+     in cui qualcuno può ancora fare punti (vedi Game.celle_utili)
+    -la selezione gioca e annulla le mosse sul gioco con Game.piazza e Game.togli (su una copia a liste con il backend numpy)
+    -i rollout sono eseguiti a gruppi da rollout_mcts, in un pool di processi se il giocatore ha 'processi' > 1;
+     le foglie di un gruppo sono diversificate con una perdita virtuale
+    -dopo ogni mossa giocata l'albero non viene buttato: alla ricerca successiva si riparte dal sottoalbero della posizione attuale
+    -se il board è simmetrico la radice espande una sola mossa per classe di mosse equivalenti
+    -impostazioni dal giocatore: 'tempo_ms' (default 500), 'processi' (default 1), 'rollout' ('facile' o 'greedy'),
+     'profondita_rollout' (default 30), 'esplorazione' (costante UCT, default 1.4)
+    """
+    def __init__(self):
+        self.radice = None
+        self.storico = []
+        self.simulazioni = 0
+
+    def riusa_albero(self, game, scadenza=None):
+        """
+        porta la radice sulla posizione attuale del gioco scendendo lungo le mosse giocate dall'ultima ricerca;
+        se le mosse non sono nell'albero (o una mossa è stata annullata) crea un albero nuovo, come quando il nodo raggiunto
+        non ha candidate ma il board ha ancora celle libere
+        -solleva TempoScaduto se la scadenza passa mentre calcola le candidate della radice (vedi Game.celle_utili)
+        """
+        nodo = None
+        if self.radice is not None and game.storico[:len(self.storico)] == self.storico:
+            nodo = self.radice
+            for r, c, _ in game.storico[len(self.storico):]:
+                nodo = nodo.figli.get((r, c))
+                if nodo is None:
+                    break
+        #un nodo senza candidate mentre restano celle libere (le candidate dei figli sono solo vicine alle mosse) non ha
+        #sottoalbero da riusare: si riparte dalle candidate del gioco
+        if nodo is None or nodo.turno != game.turno or (nodo.candidate == set() and game.celle_libere):
+            nodo = NodoMCTS(None, None, game.turno, len(game.giocatori))
+        if nodo.candidate is None:
+            nodo.candidate = set(game.celle_utili(game.celle_candidate(), scadenza))
+        nodo.genitore = None
+        self.radice = nodo
+        self.storico = list(game.storico)
+
+    def espandi(self, nodo, scadenza=None):
+        """
+        prepara le mosse non esplorate di un nodo, ordinate per guadagno del giocatore di turno (la migliore in fondo alla lista)
+        -le candidate di un figlio sono quelle del genitore, senza la cella giocata, più le celle libere vicine alla mossa
+        -solleva TempoScaduto se la scadenza facoltativa passa mentre calcola i guadagni, prima di modificare il nodo
+        """
+        if nodo.candidate is None:
+            k = self.raggio
+            r, c = nodo.mossa
+            candidate = set(nodo.genitore.candidate)
+            candidate.discard((r, c))
+            board = self.game.board
+            for i in range(max(0, r - k), min(self.dimensione, r + k + 1)):
+                for j in range(max(0, c - k), min(self.dimensione, c + k + 1)):
+                    if board[i][j] == '.':
+                        candidate.add((i, j))
+            nodo.candidate = candidate
+        simbolo = self.simboli[nodo.turno]
+        celle = nodo.candidate
+        if nodo is self.radice:
+            celle = self.rappresentanti(sorted(celle))
+        chiavi = {}
+        for indice, (i, j) in enumerate(celle):
+            if scadenza is not None and indice % 256 == 0 and time.perf_counter() > scadenza:
+                raise TempoScaduto()
+            chiavi[(i, j)] = (guadagno_mossa(self.game.board, self.dimensione, i, j, simbolo, self.regole), -i, -j)
+        nodo.non_esplorate = sorted(celle, key=chiavi.__getitem__)
+        nodo.terminale = not nodo.non_esplorate
+
+    def uct(self, genitore, figlio):
+        visite = figlio.visite + figlio.visite_virtuali
+        media = figlio.ricompense[genitore.turno] / visite
+        return media + self.esplorazione * (math.log(genitore.visite + genitore.visite_virtuali) / visite) ** 0.5
+
+    def seleziona(self):
+        """
+        scende dalla radice con UCT fino a un nodo da espandere e ne crea un figlio
+        -restituisce il percorso di mosse e i nodi attraversati, ai quali aggiunge una visita virtuale
+        """
+        nodo = self.radice
+        nodi = [nodo]
+        percorso = []
+        punti = self.game.punteggi_simboli
+        while True:
+            if nodo.non_esplorate is None and not nodo.terminale:
+                if esito_punteggi(punti, self.simboli, self.win_threshold) is not None:
+                    nodo.terminale = True
+                    nodo.non_esplorate = []
+                else:
+                    self.espandi(nodo)
+            if nodo.terminale:
+                break
+            if nodo.non_esplorate:
+                i, j = nodo.non_esplorate.pop()
+                figlio = NodoMCTS((i, j), nodo, (nodo.turno + 1) % len(self.simboli), len(self.simboli))
+                nodo.figli[(i, j)] = figlio
+            else:
+                figlio = max(nodo.figli.values(), key=lambda f: self.uct(nodo, f))
+                i, j = figlio.mossa
+            self.game.piazza(i, j, self.simboli[nodo.turno])
+            percorso.append((i, j))
+            nodi.append(figlio)
+            nodo = figlio
+            if figlio.visite == 0:
+                break
+        for i, j in reversed(percorso):
+            self.game.togli(i, j)
+        for n in nodi:
+            n.visite_virtuali += 1
+        return percorso, nodi
+
+    def cerca(self, game, giocatore, annulla=None):
+        """
+        restituisce la mossa (r, c) più visitata dalla radice allo scadere del tempo, oppure None se non ci sono mosse
+        o se l'evento annulla viene impostato
+        -il tempo 'tempo_ms' comprende la preparazione della ricerca: se finisce prima dei rollout si gioca la migliore mossa nota
+        """
+        scadenza = time.perf_counter() + giocatore.get('tempo_ms', 500) / 1000
+        self.simulazioni = 0
+        try:
+            self.riusa_albero(game, scadenza)
+        except TempoScaduto:
+            return min(game.frontiera or game.celle_libere, default=None)
+        if not self.radice.candidate:
+            return None
+        self.rappresentanti = game.rappresentanti
+        self.dimensione = game.dimensione
+        self.raggio = game.raggio_frontiera
+        self.simboli = [g.simbolo for g in game.giocatori]
+        self.regole = game.regole
+        self.win_threshold = game.win_threshold
+        self.esplorazione = giocatore.get('esplorazione', 1.4)
+        self.game = game if game.backend == 'liste' else game.copia('liste')
+        self.punteggi = dict(self.game.punteggi_simboli)
+        #la radice di un albero nuovo può avere molte candidate: la si espande qui, entro il tempo
+        if self.radice.non_esplorate is None and esito_punteggi(self.punteggi, self.simboli, self.win_threshold) is None:
+            try:
+                self.espandi(self.radice, scadenza)
+            except TempoScaduto:
+                return self.mossa_migliore()
+
+        processi = giocatore.get('processi', 1)
+        lotto = 8 if processi == 1 else 4 * processi
+        profondita = giocatore.get('profondita_rollout', 30)
+        politica = giocatore.get('rollout', 'facile')
+        #ai rollout vanno solo mappa dei punteggi e opzioni delle regole, non le regole compilate con le loro cache
+        parametri = (self.regole.mappa_punteggi, self.regole.opzioni())
+        while time.perf_counter() <= scadenza:
+            foglie = [self.seleziona() for _ in range(lotto)]
+            gruppi = [foglie[k::processi] for k in range(processi)]
+            compiti = [(self.game.board, self.punteggi, self.radice.turno, self.simboli, parametri, self.win_threshold,
+                        [percorso for percorso, _ in gruppo], profondita, politica, random.getrandbits(32))
+                       for gruppo in gruppi if gruppo]
+            if processi == 1:
+                risultati = [rollout_mcts(compito) for compito in compiti]
+            else:
+                risultati = list(pool_mcts(processi).map(rollout_mcts, compiti))
+            for gruppo, ricompense_gruppo in zip(gruppi, risultati):
+                for (_, nodi), ricompense in zip(gruppo, ricompense_gruppo):
+                    for nodo in nodi:
+                        nodo.visite_virtuali -= 1
+                        nodo.visite += 1
+                        for indice, valore in enumerate(ricompense):
+                            nodo.ricompense[indice] += valore
+            self.simulazioni += len(foglie)
+            if annulla is not None and annulla.is_set():
+                return None
+        return self.mossa_migliore()
+
+    def mossa_migliore(self):
+        """
+        mossa più visitata dalla radice; se la radice non ha ancora figli, la prima candidata in ordine di riga e colonna
+        """
+        if not self.radice.figli:
+            return min(self.radice.candidate)
+        return max(self.radice.figli.values(), key=lambda figlio: figlio.visite).mossa
+
+
+
+"""
+salvataggio, caricamento e replay delle partite in un registro binario compatto:
+    -intestazione: b'FLT2', dimensione, giocatori (nome, simbolo, tipo, difficoltà), mappa dei punteggi, win_threshold
+     e regole di punteggio (le opzioni di RegolePunteggio in json); i registri b'FLT1', senza regole, usano le regole di default
+    -di seguito le mosse, una dopo l'altra, come coppie (r, c) di varint; il file si estende aggiungendo mosse in fondo
+"""
+MAGIC_REGISTRO = b'FLT2'
+MAGIC_REGISTRO_V1 = b'FLT1'
+
+def codifica_varint(n):
+    """
+    codifica un intero non negativo in varint: 7 bit per byte, il bit alto indica che seguono altri byte
+    """
+    byte = bytearray()
+    while True:
+        parte = n & 0x7F
+        n >>= 7
+        if n:
+            byte.append(parte | 0x80)
+        else:
+            byte.append(parte)
+            return bytes(byte)
+
+def leggi_varint(buffer, posizione):
+    """
+    legge un varint dal buffer a partire da posizione e restituisce (valore, posizione successiva)
+    -solleva ValueError se il buffer finisce prima dell'ultimo byte del varint
+    """
+    valore = 0
+    spostamento = 0
+    try:
+        while True:
+            byte = buffer[posizione]
+            posizione += 1
+            valore |= (byte & 0x7F) << spostamento
+            if byte < 0x80:
+                return valore, posizione
+            spostamento += 7
+    except IndexError:
+        raise ValueError(f"varint troncato: il registro finisce alla posizione {posizione}") from None
+
+def codifica_intero(n):
+    """
+    codifica un intero con segno in varint con la codifica zigzag (0, -1, 1, -2, ... -> 0, 1, 2, 3, ...)
+    """
+    return codifica_varint(n * 2 if n >= 0 else -n * 2 - 1)
+
+def leggi_intero(buffer, posizione):
+    valore, posizione = leggi_varint(buffer, posizione)
+    return (valore >> 1) if not valore & 1 else -((valore + 1) >> 1), posizione
+
+def codifica_stringa(testo):
+    dati = testo.encode('utf-8')
+    return codifica_varint(len(dati)) + dati
+
+def leggi_stringa(buffer, posizione):
+    lunghezza, posizione = leggi_varint(buffer, posizione)
+    return bytes(buffer[posizione:posizione + lunghezza]).decode('utf-8'), posizione + lunghezza
+
+def codifica_intestazione(game):
+    """
+    restituisce l'intestazione binaria della partita (tutto tranne le mosse)
+    """
+    parti = [MAGIC_REGISTRO, codifica_varint(game.dimensione), codifica_varint(len(game.giocatori))]
+    for giocatore in game.giocatori:
+        parti.append(codifica_stringa(giocatore['nome']))
+        parti.append(codifica_stringa(giocatore['simbolo']))
+        parti.append(codifica_stringa(giocatore['tipo']))
+        parti.append(codifica_stringa(giocatore.get('difficolta', '')))
+    parti.append(codifica_varint(len(game.mappa_punteggi)))
+    for lunghezza, punteggio in sorted(game.mappa_punteggi.items()):
+        parti.append(codifica_varint(lunghezza))
+        parti.append(codifica_intero(punteggio))
+    parti.append(codifica_intero(game.win_threshold))
+    parti.append(codifica_stringa(json.dumps(game.regole.opzioni(), separators=(',', ':'))))
+    return b''.join(parti)
+
+def codifica_mossa(r, c):
+    return codifica_varint(r) + codifica_varint(c)
+
+def salva_partita(game, percorso):
+    """
+    salva la partita nel file 'percorso': intestazione seguita da tutte le mosse giocate finora (game.storico)
+    """
+    with open(percorso, 'wb') as file:
+        file.write(codifica_intestazione(game))
+        file.write(b''.join(codifica_mossa(r, c) for r, c, _ in game.storico))
+
+
+class RegistroBinario:
+    """
+    scrittura incrementale di una partita: scrive l'intestazione all'apertura e aggiunge in fondo una mossa alla volta
+    """
+    def __init__(self, percorso, game):
+        self.file = open(percorso, 'wb')
+        self.file.write(codifica_intestazione(game))
+        for r, c, _ in game.storico:
+            self.file.write(codifica_mossa(r, c))
+
+    def aggiungi(self, r, c):
+        self.file.write(codifica_mossa(r, c))
+
+    def chiudi(self):
+        self.file.close()
+
+
+#ogni quante mosse LogPartita.posizione conserva una copia della partita da cui ripartire (0 disattiva le copie)
+INTERVALLO_CHECKPOINT_LOG = 256
+
+class LogPartita:
+    """
+    lettura di una partita salvata, con il file mappato in memoria (mmap):
+    -l'intestazione è letta all'apertura, le mosse sono decodificate solo quando servono
+    -mosse() le restituisce una alla volta senza caricarle tutte in memoria
+    -self.offset[k] è la posizione nel file della mossa k, registrata la prima volta che la lettura ci passa:
+     mosse(inizio=k) riparte da lì senza decodificare le mosse precedenti
+    -posizione(k) ricostruisce la partita dopo k mosse partendo dalla copia più vicina salvata ogni 'intervallo' mosse
+     dalle ricostruzioni precedenti (checkpoint), invece di rigiocare ogni volta dalla mossa 0
+    -un registro scritto da RegistroBinario interrotto a metà di una mossa termina all'ultima mossa completa;
+     un'intestazione troncata solleva ValueError
+    """
+    def __init__(self, percorso, intervallo=INTERVALLO_CHECKPOINT_LOG):
+        self.file = open(percorso, 'rb')
+        try:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            #un file vuoto non si può mappare
+            self.file.close()
+            raise ValueError(f"{percorso} non è un registro di partita Filetto")
+        versione = self.buffer[:len(MAGIC_REGISTRO)]
+        if versione not in (MAGIC_REGISTRO, MAGIC_REGISTRO_V1):
+            self.chiudi()
+            raise ValueError(f"{percorso} non è un registro di partita Filetto")
+        try:
+            self.leggi_intestazione(versione)
+        except ValueError:
+            self.chiudi()
+            raise
+        self.offset = [self.inizio_mosse]
+        self.intervallo = intervallo
+        self.checkpoint = {}
+
+    def leggi_intestazione(self, versione):
+        posizione = len(MAGIC_REGISTRO)
+        self.dimensione, posizione = leggi_varint(self.buffer, posizione)
+        numero_giocatori, posizione = leggi_varint(self.buffer, posizione)
+        self.giocatori = []
+        for _ in range(numero_giocatori):
+            nome, posizione = leggi_stringa(self.buffer, posizione)
+            simbolo, posizione = leggi_stringa(self.buffer, posizione)
+            tipo, posizione = leggi_stringa(self.buffer, posizione)
+            difficolta, posizione = leggi_stringa(self.buffer, posizione)
+            giocatore = {'nome': nome, 'simbolo': simbolo, 'score': 0, 'tipo': tipo}
+            if difficolta:
+                giocatore['difficolta'] = difficolta
+            self.giocatori.append(giocatore)
+        voci, posizione = leggi_varint(self.buffer, posizione)
+        self.mappa_punteggi = {}
+        for _ in range(voci):
+            lunghezza, posizione = leggi_varint(self.buffer, posizione)
+            self.mappa_punteggi[lunghezza], posizione = leggi_intero(self.buffer, posizione)
+        self.win_threshold, posizione = leggi_intero(self.buffer, posizione)
+        self.regole = None
+        if versione == MAGIC_REGISTRO:
+            regole, posizione = leggi_stringa(self.buffer, posizione)
+            self.regole = json.loads(regole)
+        self.inizio_mosse = posizione
+
+    def mosse(self, limite=None, inizio=0):
+        """
+        generatore delle mosse (r, c) nell'ordine in cui sono state giocate, a partire dalla mossa 'inizio'
+        e al massimo 'limite' se indicato
+        -se la mossa 'inizio' non è ancora nell'indice degli offset, ci arriva leggendo dall'ultima mossa indicizzata
+        -una mossa troncata in fondo al file termina la lettura
+        """
+        offset = self.offset
+        fine = len(self.buffer)
+        k = min(inizio, len(offset) - 1)
+        posizione = offset[k]
+        lette = 0
+        while posizione < fine and (limite is None or lette < limite):
+            try:
+                r, successiva = leggi_varint(self.buffer, posizione)
+                c, successiva = leggi_varint(self.buffer, successiva)
+            except ValueError:
+                return
+            posizione = successiva
+            k += 1
+            if k == len(offset):
+                offset.append(posizione)
+            if k > inizio:
+                lette += 1
+                yield r, c
+
+    def nuova_partita(self, **opzioni):
+        """
+        crea una partita vuota con le impostazioni del registro, regole di punteggio comprese (i giocatori sono copiati)
+        """
+        opzioni.setdefault('regole', self.regole)
+        return Game(self.dimensione, [Giocatore.da_dizionario(giocatore) for giocatore in self.giocatori],
+                    self.mappa_punteggi, self.win_threshold, **opzioni)
+
+    def posizione(self, k=None, **opzioni):
+        """
+        restituisce la partita dopo le prime k mosse (tutte se k è None), con punteggi e turno aggiornati
+        -riparte dal checkpoint più vicino prima della mossa k creato con le stesse opzioni, rigiocando solo le mosse successive
+        -durante il replay salva una copia della partita (Game.copia) ogni 'intervallo' mosse;
+         i checkpoint sono separati per opzioni, e oggetti come libro o strumentazione contano per identità
+        -le opzioni non hashable (ad esempio regole passate come dizionario) disattivano i checkpoint per quella chiamata,
+         come un registratore, che deve ricevere tutte le mosse dall'inizio e che le copie non conservano
+        """
+        checkpoint = None
+        if self.intervallo > 0 and opzioni.get('registratore') is None:
+            try:
+                checkpoint = self.checkpoint.setdefault(tuple(sorted(opzioni.items())), {})
+            except TypeError:
+                checkpoint = None
+        base = max((j for j in checkpoint or () if k is None or j <= k), default=0)
+        game = checkpoint[base].copia() if base else self.nuova_partita(**opzioni)
+        limite = None if k is None else k - base
+        for giocate, (r, c) in enumerate(self.mosse(limite, base), base + 1):
+            game.mossa(r, c)
+            game.prossimo_turno()
+            if checkpoint is not None and giocate % self.intervallo == 0 and giocate not in checkpoint:
+                checkpoint[giocate] = game.copia()
+        game.aggiorna_punteggio()
+        return game
+
+    def chiudi(self):
+        self.buffer.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *errore):
+        self.chiudi()
+        return False
+
+def carica_partita(percorso, **opzioni):
+    """
+    carica una partita salvata con salva_partita o RegistroBinario e la restituisce nella posizione finale
+    """
+    with LogPartita(percorso) as registro:
+        return registro.posizione(**opzioni)
+
+
+
+"""
+registrazione delle partite in file di testo (una riga json per partita) e lettura in streaming per le analisi offline
+"""
+class RegistratorePartite:
+    """
+    registra le partite in un file di record, una riga json per partita con id, impostazioni, mosse ed esito:
+    -collegato a Game tramite il parametro 'registratore', riceve ogni mossa da Game.mossa (e gli annullamenti)
+    -le partite aperte sono indicizzate da game.id_partita; in memoria restano solo le mosse delle partite in corso
+    -ogni partita è scritta e il file svuotato su disco appena finisce (chiudi_partita) o viene abbandonata (abbandona_partita);
+     chiudi scrive come interrotte le partite ancora aperte
+    """
+    def __init__(self, percorso):
+        self.percorso = percorso
+        self.file = open(percorso, 'a', encoding='utf-8')
+        self.partite = {}
+        self.blocco = threading.Lock()
+
+    def record(self, game):
+        record = self.partite.get(game.id_partita)
+        if record is None:
+            record = {
+                'id': game.id_partita,
+                'dimensione': game.dimensione,
+                'giocatori': [{'nome': g['nome'], 'simbolo': g['simbolo'], 'tipo': g['tipo'], 'difficolta': g.get('difficolta')}
+                              for g in game.giocatori],
+                'mappa_punteggi': game.mappa_punteggi,
+                'regole': game.regole.opzioni(),
+                'win_threshold': game.win_threshold,
+                'mosse': [],
+            }
+            self.partite[game.id_partita] = record
+        return record
+
+    def registra_mossa(self, game, r, c):
+        self.record(game)['mosse'].append([r, c])
+
+    def annulla_mossa(self, game):
+        mosse = self.record(game)['mosse']
+        if mosse:
+            mosse.pop()
+
+    def scrivi(self, record):
+        with self.blocco:
+            self.file.write(json.dumps(record, separators=(',', ':')) + '\n')
+            self.file.flush()
+
+    def chiudi_partita(self, game, vincitore=None):
+        """
+        scrive il record della partita con l'esito (nome del vincitore o None per il pareggio, punteggi finali)
+        """
+        record = self.record(game)
+        del self.partite[game.id_partita]
+        record['esito'] = {
+            'vincitore': vincitore['nome'] if vincitore else None,
+            'punteggi': {g['nome']: g['score'] for g in game.giocatori},
+        }
+        self.scrivi(record)
+
+    def abbandona_partita(self, game):
+        """
+        scrive la partita, se ha mosse registrate e non è già stata chiusa, con l'esito 'interrotta'
+        (ad esempio una nuova partita iniziata o la finestra chiusa prima della fine)
+        """
+        record = self.partite.pop(game.id_partita, None)
+        if record is not None:
+            record['esito'] = {'vincitore': None, 'interrotta': True, 'punteggi': {g['nome']: g['score'] for g in game.giocatori}}
+            self.scrivi(record)
+
+    def chiudi(self):
+        if self.file.closed:
+            return
+        for record in list(self.partite.values()):
+            record['esito'] = {'vincitore': None, 'interrotta': True}
+            self.scrivi(record)
+        self.partite.clear()
+        self.file.close()
+
+#registratori delle simulazioni batch, uno per cartella in ogni processo
+REGISTRATORI = {}
+
+def registratore_processo(cartella):
+    """
+    restituisce il registratore del processo corrente per la cartella: ogni processo scrive nel proprio file partite_<pid>.jsonl
+    -ogni partita è scritta e svuotata su disco appena finisce (vedi RegistratorePartite.scrivi), senza attendere l'uscita:
+     i processi di ProcessPoolExecutor terminano con os._exit e non eseguono le funzioni di atexit
+    -simula_partita scrive come interrotta la partita in corso se finisce con un errore
+    -atexit chiude il registratore solo nei processi che escono normalmente (CLI e interfaccia grafica con FILETTO_REGISTRO),
+     scrivendo come interrotte le partite rimaste aperte
+    """
+    if cartella not in REGISTRATORI:
+        os.makedirs(cartella, exist_ok=True)
+        REGISTRATORI[cartella] = RegistratorePartite(os.path.join(cartella, f"partite_{os.getpid()}.jsonl"))
+        atexit.register(REGISTRATORI[cartella].chiudi)
+    return REGISTRATORI[cartella]
+
+def registratore_da_ambiente():
+    """
+    restituisce il registratore della cartella indicata dalla variabile d'ambiente FILETTO_REGISTRO, oppure None
+    """
+    cartella = os.environ.get('FILETTO_REGISTRO')
+    return registratore_processo(cartella) if cartella else None
+
+def file_registro(percorsi):
+    """
+    restituisce in ordine i file di record indicati: i file così come sono, le cartelle con tutti i loro file *.jsonl
+    """
+    if isinstance(percorsi, str):
+        percorsi = [percorsi]
+    for percorso in percorsi:
+        if os.path.isdir(percorso):
+            yield from sorted(glob.glob(os.path.join(percorso, '*.jsonl')))
+        else:
+            yield percorso
+
+def leggi_partite(percorsi, dimensione=None, giocatori=None, shard=0, shards=1):
+    """
+    generatore dei record delle partite contenuti in file o cartelle, letti una riga alla volta (memoria costante):
+    -shard e shards dividono le partite tra più processi: il processo 'shard' legge solo quelle con indice % shards == shard
+    -dimensione e giocatori filtrano per dimensione del board e numero di giocatori
+    -le chiavi della mappa dei punteggi tornano interi
+    """
+    indice = 0
+    for percorso in file_registro(percorsi):
+        with open(percorso, encoding='utf-8') as file:
+            for riga in file:
+                if not riga.strip():
+                    continue
+                indice += 1
+                if (indice - 1) % shards != shard:
+                    continue
+                record = json.loads(riga)
+                if dimensione is not None and record['dimensione'] != dimensione:
+                    continue
+                if giocatori is not None and len(record['giocatori']) != giocatori:
+                    continue
+                record['mappa_punteggi'] = {int(lunghezza): punteggio for lunghezza, punteggio in record['mappa_punteggi'].items()}
+                yield record
+
+def posizioni_partita(record):
+    """
+    generatore che rigioca una partita registrata e restituisce per ogni mossa (indice, r, c, simbolo, delta, board, punteggi):
+    -delta è la variazione di punteggio del giocatore che muove, uguale alla differenza tra due calcolo_punteggio_board
+    -punteggi sono i punteggi di tutti i simboli dopo la mossa: con i bonus per le estremità una mossa cambia anche
+     i punteggi degli avversari di cui chiude le sequenze
+    -board e punteggi sono gli stessi oggetti a ogni passo, vanno copiati se serve conservarli
+    -l'esito della partita è in record['esito']
+    """
+    N = record['dimensione']
+    simboli = [giocatore['simbolo'] for giocatore in record['giocatori']]
+    regole = regole_gioco(record['mappa_punteggi'], N, **record.get('regole', {}))
+    board = [['.' for _ in range(N)] for _ in range(N)]
+    punteggi = {simbolo: 0 for simbolo in simboli}
+    for indice, (r, c) in enumerate(record['mosse']):
+        simbolo = simboli[indice % len(simboli)]
+        prima = punteggi[simbolo]
+        gioca_su_board(board, N, r, c, simbolo, regole, punteggi)
+        yield indice, r, c, simbolo, punteggi[simbolo] - prima, board, punteggi
+
+
+
+"""
+libro delle aperture e cache dei finali: mosse migliori precalcolate per posizione, a meno delle simmetrie del board
+"""
+MAGIC_LIBRO = b'FLB2'
+#record del libro: chiave a 64 bit della posizione, riga e colonna della mossa nella forma canonica
+FORMATO_VOCE_LIBRO = struct.Struct('<QHH')
+
+#parte della chiave del libro che dipende solo dalle impostazioni della partita, per impostazioni (vedi sale_libro)
+SALI_LIBRO = {}
+
+def sale_libro(game):
+    """
+    valore a 64 bit delle impostazioni della partita (dimensione, simboli, regole di punteggio e soglia) combinato con
+    gli hash delle posizioni, così partite con impostazioni diverse non condividono le voci del libro;
+    è calcolato con blake2b una volta sola per impostazioni
+    """
+    impostazioni = (game.dimensione, tuple(g.simbolo for g in game.giocatori), game.regole.chiave, game.win_threshold)
+    sale = SALI_LIBRO.get(impostazioni)
+    if sale is None:
+        sale = int.from_bytes(hashlib.blake2b(repr(impostazioni).encode('utf-8'), digest_size=8).digest(), 'little')
+        SALI_LIBRO[impostazioni] = sale
+    return sale
+
+def chiave_posizione(game):
+    """
+    restituisce (chiave, simmetria) della posizione del gioco, uguale per tutte le posizioni equivalenti per simmetria:
+    -la forma canonica è la simmetria con l'hash Zobrist minimo tra gli hash tenuti aggiornati dal gioco (Game.hash_simmetrie),
+     quindi la chiave si calcola in tempo costante senza ordinare né trasformare le celle occupate
+    -sono considerate solo le simmetrie che conservano i punteggi (RegolePunteggio.simmetrie): con pesi diversi per direzione
+     una posizione e la sua trasformata non sono equivalenti e hanno chiavi diverse
+    -la chiave a 64 bit combina l'hash della forma canonica, il giocatore di turno e le impostazioni della partita (sale_libro)
+    -simmetria è la trasformazione che porta il board nella forma canonica
+    """
+    N = game.dimensione
+    hash_simmetrie = game.hash_simmetrie
+    canonico, simmetria = min((hash_simmetrie[t], t) for t in game.regole.simmetrie)
+    chiave = canonico ^ sale_libro(game) ^ zobrist_cella(game.giocatore_corrente().codice, N * N)
+    return chiave, simmetria
+
+
+class LibroAperture:
+    """
+    libro delle aperture e dei finali letto da file con mmap:
+    -il file contiene b'FLB2', il numero di voci e le voci (chiave, r, c) ordinate per chiave
+    -cerca() trova la voce con una ricerca binaria sul file mappato e riporta la mossa nelle coordinate del board attuale
+    """
+    def __init__(self, percorso):
+        self.file = open(percorso, 'rb')
+        try:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            #un file vuoto non si può mappare
+            self.file.close()
+            raise ValueError(f"{percorso} non è un libro delle aperture Filetto")
+        if self.buffer[:len(MAGIC_LIBRO)] != MAGIC_LIBRO:
+            self.chiudi()
+            raise ValueError(f"{percorso} non è un libro delle aperture Filetto")
+        self.voci = struct.unpack_from('<I', self.buffer, len(MAGIC_LIBRO))[0]
+        self.inizio = len(MAGIC_LIBRO) + 4
+
+    def voce(self, indice):
+        return FORMATO_VOCE_LIBRO.unpack_from(self.buffer, self.inizio + indice * FORMATO_VOCE_LIBRO.size)
+
+    def __len__(self):
+        return self.voci
+
+    def __getitem__(self, indice):
+        return self.voce(indice)[0]
+
+    def cerca(self, game):
+        """
+        restituisce la mossa del libro per la posizione del gioco, oppure None se la posizione non è nel libro
+        """
+        chiave, simmetria = chiave_posizione(game)
+        indice = bisect.bisect_left(self, chiave)
+        if indice == self.voci:
+            return None
+        trovata, r, c = self.voce(indice)
+        if trovata != chiave:
+            return None
+        r, c = trasforma_cella(r, c, game.dimensione, SIMMETRIA_INVERSA[simmetria])
+        if not game.mossa_valida(r, c):
+            return None
+        return r, c
+
+    def chiudi(self):
+        self.buffer.close()
+        self.file.close()
+
+#libri già aperti, per percorso, condivisi da tutte le partite del processo
+LIBRI = {}
+
+def carica_libro(percorso):
+    if percorso not in LIBRI:
+        LIBRI[percorso] = LibroAperture(percorso)
+    return LIBRI[percorso]
+
+def libro_da_ambiente():
+    """
+    restituisce il libro indicato dalla variabile d'ambiente FILETTO_LIBRO, oppure None
+    """
+    percorso = os.environ.get('FILETTO_LIBRO')
+    return carica_libro(percorso) if percorso else None
+
+def posizioni_libro(config, seme, aperture, finale):
+    """
+    gioca una partita della configurazione e restituisce le voci (chiave, r, c) in forma canonica delle mosse giocate
+    nelle prime 'aperture' mosse e quando restano al massimo 'finale' celle libere
+    """
+    random.seed(seme)
+    game = crea_partita(config)
+    voci = []
+    while True:
+        mossa = mossa_computer(game, game.giocatore_corrente())
+        if mossa is None:
+            break
+        if len(game.storico) < aperture or len(game.celle_libere) <= finale:
+            chiave, simmetria = chiave_posizione(game)
+            voci.append((chiave,) + trasforma_cella(mossa[0], mossa[1], game.dimensione, simmetria))
+        game.mossa(mossa[0], mossa[1])
+        game.aggiorna_punteggio()
+        if game.check_vincitore() or game.check_pareggio():
+            break
+        game.prossimo_turno()
+    return voci
+
+def posizioni_libro_blocco(config, semi, aperture, finale):
+    return [voce for seme in semi for voce in posizioni_libro(config, seme, aperture, finale)]
+
+def genera_libro(config, percorso, partite=200, aperture=6, finale=6, processi=None, seme=0):
+    """
+    strumento offline che genera il libro giocando 'partite' partite della configurazione in un pool di processi:
+    -per ogni posizione registrata conserva la mossa scelta più spesso dal computer
+    -conviene usare giocatori 'esperto' o 'mcts' con un tempo per mossa generoso
+    -scrive il file del libro ordinato per chiave e restituisce il numero di posizioni
+    """
+    conteggi = {}
+    processi = processi or os.cpu_count() or 1
+    blocco = max(1, partite // (processi * 4))
+    semi = [seme + i for i in range(partite)]
+    with ProcessPoolExecutor(max_workers=processi) as pool:
+        futuri = [pool.submit(posizioni_libro_blocco, config, semi[i:i + blocco], aperture, finale)
+                  for i in range(0, partite, blocco)]
+        for futuro in as_completed(futuri):
+            for chiave, r, c in futuro.result():
+                mosse = conteggi.setdefault(chiave, {})
+                mosse[(r, c)] = mosse.get((r, c), 0) + 1
+    with open(percorso, 'wb') as file:
+        file.write(MAGIC_LIBRO)
+        file.write(struct.pack('<I', len(conteggi)))
+        for chiave in sorted(conteggi):
+            mosse = conteggi[chiave]
+            r, c = max(sorted(mosse), key=lambda mossa: mosse[mossa])
+            file.write(FORMATO_VOCE_LIBRO.pack(chiave, r, c))
+    print(f"Libro delle aperture salvato in {percorso}: {len(conteggi)} posizioni")
+    return len(conteggi)
+
+
+
+"""
+funzionamento modalità da riga di comando
+"""
+def run_cli(strumentazione=None):
+    """
+    modalità da linea di comando - command line interface
+    -l'utente inserisce la dimensione della matrice di gioco (NxN), il numero di giocatori e per ogni giocatore fornisce:
+        -umano o computer
+        -nome del giocatore
+        -simbolo
+        -per giocatore computer si sceglie anche la difficolta
+    -viene creato l'oggetto game contenente le informazioni e avviato il gioco
+    -alternanza dei turni: per ogni turno, viene stampata la griglia attuale e i punteggi, 
+       quindi viene chiesta la mossa al giocatore corrente
+    -verifica della validità della mossa
+    -aggiornamento della griglia e dei punteggi: la mossa viene applicata e, se un giocatore vince, 
+       viene stampato il nome del vincitore e il gioco termina
+    -se nessun giocatore può più vincere (Game.check_pareggio) la partita finisce subito in pareggio
+    -se viene passata una Strumentazione, misura le fasi di ogni turno e stampa il riepilogo a fine partita
+    -al posto della mossa un giocatore umano può scrivere 'u' per annullare fino al proprio turno precedente
+     o 'r' per ripetere le mosse annullate
+    """
+    
+    print("Benvenuto nel gioco Filetto (modalità CLI)!")
+    try:
+        dimensione = int(input("Inserisci dimensione della matrice NxN: "))
+    except ValueError:
+        print("Valore non valido per la dimensione.")
+        return
+
+    try:
+        k = int(input("Inserisci il numero di giocatori: "))
+    except ValueError:
+        print("Valore non valido per il numero di giocatori.")
+        return
+    
+
+    giocatori = []
+    for i in range(k):
+        tipo = input(f"Giocatore {i+1}. è 'umano' o 'computer'? (u/c): ").strip().lower()
+        nome = input(f"Inserisci il nome del giocatore {i+1}: ").strip()
+        simbolo = input(f"Inserisci il simbolo per {nome} (es. x, 0, *): ").strip()
+        if tipo == 'c' or tipo == 'computer':
+            difficolta = input(f"Seleziona difficoltà per il computer ({'/'.join(DIFFICOLTA)}): ").strip().lower()
+            if difficolta not in DIFFICOLTA:
+                difficolta = 'facile'
+            giocatori.append({
+                'nome': nome,
+                'simbolo': simbolo,
+                'score': 0,
+                'tipo': 'computer',
+                'difficolta': difficolta
+            })
+        else:
+            giocatori.append({
+                'nome': nome,
+                'simbolo': simbolo,
+                'score': 0,
+                'tipo': 'umano'
+            })
+
+    game = Game(dimensione, giocatori, strumentazione=strumentazione, libro=libro_da_ambiente(),
+                registratore=registratore_da_ambiente())
+    
+    if game.giocatore_corrente()['tipo'] == 'computer':
+        giocatore_corrente = game.giocatore_corrente()
+        if strumentazione is not None:
+            strumentazione.inizia_turno(giocatore_corrente['nome'])
+        with misura(strumentazione, 'decisione'):
+            r, c = mossa_computer(game, giocatore_corrente)
+        print(f"Il computer ({giocatore_corrente.get('difficolta', 'facile')}) ha scelto la mossa {r} {c}")
+        game.mossa(r, c)
+        game.prossimo_turno()
+    
+    while True: 
+        with misura(strumentazione, 'interfaccia'):
+            game.stampa_board()
+        with misura(strumentazione, 'punteggio'):
+            game.aggiorna_punteggio()
+        print("Punteggio:")
+        for giocatore in game.giocatori:
+            print(f"{giocatore['nome']}: {giocatore['score']} punti")
+        
+        vincitore = game.check_vincitore()
+        if vincitore:
+            print(f"Ha vinto {vincitore['nome']}!")
+            break
+        if game.check_pareggio():
+            print("Pareggio: nessun giocatore può più raggiungere il punteggio per vincere.")
+            break
+        
+        giocatore_corrente = game.giocatore_corrente()
+        if strumentazione is not None:
+            strumentazione.inizia_turno(giocatore_corrente['nome'])
+        print(f"Turno di {giocatore_corrente['nome']} ({giocatore_corrente['simbolo']})")
+        if giocatore_corrente['tipo'] == 'umano':
+            mossa_input = input("Inserisci mossa (riga colonna, separate da spazio; u annulla, r ripeti): ")
+            comando = mossa_input.strip().lower()
+            if comando in ('u', 'r'):
+                celle = game.annulla_turno() if comando == 'u' else game.ripeti_turno()
+                if not celle:
+                    print("Nessuna mossa da " + ("annullare." if comando == 'u' else "ripetere."))
+                continue
+            try:
+                r, c = map(int, mossa_input.split())
+            except:
+                print("Mossa non valida.")
+                continue
+        else:
+            with misura(strumentazione, 'decisione'):
+                r, c = mossa_computer(game, giocatore_corrente)
+            print(f"Il computer ({giocatore_corrente.get('difficolta', 'facile')}) ha scelto la mossa {r} {c}")
+        
+        with misura(strumentazione, 'validazione'):
+            valida = game.mossa_valida(r,c)
+        if not valida:
+            print("Mossa non valida o cella già occupata, Riprova.")
+            continue
+        game.mossa(r,c)
+        game.prossimo_turno()
+
+    if game.registratore is not None:
+        game.registratore.chiudi_partita(game, vincitore)
+    if strumentazione is not None:
+        strumentazione.termina()
+
+"""
+funzionamento modalità simulazione (batch di partite computer contro computer, senza interfaccia)
+"""
+def leggi_configurazione(percorso):
+    """
+    legge la configurazione di una simulazione da un file json, ad esempio:
+        {"dimensione": 10, "win_threshold": 50, "mappa_punteggi": {"3": 2, "4": 10, "5": 25},
+         "giocatori": [{"nome": "A", "simbolo": "x", "difficolta": "difficile"}, {"nome": "B", "simbolo": "o"}],
+         "partite": 1000, "processi": 4, "seme": 0}
+    -le chiavi della mappa dei punteggi sono convertite in interi (in json sono stringhe)
+    """
+    with open(percorso, encoding='utf-8') as file:
+        config = json.load(file)
+    if 'mappa_punteggi' in config:
+        config['mappa_punteggi'] = {int(lunghezza): punteggio for lunghezza, punteggio in config['mappa_punteggi'].items()}
+    return config
+
+def crea_partita(config):
+    """
+    crea un oggetto Game con soli giocatori computer a partire dalla configurazione
+    -ogni giocatore della configurazione può avere anche le impostazioni della difficoltà (es. 'tempo_ms')
+    -le opzioni facoltative 'backend', 'motore', 'raggio_frontiera' e 'regole' sono passate a Game, 'libro' è il file del libro delle aperture
+    """
+    giocatori = []
+    for g in config['giocatori']:
+        giocatore = dict(g)
+        giocatore['score'] = 0
+        giocatore['tipo'] = 'computer'
+        giocatore.setdefault('difficolta', 'facile')
+        giocatori.append(giocatore)
+    opzioni = {chiave: config[chiave] for chiave in ('backend', 'motore', 'raggio_frontiera', 'regole') if chiave in config}
+    if config.get('libro'):
+        opzioni['libro'] = carica_libro(config['libro'])
+    return Game(config['dimensione'], giocatori,
+                config.get('mappa_punteggi', DEFAULT_MAP_PUNTEGGIO),
+                config.get('win_threshold', 50), **opzioni)
+
+def simula_partita(config, seme, stampa=False):
+    """
+    gioca una partita completa computer contro computer e ne restituisce l'esito:
+    -il generatore random è inizializzato con il seme della partita, così ogni partita è riproducibile
+    -con stampa=True mostra il tabellone e la mossa scelta a ogni turno, come la modalità CLI
+    -la partita finisce quando un giocatore raggiunge win_threshold o quando nessuno può più raggiungerlo (pareggio, vedi Game.check_pareggio)
+    -se la configurazione ha 'registrazione' (una cartella), la partita è registrata nel file del processo in quella cartella,
+     scritto alla fine della partita; una partita interrotta da un errore è scritta subito come interrotta (vedi registratore_processo)
+    """
+    random.seed(seme)
+    game = crea_partita(config)
+    if config.get('registrazione'):
+        game.registratore = registratore_processo(config['registrazione'])
+    inizio = time.perf_counter()
+    vincitore = None
+    try:
+        while True:
+            giocatore = game.giocatore_corrente()
+            mossa = mossa_computer(game, giocatore)
+            if mossa is None:
+                break
+            game.mossa(mossa[0], mossa[1])
+            game.aggiorna_punteggio()
+            if stampa:
+                game.stampa_board()
+                print(f"{giocatore['nome']} ({giocatore['simbolo']}) ha scelto la mossa {mossa[0]} {mossa[1]} - "
+                      + ", ".join(f"{g['nome']}: {g['score']}" for g in game.giocatori))
+            vincitore = game.check_vincitore()
+            if vincitore or game.check_pareggio():
+                break
+            game.prossimo_turno()
+    except BaseException:
+        if game.registratore is not None:
+            game.registratore.abbandona_partita(game)
+        raise
+    if game.registratore is not None:
+        game.registratore.chiudi_partita(game, vincitore)
+    return {
+        'seme': seme,
+        'vincitore': vincitore['nome'] if vincitore else None,
+        'punteggi': {g['nome']: g['score'] for g in game.giocatori},
+        'mosse': len(game.storico),
+        'durata': time.perf_counter() - inizio,
+    }
+
+def simula_blocco(config, semi):
+    """
+    gioca in un processo del pool le partite con i semi indicati
+    """
+    return [simula_partita(config, seme) for seme in semi]
+
+def esegui_simulazioni(config, partite, processi=None, seme=0, blocco=None):
+    """
+    generatore che gioca le partite in un pool di processi e restituisce gli esiti man mano che sono pronti
+    -la partita i usa il seme seme + i: i risultati non dipendono dal numero di processi né dall'ordine di esecuzione
+    -le partite sono inviate ai processi a blocchi per ridurre il costo di comunicazione
+    -con processi=1 le partite sono giocate nel processo corrente
+    """
+    semi = [seme + i for i in range(partite)]
+    if processi == 1:
+        for s in semi:
+            yield simula_partita(config, s)
+        return
+    processi = processi or os.cpu_count() or 1
+    if blocco is None:
+        blocco = max(1, min(50, partite // (processi * 4)))
+    with ProcessPoolExecutor(max_workers=processi) as pool:
+        futuri = [pool.submit(simula_blocco, config, semi[i:i + blocco]) for i in range(0, partite, blocco)]
+        for futuro in as_completed(futuri):
+            for esito in futuro.result():
+                yield esito
+
+def riepilogo_simulazioni(esiti, nomi, durata):
+    """
+    calcola le statistiche di un insieme di partite:
+    -percentuale di vittorie per giocatore e di pareggi
+    -distribuzione dei punteggi (media, deviazione standard, minimo, massimo) per giocatore
+    -lunghezza delle partite in mosse, mosse al secondo e partite al secondo
+    """
+    partite = len(esiti)
+    riepilogo = {'partite': partite, 'vittorie': {}, 'punteggi': {}}
+    for nome in nomi:
+        vittorie = sum(1 for esito in esiti if esito['vincitore'] == nome)
+        riepilogo['vittorie'][nome] = vittorie / partite if partite else 0
+        punteggi = [esito['punteggi'][nome] for esito in esiti]
+        riepilogo['punteggi'][nome] = {
+            'media': statistics.mean(punteggi) if punteggi else 0,
+            'deviazione': statistics.pstdev(punteggi) if punteggi else 0,
+            'minimo': min(punteggi, default=0),
+            'massimo': max(punteggi, default=0),
+        }
+    riepilogo['pareggi'] = sum(1 for esito in esiti if esito['vincitore'] is None) / partite if partite else 0
+    lunghezze = [esito['mosse'] for esito in esiti]
+    riepilogo['mosse_per_partita'] = statistics.mean(lunghezze) if lunghezze else 0
+    riepilogo['mosse_al_secondo'] = sum(lunghezze) / durata if durata > 0 else 0
+    riepilogo['partite_al_secondo'] = partite / durata if durata > 0 else 0
+    return riepilogo
+
+def stampa_riepilogo(riepilogo):
+    """
+    stampa in modo leggibile il riepilogo di una simulazione
+    """
+    print(f"Partite giocate: {riepilogo['partite']}")
+    for nome, percentuale in riepilogo['vittorie'].items():
+        punteggi = riepilogo['punteggi'][nome]
+        print(f"{nome}: vittorie {percentuale:.1%}, punteggio medio {punteggi['media']:.1f} "
+              f"(dev. {punteggi['deviazione']:.1f}, min {punteggi['minimo']}, max {punteggi['massimo']})")
+    print(f"Pareggi: {riepilogo['pareggi']:.1%}")
+    print(f"Mosse per partita: {riepilogo['mosse_per_partita']:.1f}")
+    print(f"Mosse al secondo: {riepilogo['mosse_al_secondo']:.0f} - Partite al secondo: {riepilogo['partite_al_secondo']:.2f}")
+
+def run_batch(config, intervallo=100):
+    """
+    modalità simulazione: gioca config['partite'] partite computer contro computer in parallelo
+    -ogni 'intervallo' partite completate stampa le percentuali di vittoria parziali
+    -alla fine stampa e restituisce il riepilogo completo
+    """
+    partite = config.get('partite', 100)
+    nomi = [g['nome'] for g in config['giocatori']]
+    esiti = []
+    inizio = time.perf_counter()
+    for esito in esegui_simulazioni(config, partite, config.get('processi'), config.get('seme', 0)):
+        esiti.append(esito)
+        if len(esiti) % intervallo == 0:
+            parziale = riepilogo_simulazioni(esiti, nomi, time.perf_counter() - inizio)
+            vittorie = ", ".join(f"{nome} {percentuale:.1%}" for nome, percentuale in parziale['vittorie'].items())
+            print(f"[{len(esiti)}/{partite}] {vittorie}, {parziale['mosse_al_secondo']:.0f} mosse/s")
+    riepilogo = riepilogo_simulazioni(esiti, nomi, time.perf_counter() - inizio)
+    stampa_riepilogo(riepilogo)
+    return riepilogo
+
+"""
+benchmark delle funzioni di punteggio, delle mosse del computer e delle partite complete
+"""
+def misura_tempo(funzione, tempo_minimo=0.05, ripetizioni_massime=1000):
+    """
+    restituisce il tempo medio in secondi di una chiamata a funzione, ripetendola finché non passa almeno tempo_minimo
+    """
+    ripetizioni = 0
+    inizio = time.perf_counter()
+    while True:
+        funzione()
+        ripetizioni += 1
+        trascorso = time.perf_counter() - inizio
+        if trascorso >= tempo_minimo or ripetizioni >= ripetizioni_massime:
+            return trascorso / ripetizioni
+
+def misura_memoria(funzione):
+    """
+    restituisce il picco di memoria allocata (in byte) durante una chiamata a funzione, misurato con tracemalloc
+    """
+    tracemalloc.start()
+    try:
+        funzione()
+        _, picco = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return picco
+
+def partita_benchmark(dimensione, numero_giocatori, riempimento, seme=0):
+    """
+    crea una partita con numero_giocatori computer 'difficile' e ne riempie a caso la frazione 'riempimento' del board
+    """
+    simboli = 'xo*#@%&+'
+    giocatori = [{'nome': f"G{i + 1}", 'simbolo': simboli[i], 'score': 0, 'tipo': 'computer', 'difficolta': 'difficile'}
+                 for i in range(numero_giocatori)]
+    game = Game(dimensione, giocatori, win_threshold=10 ** 9)
+    generatore = random.Random(seme)
+    celle = [(r, c) for r in range(dimensione) for c in range(dimensione)]
+    generatore.shuffle(celle)
+    for r, c in celle[:int(len(celle) * riempimento)]:
+        game.mossa(r, c)
+        game.prossimo_turno()
+    return game
+
+def benchmark_funzioni(game):
+    """
+    restituisce le funzioni da misurare su una partita, come coppie (nome, funzione senza argomenti)
+    """
+    simbolo = game.giocatore_corrente().simbolo
+    linee = get_linee_board(game.board, game.dimensione)
+
+    def segmenti():
+        for linea in linee:
+            get_segmenti_contigui(linea, simbolo)
+
+    def aggiorna_completo():
+        game.incrementale = False
+        try:
+            game.aggiorna_punteggio()
+        finally:
+            game.incrementale = True
+
+    def computer(difficolta):
+        giocatore = dict(game.giocatore_corrente(), difficolta=difficolta)
+        return lambda: mossa_computer(game, giocatore)
+
+    return [
+        ('get_linee_board', lambda: get_linee_board(game.board, game.dimensione)),
+        ('get_segmenti_contigui', segmenti),
+        ('calcolo_punteggio_board', lambda: calcolo_punteggio_board(game.board, simbolo, game.dimensione, game.regole)),
+        ('aggiorna_punteggio', aggiorna_completo),
+        ('aggiorna_punteggio_incrementale', game.aggiorna_punteggio),
+        ('mossa_computer_facile', computer('facile')),
+        ('mossa_computer_difficile', computer('difficile')),
+    ]
+
+def benchmark_partite(dimensione, numero_giocatori, tempo_massimo=1.0, partite_massime=20):
+    """
+    misura quante partite complete computer contro computer ('difficile') si giocano al secondo
+    """
+    config = {
+        'dimensione': dimensione,
+        'giocatori': [{'nome': f"G{i + 1}", 'simbolo': 'xo*#@%&+'[i], 'difficolta': 'difficile'} for i in range(numero_giocatori)],
+    }
+    partite = 0
+    mosse = 0
+    inizio = time.perf_counter()
+    while partite < partite_massime and time.perf_counter() - inizio < tempo_massimo:
+        mosse += simula_partita(config, partite)['mosse']
+        partite += 1
+    durata = time.perf_counter() - inizio
+    return {'partite_al_secondo': partite / durata, 'mosse_al_secondo': mosse / durata}
+
+def confronta_benchmark(precedente, attuale, tolleranza=0.2):
+    """
+    confronta due risultati di run_benchmark e restituisce le misure più lente di oltre 'tolleranza' (20% di default)
+    """
+    tempi = {}
+    for misura in precedente.get('misure', []):
+        tempi[(misura['funzione'], misura['dimensione'], misura['giocatori'], misura['riempimento'])] = misura['secondi_per_chiamata']
+    regressioni = []
+    for misura in attuale['misure']:
+        chiave = (misura['funzione'], misura['dimensione'], misura['giocatori'], misura['riempimento'])
+        prima = tempi.get(chiave)
+        if prima and misura['secondi_per_chiamata'] > prima * (1 + tolleranza):
+            regressioni.append(dict(misura, secondi_prima=prima, rapporto=misura['secondi_per_chiamata'] / prima))
+    return regressioni
+
+def run_benchmark(percorso='benchmark.json', dimensioni=(3, 10, 50, 200), giocatori=(2, 4),
+                  riempimenti=(0.1, 0.5, 0.9), confronto=None, tolleranza=0.2):
+    """
+    esegue il benchmark e salva i risultati in json nel file 'percorso':
+    -per ogni dimensione, numero di giocatori e frazione di riempimento misura tempo per chiamata e picco di memoria
+     di get_linee_board, get_segmenti_contigui, calcolo_punteggio_board, Game.aggiorna_punteggio e mossa_computer
+    -per ogni dimensione e numero di giocatori misura le partite complete al secondo
+    -salva anche colpi, mancati e voci di CACHE_LINEE accumulati durante il benchmark
+    -se 'confronto' è il file json di un benchmark precedente, stampa e restituisce le regressioni oltre la tolleranza
+    """
+    risultati = {
+        'python': sys.version.split()[0],
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'misure': [],
+        'partite': [],
+    }
+    CACHE_LINEE.svuota()
+    for dimensione in dimensioni:
+        for numero_giocatori in giocatori:
+            for riempimento in riempimenti:
+                game = partita_benchmark(dimensione, numero_giocatori, riempimento)
+                for nome, funzione in benchmark_funzioni(game):
+                    misura = {
+                        'funzione': nome,
+                        'dimensione': dimensione,
+                        'giocatori': numero_giocatori,
+                        'riempimento': riempimento,
+                        'secondi_per_chiamata': misura_tempo(funzione),
+                        'picco_memoria': misura_memoria(funzione),
+                    }
+                    risultati['misure'].append(misura)
+                    print(f"{nome:32} N={dimensione:<4} giocatori={numero_giocatori} riempimento={riempimento:<4} "
+                          f"{misura['secondi_per_chiamata'] * 1e6:12.1f} us  {misura['picco_memoria'] / 1024:10.1f} KiB")
+            partite = dict(benchmark_partite(dimensione, numero_giocatori), dimensione=dimensione, giocatori=numero_giocatori)
+            risultati['partite'].append(partite)
+            print(f"{'partite complete':32} N={dimensione:<4} giocatori={numero_giocatori} "
+                  f"{partite['partite_al_secondo']:.2f} partite/s, {partite['mosse_al_secondo']:.0f} mosse/s")
+    risultati['cache_linee'] = CACHE_LINEE.statistiche()
+    print(f"{'cache delle linee':32} {risultati['cache_linee']['percentuale_colpi']:.1%} colpi, {risultati['cache_linee']['voci']} voci")
+
+    with open(percorso, 'w', encoding='utf-8') as file:
+        json.dump(risultati, file, indent=2)
+    print(f"Risultati salvati in {percorso}")
+
+    if confronto:
+        with open(confronto, encoding='utf-8') as file:
+            regressioni = confronta_benchmark(json.load(file), risultati, tolleranza)
+        for r in regressioni:
+            print(f"REGRESSIONE {r['funzione']} N={r['dimensione']} giocatori={r['giocatori']} "
+                  f"riempimento={r['riempimento']}: {r['rapporto']:.2f}x più lento")
+        if not regressioni:
+            print("Nessuna regressione rispetto al benchmark precedente")
+        return regressioni
+    return []
+
+"""
+modalità server: molte partite contemporanee in un solo processo, con un protocollo a righe JSON su TCP
+    -il client invia un oggetto JSON per riga: {"comando": "nuova", ...}, {"comando": "mossa", "r": r, "c": c}, {"comando": "esci"}
+    -il server risponde con eventi JSON, uno per riga: 'partita', 'mossa', 'turno' (tocca al client), 'fine' ed 'errore'
+"""
+#dimensione massima del board e numero massimo di avversari computer di una partita del server
+DIMENSIONE_MASSIMA_SERVER = 100
+AVVERSARI_MASSIMI_SERVER = 7
+
+class ServerFiletto:
+    """
+    server asyncio che ospita molte partite contemporanee, una per connessione, tra il client e uno o più computer:
+    -le mosse del computer sono calcolate in un ThreadPoolExecutor di 'esecutori' thread, così non bloccano il loop degli eventi;
+     al massimo 'calcoli_massimi' mosse sono in calcolo o in attesa nell'esecutore, le altre partite aspettano il proprio turno
+    -contropressione per partita: i comandi letti dal socket passano da una coda di 'coda_comandi' elementi; quando è piena
+     la lettura si ferma e il client viene rallentato dal controllo di flusso TCP; ogni evento inviato attende writer.drain()
+    -oltre 'partite_massime' connessioni attive le nuove connessioni ricevono un errore e vengono chiuse
+    -il comando 'nuova' accetta 'dimensione', 'win_threshold', 'avversari' (lista di difficoltà) e 'tempo_ms' per i computer
+    """
+    def __init__(self, host='127.0.0.1', porta=8765, esecutori=4, calcoli_massimi=None, coda_comandi=8,
+                 partite_massime=10000, tempo_massimo_ms=TEMPO_MASSIMO_MOSSA_MS, backlog=4096):
+        self.host = host
+        self.porta = porta
+        self.esecutore = ThreadPoolExecutor(max_workers=esecutori)
+        importa_asyncio()
+        self.calcoli = asyncio.Semaphore(calcoli_massimi or 2 * esecutori)
+        self.coda_comandi = coda_comandi
+        self.partite_massime = partite_massime
+        self.tempo_massimo_ms = tempo_massimo_ms
+        self.backlog = backlog
+        self.server = None
+        self.connessioni = 0
+        self.partite_create = 0
+        self.partite_finite = 0
+
+    async def avvia(self):
+        """
+        apre il socket in ascolto e restituisce la porta effettiva (utile con porta=0)
+        """
+        self.server = await asyncio.start_server(self.gestisci_client, self.host, self.porta, backlog=self.backlog)
+        self.porta = self.server.sockets[0].getsockname()[1]
+        return self.porta
+
+    async def servi(self):
+        if self.server is None:
+            await self.avvia()
+        print(f"Server Filetto in ascolto su {self.host}:{self.porta}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def chiudi(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.esecutore.shutdown(wait=False)
+
+    async def invia(self, writer, evento):
+        writer.write((json.dumps(evento) + '\n').encode('utf-8'))
+        await writer.drain()
+
+    async def leggi_comandi(self, reader, coda):
+        """
+        legge le righe del client e le mette nella coda della partita; None nella coda segnala la chiusura della connessione
+        """
+        try:
+            while True:
+                riga = await reader.readline()
+                if not riga:
+                    break
+                await coda.put(riga)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            await coda.put(None)
+
+    async def gestisci_client(self, reader, writer):
+        """
+        gestisce una connessione: esegue i comandi del client uno alla volta, nell'ordine in cui arrivano
+        """
+        if self.connessioni >= self.partite_massime:
+            await self.invia(writer, {'evento': 'errore', 'messaggio': 'server pieno'})
+            writer.close()
+            return
+        self.connessioni += 1
+        coda = asyncio.Queue(maxsize=self.coda_comandi)
+        lettore = asyncio.create_task(self.leggi_comandi(reader, coda))
+        game = None
+        try:
+            while True:
+                riga = await coda.get()
+                if riga is None:
+                    break
+                try:
+                    comando = json.loads(riga)
+                    nome = comando['comando']
+                except (ValueError, KeyError, TypeError):
+                    await self.invia(writer, {'evento': 'errore', 'messaggio': 'comando non valido'})
+                    continue
+                if nome == 'esci':
+                    break
+                elif nome == 'nuova':
+                    try:
+                        game = self.crea_partita(comando)
+                    except (ValueError, TypeError) as errore:
+                        await self.invia(writer, {'evento': 'errore', 'messaggio': str(errore)})
+                        continue
+                    self.partite_create += 1
+                    await self.invia(writer, {'evento': 'partita', 'dimensione': game.dimensione, 'win_threshold': game.win_threshold,
+                                              'giocatori': [{'nome': g['nome'], 'simbolo': g['simbolo'], 'tipo': g['tipo']}
+                                                            for g in game.giocatori]})
+                    await self.gioca_computer(game, writer)
+                elif nome == 'mossa':
+                    await self.mossa_client(game, comando, writer)
+                else:
+                    await self.invia(writer, {'evento': 'errore', 'messaggio': f"comando sconosciuto: {nome}"})
+        except ConnectionError:
+            pass
+        finally:
+            lettore.cancel()
+            self.connessioni -= 1
+            writer.close()
+
+    def crea_partita(self, comando):
+        """
+        crea la partita del comando 'nuova': il client è il primo giocatore ('x'), seguito dai computer
+        """
+        dimensione = int(comando.get('dimensione', 10))
+        if not 1 <= dimensione <= DIMENSIONE_MASSIMA_SERVER:
+            raise ValueError(f"dimensione non valida (1-{DIMENSIONE_MASSIMA_SERVER})")
+        avversari = comando.get('avversari', ['difficile'])
+        if not 1 <= len(avversari) <= AVVERSARI_MASSIMI_SERVER or any(d not in DIFFICOLTA for d in avversari):
+            raise ValueError(f"avversari non validi: da 1 a {AVVERSARI_MASSIMI_SERVER} difficoltà tra {'/'.join(DIFFICOLTA)}")
+        tempo_ms = min(int(comando.get('tempo_ms', 500)), self.tempo_massimo_ms)
+        giocatori = [{'nome': 'client', 'simbolo': 'x', 'score': 0, 'tipo': 'umano'}]
+        for i, difficolta in enumerate(avversari):
+            giocatori.append({'nome': f"computer{i + 1}", 'simbolo': 'o*#@%&+'[i], 'score': 0, 'tipo': 'computer',
+                              'difficolta': difficolta, 'tempo_ms': tempo_ms})
+        return Game(dimensione, giocatori, win_threshold=int(comando.get('win_threshold', 50)))
+
+    async def calcola_mossa(self, game, giocatore):
+        """
+        calcola la mossa del computer nell'esecutore, attendendo un posto libero se ci sono già calcoli_massimi mosse in corso
+        """
+        async with self.calcoli:
+            return await asyncio.get_running_loop().run_in_executor(self.esecutore, mossa_computer, game, giocatore)
+
+    async def applica_mossa(self, game, r, c, writer):
+        """
+        gioca la mossa per il giocatore di turno e la comunica al client; restituisce True se la partita è finita
+        """
+        giocatore = game.giocatore_corrente()
+        game.mossa(r, c)
+        game.aggiorna_punteggio()
+        punteggi = {g['nome']: g['score'] for g in game.giocatori}
+        await self.invia(writer, {'evento': 'mossa', 'giocatore': giocatore['nome'], 'r': r, 'c': c, 'punteggi': punteggi})
+        vincitore = game.check_vincitore()
+        if vincitore or game.check_pareggio():
+            await self.termina_partita(game, vincitore, writer)
+            return True
+        game.prossimo_turno()
+        return False
+
+    async def termina_partita(self, game, vincitore, writer):
+        game.partita_finita = True
+        self.partite_finite += 1
+        await self.invia(writer, {'evento': 'fine', 'vincitore': vincitore['nome'] if vincitore else None,
+                                  'punteggi': {g['nome']: g['score'] for g in game.giocatori}})
+
+    async def gioca_computer(self, game, writer):
+        """
+        gioca le mosse dei computer finché non tocca al client, poi invia l'evento 'turno'
+        """
+        while not game.partita_finita and game.giocatore_corrente()['tipo'] == 'computer':
+            mossa = await self.calcola_mossa(game, game.giocatore_corrente())
+            if mossa is None:
+                await self.termina_partita(game, None, writer)
+                return
+            if await self.applica_mossa(game, mossa[0], mossa[1], writer):
+                return
+        if not game.partita_finita:
+            await self.invia(writer, {'evento': 'turno'})
+
+    async def mossa_client(self, game, comando, writer):
+        if game is None or game.partita_finita:
+            await self.invia(writer, {'evento': 'errore', 'messaggio': 'nessuna partita in corso'})
+            return
+        try:
+            r, c = int(comando['r']), int(comando['c'])
+        except (KeyError, TypeError, ValueError):
+            await self.invia(writer, {'evento': 'errore', 'messaggio': 'mossa non valida'})
+            return
+        if not (0 <= r < game.dimensione and 0 <= c < game.dimensione) or not game.mossa_valida(r, c):
+            await self.invia(writer, {'evento': 'errore', 'messaggio': 'mossa non valida o cella occupata'})
+            await self.invia(writer, {'evento': 'turno'})
+            return
+        if not await self.applica_mossa(game, r, c, writer):
+            await self.gioca_computer(game, writer)
+
+
+async def client_carico(host, porta, partite, comando, latenze, seme):
+    """
+    client del test di carico: gioca 'partite' partite con mosse casuali e misura la latenza di ogni mossa,
+    dall'invio della mossa all'evento 'turno' o 'fine' (cioè comprese le risposte dei computer)
+    -restituisce il numero di partite completate
+    """
+    generatore = random.Random(seme)
+    reader, writer = await asyncio.open_connection(host, porta)
+    completate = 0
+    try:
+        for _ in range(partite):
+            writer.write((json.dumps(comando) + '\n').encode('utf-8'))
+            await writer.drain()
+            libere = set()
+            inviata = None
+            while True:
+                riga = await reader.readline()
+                if not riga:
+                    return completate
+                evento = json.loads(riga)
+                tipo = evento['evento']
+                if tipo == 'partita':
+                    N = evento['dimensione']
+                    libere = {(r, c) for r in range(N) for c in range(N)}
+                elif tipo == 'mossa':
+                    libere.discard((evento['r'], evento['c']))
+                elif tipo in ('turno', 'fine'):
+                    if inviata is not None:
+                        latenze.append(time.perf_counter() - inviata)
+                        inviata = None
+                    if tipo == 'fine':
+                        completate += 1
+                        break
+                    r, c = generatore.choice(tuple(libere))
+                    writer.write((json.dumps({'comando': 'mossa', 'r': r, 'c': c}) + '\n').encode('utf-8'))
+                    await writer.drain()
+                    inviata = time.perf_counter()
+                elif tipo == 'errore' and inviata is None:
+                    raise RuntimeError(evento['messaggio'])
+        writer.write(b'{"comando": "esci"}\n')
+        await writer.drain()
+    finally:
+        writer.close()
+    return completate
+
+async def test_carico(client=1000, partite=1, dimensione=7, avversari=('facile',), win_threshold=50, esecutori=4, seme=0):
+    """
+    test di carico: avvia un ServerFiletto su una porta locale libera e vi collega 'client' client contemporanei,
+    ognuno dei quali gioca 'partite' partite; restituisce partite al secondo e latenze delle mosse (media, p50, p99 in ms)
+    """
+    if resource is not None:
+        #ogni client usa due descrittori (client e server): se serve si alza il limite dei file aperti del processo
+        morbido, rigido = resource.getrlimit(resource.RLIMIT_NOFILE)
+        necessari = 2 * client + 100
+        if morbido < necessari:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(necessari, rigido) if rigido != resource.RLIM_INFINITY else necessari, rigido))
+    server = ServerFiletto(porta=0, esecutori=esecutori, partite_massime=client + 1)
+    porta = await server.avvia()
+    comando = {'comando': 'nuova', 'dimensione': dimensione, 'avversari': list(avversari), 'win_threshold': win_threshold}
+    latenze = []
+    inizio = time.perf_counter()
+    try:
+        completate = await asyncio.gather(*(client_carico('127.0.0.1', porta, partite, comando, latenze, seme + i)
+                                            for i in range(client)))
+    finally:
+        await server.chiudi()
+    durata = time.perf_counter() - inizio
+    latenze.sort()
+    percentile = lambda p: latenze[min(len(latenze) - 1, int(p * len(latenze)))] * 1000 if latenze else 0
+    return {
+        'client': client,
+        'partite': sum(completate),
+        'durata': durata,
+        'partite_al_secondo': sum(completate) / durata if durata else 0,
+        'mosse': len(latenze),
+        'latenza_media_ms': statistics.fmean(latenze) * 1000 if latenze else 0,
+        'latenza_p50_ms': percentile(0.5),
+        'latenza_p99_ms': percentile(0.99),
+    }
+
+def run_server(host='127.0.0.1', porta=8765, esecutori=4):
+    importa_asyncio()
+    server = ServerFiletto(host, porta, esecutori=esecutori)
+    try:
+        asyncio.run(server.servi())
+    except KeyboardInterrupt:
+        print("Server fermato")
+
+def run_test_carico(**opzioni):
+    """
+    esegue test_carico e ne stampa il riepilogo
+    """
+    importa_asyncio()
+    esito = asyncio.run(test_carico(**opzioni))
+    print(f"{esito['client']} client, {esito['partite']} partite in {esito['durata']:.2f} s: "
+          f"{esito['partite_al_secondo']:.1f} partite/s")
+    print(f"{esito['mosse']} mosse: latenza media {esito['latenza_media_ms']:.2f} ms, "
+          f"p50 {esito['latenza_p50_ms']:.2f} ms, p99 {esito['latenza_p99_ms']:.2f} ms")
+    return esito
+
+
+
+"""
+funzionamento modalità grafica
+"""       
+def importa_tk():
+    """
+    importa tkinter la prima volta che serve, così le altre modalità partono senza caricarlo
+    -restituisce False se tkinter non è disponibile
+    """
+    global tk, messagebox
+    if tk is None:
+        try:
+            import tkinter
+            from tkinter import messagebox as finestre_messaggio
+        except ImportError:
+            return False
+        tk, messagebox = tkinter, finestre_messaggio
+    return True
+
+def run_gui(strumentazione=None, rendering=None):
+    """
+    modalità grafica
+    -gestisce l'interfaccia grafica di gioco, inclusa la creazione della finestra, della griglia di gioco e dei pulsanti
+    -consente ai giocatori di interagire con la griglia tramite clic sui pulsanti, che corrispondono alle mosse del gioco
+    -gestisce turni alternati tra giocatori umani e computer
+    -controlla la validità delle mosse e aggiorna la griglia e il punteggio
+    -aggiornamento della griglia e dei punteggi: la mossa viene applicata e, se un giocatore vince, 
+       viene stampato il nome del vincitore e il gioco termina
+    -se viene passata una Strumentazione, misura le fasi di ogni turno e stampa il riepilogo alla chiusura della finestra
+    -rendering 'bottoni' crea un bottone per cella, 'canvas' disegna il board su un canvas ridisegnando solo le celle cambiate;
+     se non indicato si usa il canvas per board più grandi di SOGLIA_CANVAS
+    -le mosse del computer sono calcolate in background (CalcoloMossa): la finestra continua a ridisegnarsi e mostra
+     un indicatore mentre il computer pensa
+    -i bottoni annulla e ripeti tornano al turno precedente o successivo di un giocatore umano
+
+    """
+    if not importa_tk():
+        print("Il modulo tkinter non è disponibile.")
+        print("Verrà avviata la versione CLI")
+        run_cli(strumentazione)
+        return
+        
+    print("Modalità GUI attivata")
+        
+    try: 
+        dimensione = int(input(" Inserisci dimensione della matrice NxN: "))
+    except ValueError:
+        print("Valore non valido per la dimensione.")
+        return
+        
+    try:
+        k = int(input(" Inserisci il numero di giocatori: "))
+    except ValueError:
+        print("Valore non valido per il numero di giocatori.")
+        return
+    
+    giocatori = []
+    for i in range(k):
+        tipo = input(f"Giocatore {i+1} è 'umano' o 'computer'? (u/c): ").strip().lower()
+        nome = input(f"Inserisci il nome del giocatore {i+1}: ").strip()
+        simbolo = input(f"Inserisci il simbolo per {nome} (es. x, 0, *): ").strip()
+        if tipo == 'c':
+            difficolta = input(f"Seleziona difficoltà per il computer ({'/'.join(DIFFICOLTA)}): ").strip().lower()
+            if difficolta not in DIFFICOLTA:
+                difficolta = 'facile'
+            giocatori.append({
+                    'nome': nome,
+                    'simbolo': simbolo,
+                    'score': 0,
+                    'tipo': 'computer',
+                    'difficolta': difficolta
+                })
+        else: 
+                giocatori.append({
+                    'nome': nome,
+                    'simbolo': simbolo,
+                    'score': 0,
+                    'tipo': 'umano'
+                })
+        
+    game = Game(dimensione, giocatori, strumentazione=strumentazione, libro=libro_da_ambiente(),
+                registratore=registratore_da_ambiente())
+    root = tk.Tk()
+    root.configure(bg="#f0f0f0")
+    
+    root.title("Gioco Filetto")
+    
+    if rendering is None:
+        rendering = 'canvas' if dimensione > SOGLIA_CANVAS else 'bottoni'
+    
+    def aggiorna_board(celle):
+        """
+        aggiorna la visualizzazione della griglia e dei punteggi nel gioco, ridisegna solo le celle cambiate con i valori correnti del game board
+        aggiornna il puntegggio e verifica se c'è un vincitore o se nessuno può più vincere, se si termina la partita
+        """
+        with misura(strumentazione, 'interfaccia'):
+            for i, j in celle:
+                vista.aggiorna_cella(i, j, game.board[i][j])
+        with misura(strumentazione, 'punteggio'):
+            game.aggiorna_punteggio()
+        with misura(strumentazione, 'interfaccia'):
+            testo_punteggio = "Punteggi:\n" + "\n".join([f"{g['nome']} ({g['simbolo']}): {g['score']}" for g in game.giocatori])
+            label_punteggio.config(text=testo_punteggio)
+        vincitore = game.check_vincitore()
+        if vincitore or game.check_pareggio():
+            
+            fine_partita(game, root, vista, vincitore)
+
+           
+    def click(i, j):
+        """
+        gestisce l'evento di clic su una cella della griglia, verifica se la mossa (i,j) è valida richiamando la funzione mossa_valida esegue la mossa
+        aggiorna il board (aggiorna_board) e passa al turno successivo, se il giocatore è computer avvia mossa computer con delay di 0,35 secondi
+        """
+        giocatore_corrente = game.giocatore_corrente()
+        if game.calcolo_in_corso is not None or giocatore_corrente['tipo'] == 'computer':
+            return
+        if strumentazione is not None:
+            strumentazione.inizia_turno(giocatore_corrente['nome'])
+        with misura(strumentazione, 'validazione'):
+            valida = game.mossa_valida(i, j)
+        if not valida:
+            messagebox.showwarning("Mossa non valida", "Mossa non valida o cella occupata, Riprova.")
+            return
+        game.mossa(i, j)
+        aggiorna_board([(i, j)])
+        game.prossimo_turno()
+            
+        if game.giocatore_corrente()['tipo'] == 'computer':
+                root.after(350, lambda: mossa_computer_gui(game, root, vista))
+    
+    def mossa_computer_gui(game, root, vista):
+        """
+        Funzione per eseguire una mossa del computer nell'interfaccia grafica
+        -avvia il calcolo della mossa in background e ne attende il risultato con attendi_mossa
+        -se il primo giocatore è un computer, esegue la prima mossa dopo che l'interfaccia è stata creata
+        """
+        if game.calcolo_in_corso is not None or game.partita_finita:
+            return
+        corrente = game.giocatore_corrente()
+        if strumentazione is not None:
+            strumentazione.inizia_turno(corrente['nome'])
+        calcolo = CalcoloMossa(game, corrente, corrente.get('tempo_massimo_ms', TEMPO_MASSIMO_MOSSA_MS))
+        game.calcolo_in_corso = calcolo
+        calcolo.avvia()
+        attendi_mossa(calcolo, 0)
+
+    def attendi_mossa(calcolo, passi):
+        """
+        controlla ogni 50 ms se la mossa del computer è pronta, aggiornando l'indicatore "sta pensando"
+        -se il calcolo è stato annullato (nuova partita o nuove impostazioni) non fa nulla
+        -se supera il tempo massimo annulla il calcolo e gioca una mossa casuale
+        -quando la mossa è pronta la esegue, aggiorna il board e passa il turno;
+         se il prossimo giocatore è ancora un computer, programma la sua mossa
+        """
+        if calcolo.annullato.is_set() or game.calcolo_in_corso is not calcolo:
+            return
+        pronta, mossa = calcolo.risultato()
+        if not pronta:
+            if not calcolo.scaduto():
+                label_pensiero.config(text=f"{calcolo.giocatore['nome']} sta pensando" + "." * (passi % 4))
+                root.after(50, lambda: attendi_mossa(calcolo, passi + 1))
+                return
+            calcolo.annulla()
+            mossa = game.celle_libere.scegli() if len(game.celle_libere) else None
+        game.calcolo_in_corso = None
+        label_pensiero.config(text="")
+        if strumentazione is not None:
+            strumentazione.registra_tempo('decisione', calcolo.durata or time.perf_counter() - calcolo.inizio)
+        if mossa is None:
+            messagebox.showinfo("Pareggio", "Tabellone pieno")
+            root.destroy()
+            return 
+        r, c = mossa
+        game.mossa(r, c)
+        aggiorna_board([(r, c)])
+        game.prossimo_turno()
+        
+        
+        if not game.partita_finita:
+            if game.giocatore_corrente()['tipo'] == 'computer':
+                root.after(350, lambda: mossa_computer_gui(game, root, vista))
+    
+    def annulla_gui(ripeti=False):
+        """
+        annulla (o ripete) le mosse fino al turno di un giocatore umano, fermando l'eventuale calcolo del computer
+        -se dopo il comando tocca a un computer, ne programma la mossa
+        """
+        if game.partita_finita:
+            return
+        annulla_calcolo(game)
+        label_pensiero.config(text="")
+        celle = game.ripeti_turno() if ripeti else game.annulla_turno()
+        aggiorna_board(celle)
+        if not game.partita_finita and game.giocatore_corrente()['tipo'] == 'computer':
+            root.after(350, lambda: mossa_computer_gui(game, root, vista))
+
+    if rendering == 'canvas':
+        vista = VistaCanvas(root, dimensione, game.board, click)
+    else:
+        vista = VistaBottoni(root, dimensione, game.board, click)
+    label_punteggio = tk.Label(root, text="Punteggio:", font=("Helvetica", 12))
+    label_punteggio.grid(row=vista.righe, column=0, columnspan=vista.colonne, pady=10)
+    label_pensiero = tk.Label(root, text="", font=("Helvetica", 10, "italic"))
+    label_pensiero.grid(row=vista.righe + 1, column=0, columnspan=vista.colonne)
+    comandi = tk.Frame(root)
+    comandi.grid(row=vista.righe + 2, column=0, columnspan=vista.colonne, pady=5)
+    tk.Button(comandi, text="Annulla", command=annulla_gui).pack(side=tk.LEFT, padx=5)
+    tk.Button(comandi, text="Ripeti", command=lambda: annulla_gui(ripeti=True)).pack(side=tk.LEFT, padx=5)
+    
+    
+    if game.giocatore_corrente()['tipo'] == 'computer':
+        root.after(500, lambda: mossa_computer_gui(game, root, vista))
+
+    root.mainloop()
+    if game.registratore is not None:
+        game.registratore.abbandona_partita(game)
+    if strumentazione is not None:
+        strumentazione.termina()
+              
+"""
+avvio non interattivo: partite computer contro computer configurate da riga di comando o da file json
+"""
+def leggi_mappa_punteggi(testo):
+    """
+    converte una mappa dei punteggi scritta come "3:2,4:10,5:25" nel dizionario {3: 2, 4: 10, 5: 25}
+    """
+    try:
+        return {int(lunghezza): int(punteggio) for lunghezza, punteggio in
+                (voce.split(':') for voce in testo.split(',') if voce.strip())}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"mappa dei punteggi non valida: {testo} (esempio: 3:2,4:10,5:25)")
+
+def parser_argomenti():
+    parser = argparse.ArgumentParser(
+        prog='filetto',
+        description="Gioco Filetto senza domande interattive: gioca partite tra computer. "
+                    "Senza argomenti il gioco chiede la modalità come sempre.")
+    parser.add_argument('--config', help="file json di configurazione (stesso formato della simulazione batch)")
+    parser.add_argument('--dimensione', '-n', type=int, help="lato del board NxN (default 10)")
+    parser.add_argument('--giocatori', '-g', type=int, help="numero di giocatori computer, da 1 a 8 (default 2)")
+    parser.add_argument('--difficolta', '-d', nargs='+', choices=DIFFICOLTA,
+                        help="difficoltà dei computer: un valore per tutti oppure uno per giocatore (default facile)")
+    parser.add_argument('--mappa', type=leggi_mappa_punteggi, help="mappa dei punteggi, ad esempio 3:2,4:10,5:25")
+    parser.add_argument('--soglia', type=int, help="punteggio per vincere, win_threshold (default 50)")
+    parser.add_argument('--partite', '--games', type=int, default=1, help="numero di partite da giocare (default 1)")
+    parser.add_argument('--silenzioso', '--quiet', action='store_true',
+                        help="non stampa il tabellone a ogni turno; le partite sono giocate in parallelo e si stampa solo il riepilogo")
+    parser.add_argument('--processi', type=int, help="processi per le partite in modalità silenziosa (default: tutti i core)")
+    parser.add_argument('--seme', type=int, help="seme della prima partita (default 0)")
+    parser.add_argument('--registra', metavar='CARTELLA', help="cartella in cui registrare le partite, come 'registrazione' nella configurazione")
+    parser.add_argument('--benchmark', nargs='?', const='benchmark.json', metavar='FILE',
+                        help="esegue il benchmark invece delle partite e salva i risultati in FILE (default benchmark.json); "
+                             "--dimensione e --giocatori limitano le configurazioni misurate")
+    parser.add_argument('--confronta', metavar='FILE', help="file json di un benchmark precedente da confrontare con --benchmark")
+    parser.add_argument('--tolleranza', type=float, default=0.2,
+                        help="rallentamento oltre il quale il confronto segnala una regressione (default 0.2, cioè 20%%)")
+    return parser
+
+def configurazione_argomenti(argomenti, parser):
+    """
+    costruisce la configurazione delle partite: il file --config, se indicato, con sopra le opzioni della riga di comando
+    -i giocatori sono ricreati se sono indicati --giocatori o --difficolta, oppure se il file non li contiene
+    """
+    config = {}
+    if argomenti.config:
+        try:
+            config = leggi_configurazione(argomenti.config)
+        except (OSError, ValueError) as errore:
+            parser.error(f"configurazione non valida: {errore}")
+    for chiave, valore in (('dimensione', argomenti.dimensione), ('mappa_punteggi', argomenti.mappa),
+                           ('win_threshold', argomenti.soglia), ('processi', argomenti.processi), ('seme', argomenti.seme),
+                           ('registrazione', argomenti.registra)):
+        if valore is not None:
+            config[chiave] = valore
+    config.setdefault('dimensione', 10)
+    if config['dimensione'] < 1:
+        parser.error("la dimensione deve essere almeno 1")
+    if argomenti.giocatori is not None or argomenti.difficolta or 'giocatori' not in config:
+        numero = argomenti.giocatori or (len(argomenti.difficolta) if argomenti.difficolta and len(argomenti.difficolta) > 1 else 2)
+        if not 1 <= numero <= 8:
+            parser.error("i giocatori devono essere da 1 a 8")
+        difficolta = argomenti.difficolta or ['facile']
+        if len(difficolta) == 1:
+            difficolta = difficolta * numero
+        if len(difficolta) != numero:
+            parser.error("serve una difficoltà per tutti i giocatori oppure una per giocatore")
+        config['giocatori'] = [{'nome': f"computer{i + 1}", 'simbolo': 'xo*#@%&+'[i], 'difficolta': difficolta[i]}
+                               for i in range(numero)]
+    if argomenti.partite < 1:
+        parser.error("il numero di partite deve essere almeno 1")
+    config['partite'] = argomenti.partite
+    return config
+
+def run_argomenti(argv):
+    """
+    modalità non interattiva: legge le opzioni da riga di comando (vedi parser_argomenti) e gioca le partite
+    -con --silenzioso le partite sono giocate come nella simulazione batch, senza stampare il tabellone
+    -con --benchmark esegue il benchmark senza domande e restituisce le regressioni rispetto a --confronta
+    -altrimenti sono giocate una alla volta stampando tabellone e mosse a ogni turno
+    -alla fine stampa e restituisce il riepilogo
+    """
+    parser = parser_argomenti()
+    argomenti = parser.parse_args(argv)
+    if argomenti.confronta and not argomenti.benchmark:
+        parser.error("--confronta richiede --benchmark")
+    if argomenti.benchmark:
+        opzioni = {}
+        if argomenti.dimensione is not None:
+            opzioni['dimensioni'] = (argomenti.dimensione,)
+        if argomenti.giocatori is not None:
+            opzioni['giocatori'] = (argomenti.giocatori,)
+        return run_benchmark(argomenti.benchmark, confronto=argomenti.confronta, tolleranza=argomenti.tolleranza, **opzioni)
+    config = configurazione_argomenti(argomenti, parser)
+    if argomenti.silenzioso:
+        return run_batch(config)
+    nomi = [g['nome'] for g in config['giocatori']]
+    seme = config.get('seme', 0)
+    esiti = []
+    inizio = time.perf_counter()
+    for i in range(config['partite']):
+        esito = simula_partita(config, seme + i, stampa=True)
+        print(f"Partita {i + 1}: " + (f"ha vinto {esito['vincitore']}" if esito['vincitore'] else "pareggio")
+              + f" in {esito['mosse']} mosse")
+        esiti.append(esito)
+    riepilogo = riepilogo_simulazioni(esiti, nomi, time.perf_counter() - inizio)
+    stampa_riepilogo(riepilogo)
+    return riepilogo
+
+
+def main(argv=None):
+    """
+    main - avvio del gioco e scelta della modalità
+    -la variabile d'ambiente FILETTO_STRUMENTAZIONE attiva la strumentazione della partita;
+     se vale il nome di un file, viene eseguito anche cProfile e le statistiche sono salvate in quel file
+    -la variabile d'ambiente FILETTO_LIBRO indica il file del libro delle aperture usato dal computer
+    -la variabile d'ambiente FILETTO_REGISTRO indica la cartella in cui registrare le partite della CLI e dell'interfaccia grafica
+    -se ci sono argomenti sulla riga di comando le partite partono senza domande (vedi run_argomenti, --help per le opzioni)
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        run_argomenti(argv)
+        return
+
+    print("----- Gioco Filetto -----")
+
+    strumentazione = None
+    impostazione = os.environ.get('FILETTO_STRUMENTAZIONE')
+    if impostazione:
+        percorso = None if impostazione == '1' else impostazione
+        strumentazione = Strumentazione(profilo=percorso is not None, percorso=percorso)
+
+    modalita = input("Scegli modalità di gioco: (1) GUI - Interfaccia grafica, (2) CLI - Riga di comando, (3) Simulazione batch, (4) Benchmark, (5) Genera libro aperture, (6) Server, (7) Test di carico del server: ").strip()
+    if modalita == '1':
+        run_gui(strumentazione)
+    elif modalita == '3':
+        percorso = input("Inserisci il file json di configurazione della simulazione: ").strip()
+        try:
+            config = leggi_configurazione(percorso)
+        except (OSError, ValueError) as errore:
+            print(f"Configurazione non valida: {errore}")
+            return
+        run_batch(config)
+    elif modalita == '4':
+        confronto = input("File json di un benchmark precedente da confrontare (invio per nessuno): ").strip()
+        run_benchmark(confronto=confronto or None)
+    elif modalita == '5':
+        percorso = input("Inserisci il file json di configurazione delle partite: ").strip()
+        try:
+            config = leggi_configurazione(percorso)
+        except (OSError, ValueError) as errore:
+            print(f"Configurazione non valida: {errore}")
+            return
+        genera_libro(config, input("Inserisci il file del libro da creare: ").strip(), config.get('partite', 200),
+                     processi=config.get('processi'), seme=config.get('seme', 0))
+    elif modalita == '6':
+        try:
+            porta = int(input("Porta del server (invio per 8765): ").strip() or 8765)
+        except ValueError:
+            print("Porta non valida.")
+            return
+        run_server(porta=porta)
+    elif modalita == '7':
+        try:
+            client = int(input("Numero di client contemporanei (invio per 1000): ").strip() or 1000)
+        except ValueError:
+            print("Numero di client non valido.")
+            return
+        run_test_carico(client=client)
+    else:
+        run_cli(strumentazione)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,794 @@
+"""
+test del gioco Filetto, eseguiti con unittest:
+    python -m unittest discover -v -s . -p "*test.py"
+"""
+import contextlib
+import gc
+import importlib.util
+import io
+import json
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import warnings
+
+PERCORSO_GIOCO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'TicTacToe Game.py')
+
+def carica_gioco():
+    """
+    il file del gioco ha uno spazio nel nome e non si può importare con import: lo carica da percorso
+    """
+    spec = importlib.util.spec_from_file_location('filetto', PERCORSO_GIOCO)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+filetto = carica_gioco()
+
+MAPPA = {3: 2, 4: 10, 5: 25}
+
+def punteggio_riferimento(board, N, simbolo, mappa=MAPPA, minima=3, massima=5, pesi=(1, 1, 1, 1), aperta=0, chiusa=0):
+    """
+    punteggio del simbolo ricalcolato da zero, senza cache né tabelle del gioco: per ogni direzione trova l'inizio di ogni
+    sequenza del simbolo, ne misura la lunghezza e conta le estremità che confinano con una cella vuota
+    """
+    def cella(r, c):
+        return board[r][c] if 0 <= r < N and 0 <= c < N else None
+
+    totale = 0
+    for peso, (dr, dc) in zip(pesi, ((0, 1), (1, 0), (1, 1), (1, -1))):
+        for r in range(N):
+            for c in range(N):
+                if cella(r, c) != simbolo or cella(r - dr, c - dc) == simbolo:
+                    continue
+                lunghezza = 0
+                while cella(r + lunghezza * dr, c + lunghezza * dc) == simbolo:
+                    lunghezza += 1
+                if lunghezza < minima:
+                    continue
+                aperti = (cella(r - dr, c - dc) == '.') + (cella(r + lunghezza * dr, c + lunghezza * dc) == '.')
+                totale += peso * (mappa.get(min(lunghezza, massima), 0) + aperta * aperti + chiusa * (2 - aperti))
+    return totale
+
+def configurazioni_motori():
+    """
+    combinazioni (backend, motore, incrementale) da confrontare con il ricalcolo completo
+    """
+    backend = ['liste'] + (['numpy'] if filetto.importa_numpy() else [])
+    return [(b, m, i) for b in backend for m in ('liste', 'bitboard') for i in (True, False)]
+
+
+class TestParitaPunteggi(unittest.TestCase):
+    """
+    punteggi incrementali, punteggi ricalcolati e guadagni delle mosse devono coincidere con il ricalcolo da zero
+    su board casuali, per ogni backend e motore, anche dopo mosse annullate e ripetute
+    """
+    def gioca_e_confronta(self, seme, regole=None, **opzioni):
+        caso = random.Random(seme)
+        N = caso.randint(4, 9)
+        simboli = 'xo*'[:caso.randint(2, 3)]
+        giocatori = [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in simboli]
+        game = filetto.Game(N, giocatori, MAPPA, win_threshold=10 ** 9, regole=regole, **opzioni)
+        parametri = {'aperta': game.regole.bonus_aperta, 'chiusa': game.regole.bonus_chiusa, 'pesi': game.regole.pesi}
+        for passo in range(N * N + 10):
+            if game.storico and caso.random() < 0.25:
+                for _ in range(caso.randint(1, 3)):
+                    game.annulla_mossa()
+                if game.mosse_annullate and caso.random() < 0.5:
+                    game.ripeti_mossa()
+            elif game.celle_libere:
+                r, c = caso.choice(sorted(game.celle_libere))
+                simbolo = game.giocatore_corrente().simbolo
+                board = [[game.board[i][j] for j in range(N)] for i in range(N)]
+                guadagno = filetto.guadagno_mossa(game.board, N, r, c, simbolo, game.regole)
+                prima = punteggio_riferimento(board, N, simbolo, **parametri)
+                board[r][c] = simbolo
+                self.assertEqual(guadagno, punteggio_riferimento(board, N, simbolo, **parametri) - prima,
+                                 f"guadagno di {(r, c)} per {simbolo} al passo {passo}")
+                game.mossa(r, c)
+                game.prossimo_turno()
+            game.aggiorna_punteggio()
+            board = [[game.board[i][j] for j in range(N)] for i in range(N)]
+            for giocatore in game.giocatori:
+                self.assertEqual(giocatore.score, punteggio_riferimento(board, N, giocatore.simbolo, **parametri),
+                                 f"punteggio di {giocatore.simbolo} al passo {passo}")
+
+    def test_backend_e_motori(self):
+        for backend, motore, incrementale in configurazioni_motori():
+            with self.subTest(backend=backend, motore=motore, incrementale=incrementale):
+                for seme in range(8):
+                    self.gioca_e_confronta(seme, backend=backend, motore=motore, incrementale=incrementale)
+
+    def test_regole_con_bonus_e_pesi(self):
+        regole = {'pesi': [1, 2, 1, 3], 'bonus_aperta': 2, 'bonus_chiusa': 1}
+        for incrementale in (True, False):
+            with self.subTest(incrementale=incrementale):
+                for seme in range(8):
+                    self.gioca_e_confronta(seme, regole, incrementale=incrementale)
+
+    def test_cambio_modalita_incrementale(self):
+        #il benchmark disattiva e riattiva la modalità incrementale a partita in corso
+        game = filetto.Game(5, [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo'], MAPPA, win_threshold=10 ** 9)
+        game.incrementale = False
+        for mossa in ((0, 0), (4, 0), (0, 1), (4, 1), (0, 2)):
+            game.mossa(*mossa)
+            game.prossimo_turno()
+        game.incrementale = True
+        game.aggiorna_punteggio()
+        self.assertEqual([g.score for g in game.giocatori], [2, 0])
+        game.mossa(4, 2)
+        game.aggiorna_punteggio()
+        self.assertEqual([g.score for g in game.giocatori], [2, 2])
+        while game.storico:
+            game.annulla_mossa()
+        game.aggiorna_punteggio()
+        self.assertEqual([g.score for g in game.giocatori], [0, 0])
+
+    def test_linee_scansionate(self):
+        #l'aggiornamento incrementale scandisce le quattro linee della cella, il ricalcolo completo tutte le 6N - 2 linee
+        strumentazione = filetto.Strumentazione()
+        game = filetto.Game(5, [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo'], MAPPA, strumentazione=strumentazione)
+        for mossa in ((0, 0), (4, 0), (0, 1)):
+            game.mossa(*mossa)
+            game.prossimo_turno()
+            game.aggiorna_punteggio()
+        game.annulla_mossa()
+        self.assertEqual(strumentazione.contatori['linee_scansionate'], 4 * 4)
+        game.incrementale = False
+        game.aggiorna_punteggio()
+        self.assertEqual(strumentazione.contatori['linee_scansionate'], 4 * 4 + 2 * 28)
+
+    def test_piazza_e_togli(self):
+        regole = {'bonus_aperta': 2, 'bonus_chiusa': 1}
+        caso = random.Random(5)
+        game = filetto.Game(7, [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo*'], MAPPA,
+                            win_threshold=10 ** 9, regole=regole)
+        for _ in range(20):
+            game.mossa(*caso.choice(sorted(game.celle_libere)))
+            game.prossimo_turno()
+        linee = {simbolo: dict(punteggi) for simbolo, punteggi in game.punteggi_linee.items()}
+        totali = dict(game.punteggi_simboli)
+        percorso = caso.sample(sorted(game.celle_libere), 6)
+        for k, (r, c) in enumerate(percorso):
+            game.piazza(r, c, 'xo*'[k % 3])
+            for simbolo in 'xo*':
+                self.assertEqual(game.punteggi_simboli[simbolo],
+                                 punteggio_riferimento(game.board, 7, simbolo, aperta=2, chiusa=1))
+        for r, c in reversed(percorso):
+            game.togli(r, c)
+        self.assertEqual(game.punteggi_simboli, totali)
+        self.assertEqual({s: {k: v for k, v in p.items() if v} for s, p in game.punteggi_linee.items()},
+                         {s: {k: v for k, v in p.items() if v} for s, p in linee.items()})
+
+    def test_matrici_guadagni(self):
+        for seme in range(6):
+            caso = random.Random(seme)
+            N = caso.randint(3, 12)
+            board = [[caso.choice('..xo*') for _ in range(N)] for _ in range(N)]
+            regole = filetto.RegolePunteggio(MAPPA, N, bonus_aperta=caso.randint(0, 2), bonus_chiusa=caso.randint(0, 1))
+            matrici = filetto.matrici_guadagni(board, N, ['x', 'o'], regole)
+            for simbolo in ('x', 'o'):
+                for r in range(N):
+                    for c in range(N):
+                        atteso = filetto.guadagno_mossa(board, N, r, c, simbolo, regole) if board[r][c] == '.' else 0
+                        self.assertEqual(int(matrici[simbolo][r][c]), atteso)
+
+
+@unittest.skipIf(not filetto.importa_numpy(), "serve numpy")
+class TestBackendNumpy(unittest.TestCase):
+    def partite(self, seme, mosse=40):
+        caso = random.Random(seme)
+        giocatori = [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo*']
+        liste = filetto.Game(9, giocatori, MAPPA, win_threshold=60)
+        numpy = filetto.Game(9, giocatori, MAPPA, win_threshold=60, backend='numpy')
+        for _ in range(mosse):
+            mossa = caso.choice(sorted(liste.celle_libere))
+            for game in (liste, numpy):
+                game.mossa(*mossa)
+                game.prossimo_turno()
+        return liste, numpy
+
+    def test_linee_sono_viste(self):
+        liste, numpy = self.partite(1)
+        celle = numpy.board.celle
+        self.assertTrue(filetto.np.shares_memory(numpy.celle, celle))
+        simboli = numpy.board.simboli
+        for linea_liste, linea_numpy in zip(liste.get_tutte_linee(), numpy.get_tutte_linee()):
+            self.assertTrue(filetto.np.shares_memory(linea_numpy, celle))
+            self.assertEqual(linea_liste, [simboli[codice] for codice in linea_numpy.tolist()])
+
+    def test_limiti_come_liste(self):
+        for seme in range(4):
+            liste, numpy = self.partite(seme)
+            for game in (liste, numpy):
+                game.aggiorna_limiti()
+            self.assertEqual(numpy.limiti, liste.limiti)
+            self.assertEqual(numpy.limiti_linee, liste.limiti_linee)
+            for _ in range(10):
+                liste.annulla_mossa()
+                numpy.annulla_mossa()
+            for game in (liste, numpy):
+                game.aggiorna_limiti()
+            self.assertEqual(numpy.limiti_linee, liste.limiti_linee)
+            numpy.inizializza_limiti()
+            self.assertEqual(numpy.limiti_linee, liste.limiti_linee)
+            self.assertEqual(numpy.check_pareggio(), liste.check_pareggio())
+
+
+class TestLimiti(unittest.TestCase):
+    def test_limiti_pigri_come_ricalcolo(self):
+        #mosse e annullamenti segnano soltanto le linee: il pareggio e i limiti aggiornati coincidono col ricalcolo completo
+        giocatori = [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo*']
+        backend = ['liste'] + (['numpy'] if filetto.importa_numpy() else [])
+        for seme in range(6):
+            caso = random.Random(seme)
+            game = filetto.Game(7, giocatori, MAPPA, win_threshold=caso.choice([10, 30, 60]), backend=backend[seme % len(backend)])
+            for _ in range(80):
+                if game.storico and caso.random() < 0.3:
+                    game.annulla_mossa()
+                elif game.celle_libere:
+                    game.mossa(*caso.choice(sorted(game.celle_libere)))
+                    game.prossimo_turno()
+                copia = game.copia()
+                copia.inizializza_limiti()
+                self.assertEqual(game.check_pareggio(), all(limite < game.win_threshold for limite in copia.limiti.values()))
+                game.aggiorna_limiti()
+                self.assertEqual(game.limiti, copia.limiti)
+                self.assertEqual(game.limiti_linee, copia.limiti_linee)
+
+    def test_board_grande_con_limiti(self):
+        #200x200 con sei giocatori e i limiti attivi come da impostazione predefinita: creazione, mosse e controllo del
+        #pareggio a ogni turno restano nell'ordine dei decimi di secondo
+        random.seed(3)
+        giocatori = [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo*#@%']
+        filetto.indice_linee(200)
+        inizio = time.perf_counter()
+        game = filetto.Game(200, giocatori, MAPPA)
+        for _ in range(2000):
+            game.mossa(*game.celle_libere.scegli())
+            game.prossimo_turno()
+            self.assertFalse(game.check_pareggio())
+        for _ in range(500):
+            game.annulla_mossa()
+            self.assertFalse(game.check_pareggio())
+        self.assertLess(time.perf_counter() - inizio, 1.5)
+
+
+class TestCacheLinee(unittest.TestCase):
+    def board_casuale(self, seme, N, simboli):
+        caso = random.Random(seme)
+        return [[caso.choice(simboli + ['.'] * len(simboli)) for _ in range(N)] for _ in range(N)]
+
+    def test_punteggi_come_riferimento(self):
+        for opzioni in ({}, {'bonus_aperta': 1, 'bonus_chiusa': 3}):
+            for simboli in (['x', 'o', '*'], ['xx', 'o']):
+                for limite in (0, 20000):
+                    cache = filetto.CacheLinee(limite)
+                    for seme in range(5):
+                        board = self.board_casuale(seme, 8, simboli)
+                        regole = filetto.RegolePunteggio(MAPPA, 8, **opzioni)
+                        celle = [cella for riga in board for cella in riga]
+                        for simbolo in simboli:
+                            punteggio = cache.punteggio_celle(celle, simbolo, regole, filetto.indice_linee(8))
+                            self.assertEqual(punteggio, punteggio_riferimento(board, 8, simbolo, aperta=opzioni.get('bonus_aperta', 0),
+                                                                              chiusa=opzioni.get('bonus_chiusa', 0)))
+
+    def test_voci_condivise_tra_simboli(self):
+        cache = filetto.CacheLinee()
+        regole = filetto.RegolePunteggio(MAPPA, 8)
+        board = self.board_casuale(1, 8, ['x', 'o', '*'])
+        scambio = {'x': 'o', 'o': '*', '*': 'x', '.': '.'}
+        celle = [cella for riga in board for cella in riga]
+        punteggio = cache.punteggio_celle(celle, 'x', regole, filetto.indice_linee(8))
+        voci = len(cache.voci)
+        mancati = cache.mancati
+        self.assertEqual(cache.punteggio_celle([scambio[cella] for cella in celle], 'o', regole, filetto.indice_linee(8)), punteggio)
+        self.assertEqual(len(cache.voci), voci)
+        self.assertEqual(cache.mancati, mancati)
+
+
+class TestIndiceLinee(unittest.TestCase):
+    def test_costruito_una_volta_tra_thread(self):
+        filetto.INDICI_LINEE.pop(61, None)
+        partenza = threading.Barrier(8)
+        indici = []
+
+        def chiedi():
+            partenza.wait()
+            indici.append(filetto.indice_linee(61))
+
+        thread = [threading.Thread(target=chiedi) for _ in range(8)]
+        for t in thread:
+            t.start()
+        for t in thread:
+            t.join()
+        self.assertEqual(len({id(indice) for indice in indici}), 1)
+        self.assertIs(indici[0], filetto.indice_linee(61))
+
+    def test_pickle_senza_indice(self):
+        #la partita ripresa da pickle condivide indice e regole con gli altri giochi e continua come l'originale
+        giocatori = [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo*']
+        backend = ['liste'] + (['numpy'] if filetto.importa_numpy() else [])
+        with mock.patch.dict(sys.modules, filetto=filetto):
+            for nome in backend:
+                caso = random.Random(4)
+                game = filetto.Game(30, giocatori, MAPPA, regole={'pesi': [1, 2, 1, 1]}, backend=nome)
+                for _ in range(60):
+                    game.mossa(*caso.choice(sorted(game.celle_libere)))
+                    game.prossimo_turno()
+                dati = pickle.dumps(game)
+                self.assertLess(len(dati), len(pickle.dumps(game.indice)))
+                ripresa = pickle.loads(dati)
+                self.assertIs(ripresa.indice, game.indice)
+                self.assertIs(ripresa.regole, game.regole)
+                for _ in range(30):
+                    mossa = caso.choice(sorted(game.celle_libere))
+                    for partita in (game, ripresa):
+                        partita.mossa(*mossa)
+                        partita.prossimo_turno()
+                        partita.aggiorna_punteggio()
+                        partita.aggiorna_limiti()
+                    self.assertEqual(ripresa.punteggi_simboli, game.punteggi_simboli)
+                    self.assertEqual(ripresa.limiti, game.limiti)
+                    self.assertEqual(ripresa.hash_simmetrie, game.hash_simmetrie)
+
+
+class TestRegoleConBonus(unittest.TestCase):
+    """
+    con i bonus per le estremità una mossa cambia anche i punteggi degli avversari: registri, replay e rollout devono contarlo
+    """
+    REGOLE = {'pesi': [1, 1, 2, 1], 'bonus_aperta': 2, 'bonus_chiusa': 1}
+
+    def partita(self, seme, mosse=30):
+        caso = random.Random(seme)
+        game = filetto.Game(7, [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo'], MAPPA,
+                            win_threshold=10 ** 9, regole=self.REGOLE)
+        for _ in range(mosse):
+            game.mossa(*caso.choice(sorted(game.celle_libere)))
+            game.prossimo_turno()
+        game.aggiorna_punteggio()
+        return game
+
+    def test_regole_condivise(self):
+        #giochi con mappa, opzioni e dimensione uguali (anche con i pesi in forma diversa) usano le stesse regole compilate
+        giocatori = [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo']
+        game = filetto.Game(7, giocatori, dict(MAPPA), regole=self.REGOLE)
+        altro = filetto.Game(7, giocatori, dict(MAPPA), regole=dict(self.REGOLE, pesi=(1, 1, 2, 1)))
+        self.assertIs(altro.regole, game.regole)
+        self.assertIsNot(filetto.Game(7, giocatori, MAPPA).regole, game.regole)
+        self.assertIsNot(filetto.Game(8, giocatori, MAPPA, regole=self.REGOLE).regole, game.regole)
+
+    def test_registro_conserva_le_regole(self):
+        game = self.partita(1)
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, 'partita.flt')
+            filetto.salva_partita(game, percorso)
+            caricata = filetto.carica_partita(percorso)
+        self.assertEqual(caricata.regole.opzioni(), game.regole.opzioni())
+        self.assertEqual([g.score for g in caricata.giocatori], [g.score for g in game.giocatori])
+
+    def test_registro_senza_regole(self):
+        game = filetto.Game(5, [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo'], MAPPA)
+        for mossa in ((0, 0), (1, 0), (0, 1), (1, 1), (0, 2)):
+            game.mossa(*mossa)
+            game.prossimo_turno()
+        intestazione = filetto.codifica_intestazione(game)
+        regole = filetto.codifica_stringa(json.dumps(game.regole.opzioni(), separators=(',', ':')))
+        self.assertTrue(intestazione.endswith(regole))
+        vecchia = filetto.MAGIC_REGISTRO_V1 + intestazione[len(filetto.MAGIC_REGISTRO):-len(regole)]
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, 'partita.flt')
+            with open(percorso, 'wb') as file:
+                file.write(vecchia + b''.join(filetto.codifica_mossa(r, c) for r, c, _ in game.storico))
+            caricata = filetto.carica_partita(percorso)
+        self.assertEqual([g.score for g in caricata.giocatori], [2, 0])
+
+    def test_replay_e_rollout(self):
+        game = self.partita(2)
+        record = {'dimensione': 7, 'giocatori': [{'simbolo': 'x'}, {'simbolo': 'o'}], 'mappa_punteggi': MAPPA,
+                  'regole': self.REGOLE, 'mosse': [[r, c] for r, c, _ in game.storico]}
+        for _, _, _, _, _, board, punteggi in filetto.posizioni_partita(record):
+            for simbolo in 'xo':
+                self.assertEqual(punteggi[simbolo], punteggio_riferimento(board, 7, simbolo, pesi=(1, 1, 2, 1), aperta=2, chiusa=1))
+        board = [list(riga) for riga in game.board]
+        punteggi = dict(game.punteggi_simboli)
+        for k, (r, c) in enumerate(sorted(game.celle_libere)[:10]):
+            filetto.gioca_su_board(board, 7, r, c, 'xo'[k % 2], game.regole, punteggi)
+            for simbolo in 'xo':
+                self.assertEqual(punteggi[simbolo], punteggio_riferimento(board, 7, simbolo, pesi=(1, 1, 2, 1), aperta=2, chiusa=1))
+
+
+class TestLogPartita(unittest.TestCase):
+    def salva(self, cartella, mosse=70, coda=b''):
+        caso = random.Random(5)
+        game = filetto.Game(9, [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo*'], MAPPA, win_threshold=10 ** 9)
+        for _ in range(mosse):
+            game.mossa(*caso.choice(sorted(game.celle_libere)))
+            game.prossimo_turno()
+        percorso = os.path.join(cartella, 'partita.flt')
+        filetto.salva_partita(game, percorso)
+        with open(percorso, 'ab') as file:
+            file.write(coda)
+        return percorso, game
+
+    def test_posizione_dai_checkpoint(self):
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso, game = self.salva(cartella)
+            with filetto.LogPartita(percorso, intervallo=8) as registro, filetto.LogPartita(percorso, intervallo=0) as riferimento:
+                for k in (70, 5, 33, 16, 0, 41, None, 64):
+                    attesa = riferimento.posizione(k)
+                    ottenuta = registro.posizione(k)
+                    self.assertEqual(ottenuta.storico, attesa.storico)
+                    self.assertEqual(ottenuta.board, attesa.board)
+                    self.assertEqual(ottenuta.turno, attesa.turno)
+                    self.assertEqual([g.score for g in ottenuta.giocatori], [g.score for g in attesa.giocatori])
+                self.assertEqual(sorted(registro.checkpoint[()]), list(range(8, 71, 8)))
+                self.assertEqual(list(registro.mosse(3, inizio=40)), [(r, c) for r, c, _ in game.storico[40:43]])
+                self.assertEqual(riferimento.checkpoint, {})
+
+    def test_registratore_senza_checkpoint(self):
+        #un registratore deve ricevere tutte le mosse: posizione rigioca dall'inizio e non salva copie
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso, game = self.salva(cartella, mosse=20)
+            registratore = filetto.RegistratorePartite(os.path.join(cartella, 'partite.jsonl'))
+            with filetto.LogPartita(percorso, intervallo=4) as registro:
+                registro.posizione(16)
+                ripresa = registro.posizione(20, registratore=registratore)
+                self.assertIs(ripresa.registratore, registratore)
+                self.assertEqual(registratore.record(ripresa)['mosse'], [[r, c] for r, c, _ in game.storico])
+                self.assertEqual(list(registro.checkpoint), [()])
+            registratore.chiudi()
+
+    def test_file_non_valido_chiuso(self):
+        with tempfile.TemporaryDirectory() as cartella:
+            for contenuto in (b'', b'XXXX', filetto.MAGIC_REGISTRO + b'\x89'):
+                percorso = os.path.join(cartella, 'partita.flt')
+                with open(percorso, 'wb') as file:
+                    file.write(contenuto)
+                with warnings.catch_warnings(record=True) as avvisi:
+                    warnings.simplefilter('always')
+                    with self.assertRaises(ValueError):
+                        filetto.LogPartita(percorso)
+                    gc.collect()
+                self.assertEqual([a for a in avvisi if issubclass(a.category, ResourceWarning)], [])
+
+    def test_mossa_troncata(self):
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso, game = self.salva(cartella, mosse=20, coda=b'\x85')
+            with filetto.LogPartita(percorso) as registro:
+                self.assertEqual(list(registro.mosse()), [(r, c) for r, c, _ in game.storico])
+                self.assertEqual(registro.posizione().storico, game.storico)
+
+    def test_intestazione_troncata(self):
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, 'partita.flt')
+            with open(percorso, 'wb') as file:
+                file.write(filetto.MAGIC_REGISTRO + b'\x89')
+            with self.assertRaises(ValueError):
+                filetto.LogPartita(percorso)
+
+
+class TestRegistratorePartite(unittest.TestCase):
+    def test_partite_per_id(self):
+        giocatori = [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo']
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, 'partite.jsonl')
+            registratore = filetto.RegistratorePartite(percorso)
+            prima = filetto.Game(5, giocatori, MAPPA, registratore=registratore)
+            seconda = filetto.Game(5, giocatori, MAPPA, registratore=registratore)
+            for game, mosse in ((prima, ((0, 0), (1, 1))), (seconda, ((2, 2),)), (prima, ((0, 1),))):
+                for mossa in mosse:
+                    game.mossa(*mossa)
+                    game.prossimo_turno()
+            registratore.chiudi_partita(seconda)
+            with open(percorso, encoding='utf-8') as file:
+                self.assertEqual([json.loads(riga)['mosse'] for riga in file], [[[2, 2]]])
+            id_prima = prima.id_partita
+            prima.reset()
+            self.assertNotEqual(prima.id_partita, id_prima)
+            prima.mossa(4, 4)
+            registratore.chiudi()
+            record = list(filetto.leggi_partite(percorso))
+        self.assertEqual([r['id'] for r in record], [seconda.id_partita, id_prima, prima.id_partita])
+        self.assertEqual([r['mosse'] for r in record], [[[2, 2]], [[0, 0], [1, 1], [0, 1]], [[4, 4]]])
+        self.assertEqual([r['esito'].get('interrotta', False) for r in record], [False, True, True])
+
+    def test_opzione_registra(self):
+        with tempfile.TemporaryDirectory() as cartella, contextlib.redirect_stdout(io.StringIO()):
+            filetto.run_argomenti(['-n', '5', '--games', '2', '--quiet', '--processi', '1', '--registra', cartella])
+            record = list(filetto.leggi_partite(cartella))
+            filetto.REGISTRATORI.pop(cartella).chiudi()
+        self.assertEqual(len(record), 2)
+        self.assertEqual(len({r['id'] for r in record}), 2)
+
+    def test_registro_nei_processi_del_pool(self):
+        #i processi del pool escono con os._exit, senza atexit: ogni partita deve essere già su disco quando finisce
+        config = {'dimensione': 5, 'giocatori': [{'nome': 'a', 'simbolo': 'x'}, {'nome': 'b', 'simbolo': 'o'}]}
+        with tempfile.TemporaryDirectory() as cartella, mock.patch.dict(sys.modules, filetto=filetto):
+            esiti = list(filetto.esegui_simulazioni(dict(config, registrazione=cartella), 6, processi=2, blocco=1))
+            record = list(filetto.leggi_partite(cartella))
+        self.assertEqual(len(esiti), 6)
+        self.assertEqual(sorted(len(r['mosse']) for r in record), sorted(esito['mosse'] for esito in esiti))
+
+    def test_partita_interrotta_da_errore(self):
+        config = {'dimensione': 5, 'giocatori': [{'nome': 'a', 'simbolo': 'x'}, {'nome': 'b', 'simbolo': 'o'}]}
+        originale = filetto.mossa_computer
+        mosse = []
+
+        def mossa(game, giocatore):
+            if len(mosse) == 3:
+                raise RuntimeError("calcolo fallito")
+            mosse.append(originale(game, giocatore))
+            return mosse[-1]
+
+        with tempfile.TemporaryDirectory() as cartella:
+            with mock.patch.object(filetto, 'mossa_computer', mossa), self.assertRaises(RuntimeError):
+                filetto.simula_partita(dict(config, registrazione=cartella), 0)
+            record = list(filetto.leggi_partite(cartella))
+            filetto.REGISTRATORI.pop(cartella).chiudi()
+        self.assertEqual([r['mosse'] for r in record], [[list(m) for m in mosse]])
+        self.assertTrue(record[0]['esito']['interrotta'])
+
+
+class TestLibroAperture(unittest.TestCase):
+    def partita(self, mosse, t=0, N=8, regole=None):
+        game = filetto.Game(N, [{'nome': s, 'simbolo': s, 'tipo': 'computer'} for s in 'xo'], MAPPA, regole=regole)
+        for r, c in mosse:
+            game.mossa(*filetto.trasforma_cella(r, c, N, t))
+            game.prossimo_turno()
+        return game
+
+    def test_chiave_uguale_per_simmetria(self):
+        mosse = [(1, 2), (3, 5), (6, 0)]
+        chiave = filetto.chiave_posizione(self.partita(mosse))[0]
+        for t in range(8):
+            self.assertEqual(filetto.chiave_posizione(self.partita(mosse, t))[0], chiave)
+        game = self.partita(mosse)
+        game.mossa(4, 4)
+        game.annulla_mossa()
+        self.assertEqual(filetto.chiave_posizione(game)[0], chiave)
+        self.assertNotEqual(filetto.chiave_posizione(self.partita(mosse[:2]))[0], chiave)
+        self.assertNotEqual(filetto.chiave_posizione(self.partita([(3, 5), (1, 2), (6, 0)]))[0], chiave)
+
+    def test_chiave_con_pesi_diversi(self):
+        #con il verticale che vale doppio solo le simmetrie che non scambiano righe e colonne danno posizioni equivalenti
+        regole = {'pesi': [1, 2, 1, 1]}
+        mosse = [(1, 2), (3, 5), (6, 0)]
+        game = self.partita(mosse, regole=regole)
+        self.assertEqual(len(game.regole.simmetrie), 4)
+        chiave = filetto.chiave_posizione(game)[0]
+        for t in range(8):
+            trasformata = filetto.chiave_posizione(self.partita(mosse, t, regole=regole))[0]
+            if t in game.regole.simmetrie:
+                self.assertEqual(trasformata, chiave)
+            else:
+                self.assertNotEqual(trasformata, chiave)
+
+    def test_mossa_del_libro_trasformata(self):
+        mosse = [(1, 2), (3, 5), (6, 0)]
+        game = self.partita(mosse)
+        chiave, simmetria = filetto.chiave_posizione(game)
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, 'libro.bin')
+            with open(percorso, 'wb') as file:
+                file.write(filetto.MAGIC_LIBRO + filetto.struct.pack('<I', 1))
+                file.write(filetto.FORMATO_VOCE_LIBRO.pack(chiave, *filetto.trasforma_cella(2, 6, 8, simmetria)))
+            libro = filetto.LibroAperture(percorso)
+            try:
+                for t in range(8):
+                    self.assertEqual(libro.cerca(self.partita(mosse, t)), filetto.trasforma_cella(2, 6, 8, t))
+            finally:
+                libro.chiudi()
+
+    def test_file_non_valido_chiuso(self):
+        #un file lasciato aperto produce un ResourceWarning quando viene raccolto dal garbage collector
+        with tempfile.TemporaryDirectory() as cartella:
+            for contenuto in (b'', b'XXXX\x00\x00\x00\x00'):
+                percorso = os.path.join(cartella, 'libro.bin')
+                with open(percorso, 'wb') as file:
+                    file.write(contenuto)
+                with warnings.catch_warnings(record=True) as avvisi:
+                    warnings.simplefilter('always')
+                    with self.assertRaises(ValueError):
+                        filetto.LibroAperture(percorso)
+                    gc.collect()
+                self.assertEqual([a for a in avvisi if issubclass(a.category, ResourceWarning)], [])
+
+
+class TestAlphaBeta(unittest.TestCase):
+    def test_tempo_comprende_preparazione(self):
+        #board grande con una frontiera di decine di migliaia di celle: preparazione e ordinamento alla radice sono lunghi
+        random.seed(1)
+        game = filetto.Game(200, [{'nome': 'a', 'simbolo': 'x', 'tipo': 'computer', 'difficolta': 'esperto', 'tempo_ms': 50},
+                                  {'nome': 'b', 'simbolo': 'o', 'tipo': 'computer'}], MAPPA)
+        for _ in range(2000):
+            game.mossa(*game.celle_libere.scegli())
+            game.prossimo_turno()
+        inizio = time.perf_counter()
+        mossa = filetto.mossa_computer(game, game.giocatore_corrente())
+        self.assertLess(time.perf_counter() - inizio, 0.15)
+        self.assertTrue(game.mossa_valida(*mossa))
+
+    def test_hash_della_radice(self):
+        #la ricerca parte dall'hash tenuto aggiornato dal gioco e lo ritrova uguale dopo aver annullato le sue mosse
+        game = filetto.Game(9, [{'nome': 'a', 'simbolo': 'x', 'tipo': 'computer', 'difficolta': 'esperto', 'tempo_ms': 30},
+                                {'nome': 'b', 'simbolo': 'o', 'tipo': 'computer'}], MAPPA)
+        for mossa in ((4, 4), (4, 5), (3, 3)):
+            game.mossa(*mossa)
+            game.prossimo_turno()
+        hash_iniziale = list(game.hash_simmetrie)
+        punteggi = dict(game.punteggi_simboli)
+        ricerca = filetto.RicercaAlphaBeta(game)
+        ricerca.cerca(game, game.giocatore_corrente())
+        self.assertEqual(ricerca.hash, game.hash_simmetrie[0] ^ ricerca.zobrist_radice[game.turno])
+        self.assertEqual(game.hash_simmetrie, hash_iniziale)
+        self.assertEqual(game.punteggi_simboli, punteggi)
+
+
+class TestMCTS(unittest.TestCase):
+    def gioca(self, seme, mcts, avversario='facile'):
+        """
+        partita 9x9 del computer mcts contro un altro computer: a ogni turno la mossa deve essere una cella libera
+        """
+        random.seed(seme)
+        giocatori = [dict(mcts, nome='mcts', simbolo='x', tipo='computer', difficolta='mcts'),
+                     {'nome': avversario, 'simbolo': 'o', 'tipo': 'computer', 'difficolta': avversario}]
+        game = filetto.Game(9, giocatori, MAPPA)
+        while game.celle_libere:
+            giocatore = game.giocatore_corrente()
+            mossa = filetto.mossa_computer(game, giocatore)
+            self.assertIsNotNone(mossa, f"nessuna mossa di {giocatore.nome} alla mossa {len(game.storico)}")
+            self.assertTrue(game.mossa_valida(*mossa))
+            game.mossa(*mossa)
+            game.aggiorna_punteggio()
+            if game.check_vincitore() or game.check_pareggio():
+                break
+            game.prossimo_turno()
+        return game
+
+    def test_radice_riusata_mai_espansa(self):
+        #l'avversario 'difficile' risponde con la mossa di maggior guadagno, che l'albero ha già creato come nodo
+        #ma spesso non ha mai espanso: la ricerca successiva riparte da quel nodo
+        for seme in range(3):
+            self.gioca(seme, {'tempo_ms': 10}, 'difficile')
+
+    def test_radice_riusata_senza_candidate(self):
+        #il nodo raggiunto lungo le mosse giocate ha finito le candidate, ma il board ha ancora celle libere
+        game = filetto.Game(9, [{'nome': 'a', 'simbolo': 'x', 'tipo': 'computer'},
+                                {'nome': 'b', 'simbolo': 'o', 'tipo': 'computer'}], MAPPA)
+        for mossa in ((4, 4), (4, 5)):
+            game.mossa(*mossa)
+            game.prossimo_turno()
+        ricerca = filetto.RicercaMCTS()
+        ricerca.radice = filetto.NodoMCTS(None, None, game.turno, 2)
+        ricerca.radice.candidate = set()
+        ricerca.storico = list(game.storico)
+        mossa = ricerca.cerca(game, filetto.come_giocatore({'nome': 'a', 'simbolo': 'x', 'tipo': 'computer', 'tempo_ms': 10}))
+        self.assertIsNotNone(mossa)
+        self.assertTrue(game.mossa_valida(*mossa))
+
+    def test_compiti_senza_regole_compilate(self):
+        #i rollout ricevono solo mappa e opzioni delle regole: i compiti non portano con sé tabelle e cache dei limiti
+        game = filetto.Game(9, [{'nome': 'a', 'simbolo': 'x', 'tipo': 'computer'},
+                                {'nome': 'b', 'simbolo': 'o', 'tipo': 'computer'}], MAPPA, regole={'pesi': [1, 2, 1, 1]})
+        compiti = []
+        originale = filetto.rollout_mcts
+
+        def rollout(compito):
+            compiti.append(compito)
+            return originale(compito)
+
+        with mock.patch.object(filetto, 'rollout_mcts', rollout):
+            filetto.RicercaMCTS().cerca(game, filetto.come_giocatore({'nome': 'a', 'simbolo': 'x', 'tipo': 'computer', 'tempo_ms': 10}))
+        self.assertTrue(compiti)
+        for compito in compiti:
+            self.assertFalse(any(isinstance(parte, filetto.RegolePunteggio) for parte in compito))
+            self.assertEqual(compito[4], (game.regole.mappa_punteggi, game.regole.opzioni()))
+
+    def test_tempo_comprende_preparazione(self):
+        random.seed(2)
+        game = filetto.Game(200, [{'nome': 'a', 'simbolo': 'x', 'tipo': 'computer'},
+                                  {'nome': 'b', 'simbolo': 'o', 'tipo': 'computer'}], MAPPA)
+        for _ in range(2000):
+            game.mossa(*game.celle_libere.scegli())
+            game.prossimo_turno()
+        for tempo_ms in (0, 50):
+            giocatore = filetto.come_giocatore({'nome': 'a', 'simbolo': game.giocatore_corrente().simbolo,
+                                                'tipo': 'computer', 'difficolta': 'mcts', 'tempo_ms': tempo_ms})
+            inizio = time.perf_counter()
+            mossa = filetto.RicercaMCTS().cerca(game, giocatore)
+            self.assertLess(time.perf_counter() - inizio, tempo_ms / 1000 + 0.05)
+            self.assertTrue(game.mossa_valida(*mossa))
+
+
+class TestCalcoloMossa(unittest.TestCase):
+    def partita(self):
+        random.seed(3)
+        giocatori = [{'nome': 'a', 'simbolo': 'x', 'tipo': 'computer', 'difficolta': 'mcts', 'tempo_ms': 150},
+                     {'nome': 'b', 'simbolo': 'o', 'tipo': 'computer'}]
+        game = filetto.Game(9, giocatori, MAPPA, win_threshold=10 ** 9)
+        for _ in range(10):
+            game.mossa(*game.celle_libere.scegli())
+            game.prossimo_turno()
+        return game
+
+    def modifica_durante_il_calcolo(self, game, calcolo):
+        """
+        gioca e annulla mosse sul gioco mentre il thread cerca; i punteggi devono restare quelli di un ricalcolo completo
+        """
+        while calcolo.thread.is_alive():
+            game.mossa(*game.celle_libere.scegli())
+            game.annulla_mossa()
+        for simbolo in 'xo':
+            self.assertEqual(game.punteggi_simboli[simbolo], punteggio_riferimento(game.board, 9, simbolo))
+
+    def test_ricerca_sulla_copia(self):
+        game = self.partita()
+        storico = list(game.storico)
+        calcolo = filetto.CalcoloMossa(game, game.giocatore_corrente())
+        calcolo.avvia()
+        self.modifica_durante_il_calcolo(game, calcolo)
+        pronta, mossa = calcolo.risultato()
+        self.assertTrue(pronta)
+        self.assertEqual(game.storico, storico)
+        self.assertTrue(game.mossa_valida(*mossa))
+        self.assertIs(game.mcts, calcolo.copia.mcts)
+
+    def test_calcolo_annullato(self):
+        game = self.partita()
+        calcolo = filetto.CalcoloMossa(game, game.giocatore_corrente())
+        calcolo.avvia()
+        calcolo.annulla()
+        self.modifica_durante_il_calcolo(game, calcolo)
+        self.assertEqual(calcolo.risultato(), (False, None))
+        self.assertIsNone(game.mcts)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_benchmark_senza_domande(self):
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, 'benchmark.json')
+            with contextlib.redirect_stdout(io.StringIO()):
+                regressioni = filetto.run_argomenti(['--benchmark', percorso, '--dimensione', '3', '--giocatori', '2'])
+            with open(percorso, encoding='utf-8') as file:
+                risultati = json.load(file)
+        self.assertEqual(regressioni, [])
+        self.assertTrue(risultati['misure'])
+        self.assertEqual({m['dimensione'] for m in risultati['misure']}, {3})
+        self.assertEqual([p['giocatori'] for p in risultati['partite']], [2])
+
+    def test_confronto_regressioni(self):
+        misura = {'funzione': 'f', 'dimensione': 3, 'giocatori': 2, 'riempimento': 0.5}
+        precedente = {'misure': [dict(misura, secondi_per_chiamata=1.0)]}
+        self.assertEqual(filetto.confronta_benchmark(precedente, {'misure': [dict(misura, secondi_per_chiamata=1.1)]}), [])
+        regressioni = filetto.confronta_benchmark(precedente, {'misure': [dict(misura, secondi_per_chiamata=1.5)]})
+        self.assertEqual(len(regressioni), 1)
+        self.assertAlmostEqual(regressioni[0]['rapporto'], 1.5)
+
+
+class TestArgomenti(unittest.TestCase):
+    def test_partite_almeno_una(self):
+        for partite in ('0', '-3'):
+            with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()) as errori:
+                filetto.run_argomenti(['-n', '3', '--games', partite, '--quiet'])
+            self.assertIn("almeno 1", errori.getvalue())
+
+    def test_avvio_senza_numpy_e_asyncio(self):
+        #numpy e asyncio sono caricati solo dalle modalità che li usano: il caricamento del gioco non li importa
+        codice = ("import importlib.util, sys\n"
+                  f"spec = importlib.util.spec_from_file_location('filetto', {PERCORSO_GIOCO!r})\n"
+                  "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+                  "print(sorted(m for m in ('numpy', 'asyncio', 'tkinter') if m in sys.modules))")
+        esito = subprocess.run([sys.executable, '-c', codice], capture_output=True, text=True, check=True)
+        self.assertEqual(esito.stdout.strip(), '[]')
+
+
+if __name__ == '__main__':
+    unittest.main()